@@ -15,7 +15,7 @@ echo pause >> run_whisper_gui.bat
 REM Create directory structure
 mkdir whisper_gui
 move whisper_gui.py whisper_gui\main.py
-echo from whisper_gui.main import * > whisper_gui\__init__.py
+echo # whisper_gui/__init__.py > whisper_gui\__init__.py
 
 REM Download FFmpeg
 powershell -Command "Invoke-WebRequest -Uri 'https://github.com/BtbN/FFmpeg-Builds/releases/download/latest/ffmpeg-master-latest-win64-gpl.zip' -OutFile 'ffmpeg.zip'"
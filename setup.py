@@ -13,6 +13,8 @@ setup(
     entry_points={
         "console_scripts": [
             "whisper-gui=whisper_gui.main:main",
+            "whisper-cli=whisper_gui.cli:main",
+            "whisper-server=whisper_gui.server:main",
         ],
     },
 )
\ No newline at end of file
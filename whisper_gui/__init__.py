@@ -1 +1 @@
-from whisper_gui.main import * 
+# whisper_gui/__init__.py
@@ -0,0 +1,240 @@
+# whisper_gui/audio_cache.py
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from whisper_gui.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+whisper = lazy_import("whisper")
+
+CACHE_DIR = Path(os.path.dirname(__file__)) / "cache" / "audio"
+# Bytes hashed from the start, middle and end of a file for its fingerprint
+FINGERPRINT_BLOCK = 1024 * 1024
+
+_fingerprints = {}
+_fingerprints_lock = threading.Lock()
+
+
+def file_fingerprint(path):
+    """Content fingerprint of a media file
+
+    Hashes the file size together with blocks from its start, middle and
+    end, so multi-gigabyte files are fingerprinted without reading them in
+    full. Results are memoized until the file's size or mtime changes.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _fingerprints_lock:
+        if key in _fingerprints:
+            return _fingerprints[key]
+
+    digest = hashlib.sha1(str(stat.st_size).encode())
+    with open(path, "rb") as f:
+        for offset in (0, stat.st_size // 2, stat.st_size - FINGERPRINT_BLOCK):
+            f.seek(max(offset, 0))
+            digest.update(f.read(FINGERPRINT_BLOCK))
+    fingerprint = digest.hexdigest()
+
+    with _fingerprints_lock:
+        _fingerprints[key] = fingerprint
+    return fingerprint
+
+
+class AudioCache:
+    """Decoded 16 kHz mono PCM per input, stored as memory-mappable files
+
+    Entries are keyed by content fingerprint, so renamed or copied inputs
+    still hit. float32 entries are mapped straight into the returned array;
+    int16 entries take half the disk space but are converted on load. The
+    oldest entries are deleted when the cache grows past budget_mb.
+    """
+
+    def __init__(self, budget_mb=2048, dtype="float32", cache_dir=CACHE_DIR):
+        if dtype not in ("float32", "int16"):
+            raise ValueError(f"Unsupported audio cache dtype: {dtype}")
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.dtype = dtype
+        self.cache_dir = Path(cache_dir)
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, fingerprint):
+        return self.cache_dir / f"{fingerprint}.{self.dtype}.pcm"
+
+    def lookup(self, path, log=None):
+        """Return the cached audio of path, or None on a miss"""
+        entry = self._entry_path(file_fingerprint(path))
+        if not entry.exists():
+            return None
+        self.hits += 1
+        os.utime(entry)  # mark as recently used
+        if log:
+            log(f"Audio cache hit: {os.path.basename(path)}")
+        return self._map(entry)
+
+    def load(self, path, log=None):
+        """Return the decoded audio of path, decoding it only on a cache miss"""
+        audio = self.lookup(path, log)
+        if audio is not None:
+            return audio
+
+        entry = self._entry_path(file_fingerprint(path))
+        self.misses += 1
+        audio = whisper.load_audio(path)
+        if not len(audio):
+            return audio
+        try:
+            self._store(entry, audio)
+        except OSError as e:
+            print(f"Error writing audio cache entry: {e}")
+            return audio
+        if log:
+            log(f"Audio cache miss: decoded {os.path.basename(path)}")
+        return self._map(entry)
+
+    def _map(self, entry):
+        if self.dtype == "float32":
+            # Copy-on-write so torch.from_numpy gets a writable array
+            return np.memmap(entry, dtype=np.float32, mode="c")
+        pcm = np.memmap(entry, dtype=np.int16, mode="r")
+        return pcm.astype(np.float32) / 32768.0
+
+    def _encode(self, audio):
+        if self.dtype == "float32":
+            return np.asarray(audio, dtype=np.float32)
+        return (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+
+    def _store(self, entry, audio):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        data = self._encode(audio)
+        self.evict(data.nbytes)
+
+        # Write under a temporary name so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                data.tofile(f)
+            os.replace(tmp_path, entry)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def entry_sink(self, path):
+        """An EntrySink that stores audio of path streamed in blocks"""
+        self.misses += 1
+        return EntrySink(self, self._entry_path(file_fingerprint(path)))
+
+    def evict(self, needed_bytes=0):
+        """Delete least recently used entries until needed_bytes fit the budget"""
+        if not self.cache_dir.exists():
+            return
+        entries = []
+        for entry in self.cache_dir.glob("*.pcm"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total + needed_bytes <= self.budget_bytes:
+                break
+            try:
+                entry.unlink()
+                total -= size
+            except OSError:
+                pass
+
+    def size_bytes(self):
+        if not self.cache_dir.exists():
+            return 0
+        return sum(entry.stat().st_size for entry in self.cache_dir.glob("*.pcm"))
+
+
+class EntrySink:
+    """Write audio blocks to a cache entry while they are decoded
+
+    The entry is published only by commit(), once the whole file has been
+    read; abort() drops it. A failed write disables the sink instead of
+    failing the job.
+    """
+
+    def __init__(self, cache, entry):
+        self.cache = cache
+        self.entry = entry
+        self.bytes = 0
+        cache.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=cache.cache_dir, suffix=".tmp")
+        self.file = os.fdopen(fd, "wb")
+
+    def write(self, block):
+        if self.file is None:
+            return
+        try:
+            data = self.cache._encode(block)
+            data.tofile(self.file)
+            self.bytes += data.nbytes
+        except OSError as e:
+            print(f"Error writing audio cache entry: {e}")
+            self.abort()
+
+    def commit(self):
+        if self.file is None:
+            return
+        try:
+            self.file.close()
+            self.file = None
+            if not self.bytes:
+                os.remove(self.tmp_path)
+                return
+            self.cache.evict(self.bytes)
+            os.replace(self.tmp_path, self.entry)
+        except OSError as e:
+            print(f"Error writing audio cache entry: {e}")
+            self.abort()
+
+    def abort(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+# Process-wide cache used by transcriber.load_audio, off until configured
+_default_cache = None
+
+
+def configure(budget_mb, dtype="float32"):
+    """Enable the process-wide audio cache, or disable it with budget_mb=0"""
+    global _default_cache
+    _default_cache = AudioCache(budget_mb, dtype) if budget_mb else None
+    return _default_cache
+
+
+def default_cache():
+    return _default_cache
+
+
+def slice_ref(audio, start, end):
+    """A picklable reference to audio[start:end]
+
+    Slices of cached float32 audio are passed as (file, start, end) so that
+    worker processes map the samples themselves instead of receiving a copy.
+    """
+    if isinstance(audio, np.memmap) and audio.filename and audio.dtype == np.float32:
+        return ("pcm", audio.filename, start, end)
+    return audio[start:end]
+
+
+def resolve_ref(ref):
+    """Turn a slice_ref() result back into an array"""
+    if isinstance(ref, tuple) and ref and ref[0] == "pcm":
+        _, filename, start, end = ref
+        return np.memmap(filename, dtype=np.float32, mode="c")[start:end]
+    return ref
@@ -0,0 +1,398 @@
+# whisper_gui/benchmark.py
+import argparse
+import fnmatch
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from whisper_gui.model_cache import MODEL_SIZES
+from whisper_gui.timing import measure, synthetic_speech
+from whisper_gui.workers import available_cores
+
+SUITES = ("startup", "config", "writers", "model")
+# Allowed slowdown before a result counts as a regression, by name pattern
+DEFAULT_THRESHOLDS = {
+    "startup.*": 0.30,
+    "model.*": 0.25,
+    "*": 0.20,
+}
+
+
+def result(value, unit="s", **extra):
+    return dict(extra, value=round(value, 6), unit=unit)
+
+
+def synthetic_segments(count, words_per_segment=8, seconds=2.5):
+    """Segments shaped like Whisper output, with word timestamps"""
+    rng = random.Random(0)
+    vocabulary = (
+        "the model speech recording subtitle quickly and because tomorrow "
+        "meeting transcribe window question"
+    ).split()
+    segments = []
+    for index in range(count):
+        start = index * seconds
+        step = seconds / words_per_segment
+        words = []
+        for i in range(words_per_segment):
+            text = rng.choice(vocabulary)
+            if i == words_per_segment - 1:
+                text += rng.choice((".", ",", "?", ""))
+            words.append(
+                {
+                    "word": f" {text}",
+                    "start": start + i * step,
+                    "end": start + (i + 0.9) * step,
+                    "probability": 0.9,
+                }
+            )
+        segments.append(
+            {
+                "id": index,
+                "start": start,
+                "end": start + seconds,
+                "text": "".join(word["word"] for word in words),
+                "words": words,
+                "avg_logprob": -0.3,
+                "no_speech_prob": 0.01,
+            }
+        )
+    return segments
+
+
+def bench_startup(args):
+    """Import time of the GUI module and, with a display, time to first paint"""
+    results = {}
+    command = [
+        sys.executable,
+        "-c",
+        "import time; s = time.perf_counter(); import whisper_gui.main; "
+        "print(time.perf_counter() - s)",
+    ]
+    times = []
+    for _ in range(args.repeat):
+        output = subprocess.run(command, capture_output=True, text=True, check=True)
+        times.append(float(output.stdout.strip().splitlines()[-1]))
+    results["startup.import_main"] = result(statistics.median(times))
+
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        try:
+            output = subprocess.run(
+                [sys.executable, "-m", "whisper_gui.main", "--startup-profile"],
+                capture_output=True,
+                text=True,
+                check=True,
+                timeout=300,
+            )
+            timings = json.loads(output.stdout[output.stdout.index("{") :])
+            results["startup.time_to_first_paint"] = result(
+                timings["time_to_first_paint"]
+            )
+        except Exception as e:
+            print(f"Skipping first-paint benchmark: {e}", file=sys.stderr)
+    return results
+
+
+def bench_config(args):
+    """ConfigManager load, save, record and estimate costs with a large history"""
+    from whisper_gui.config_manager import ConfigManager
+
+    results = {}
+    rng = random.Random(0)
+    records = []
+    for _ in range(args.history_records):
+        duration = rng.uniform(30, 3600)
+        records.append(
+            {
+                "timestamp": "2024-01-01T00:00:00",
+                "video_size": duration * 16000,
+                "duration": duration,
+                "model_size": rng.choice(MODEL_SIZES),
+                "word_timestamps": rng.random() < 0.5,
+                "segment_length": 7.0,
+                "processing_time": duration / 60 * rng.uniform(0.1, 0.5),
+                "task": "transcribe",
+                "language": "auto",
+                "cores": available_cores(),
+            }
+        )
+    options = {"model_size": "base", "word_timestamps": True, "task": "transcribe"}
+
+    for backend in ("jsonl", "sqlite"):
+        with tempfile.TemporaryDirectory() as config_dir:
+            with open(
+                os.path.join(config_dir, "whisper_config.json"), "w", encoding="utf-8"
+            ) as f:
+                json.dump({"settings": {"history_backend": backend}}, f)
+            ConfigManager(config_dir).history.extend(records)
+
+            managers = []
+            median, _ = measure(
+                lambda: managers.append(ConfigManager(config_dir)), args.repeat
+            )
+            results[f"config.{backend}.load"] = result(
+                median, records=args.history_records
+            )
+            manager = managers[-1]
+
+            median, _ = measure(manager.save_config, args.repeat)
+            results[f"config.{backend}.save_config"] = result(median)
+
+            def add_records():
+                for _ in range(100):
+                    manager.add_processing_record(
+                        1e6, 600, "base", True, 7.0, 2.0, task="transcribe"
+                    )
+
+            median, _ = measure(add_records, args.repeat)
+            results[f"config.{backend}.add_record"] = result(median / 100)
+
+            def estimate():
+                for _ in range(1000):
+                    manager.estimate_job(600, options, 1e7)
+
+            median, _ = measure(estimate, args.repeat)
+            results[f"config.{backend}.estimate"] = result(median / 1000)
+
+            median, _ = measure(
+                lambda: manager.history.query("base", True), args.repeat
+            )
+            results[f"config.{backend}.query"] = result(median)
+            manager.history.close()
+            for other in managers[:-1]:
+                other.history.close()
+    return results
+
+
+def bench_writers(args):
+    """Re-segmentation and single-pass writing of a large result"""
+    from whisper_gui import resegment, writers
+
+    results = {}
+    count = args.segments
+    segments = synthetic_segments(count)
+    result_data = {
+        "text": "".join(segment["text"] for segment in segments),
+        "language": "en",
+        "duration": segments[-1]["end"],
+        "segments": segments,
+    }
+    with tempfile.TemporaryDirectory() as output_dir:
+        output = os.path.join(output_dir, "out.srt")
+        for fmt in writers.FORMATS:
+            median, _ = measure(
+                lambda: writers.write_outputs(result_data, {fmt: output}), args.repeat
+            )
+            results[f"writers.{fmt}"] = result(
+                median, segments=count, segments_per_second=round(count / median)
+            )
+        paths = writers.output_paths(output, writers.FORMATS)
+        median, _ = measure(
+            lambda: writers.write_outputs(result_data, paths), args.repeat
+        )
+        results["writers.all_formats"] = result(
+            median, segments=count, segments_per_second=round(count / median)
+        )
+
+    median, _ = measure(lambda: resegment.resegment(segments, 7.0), args.repeat)
+    results["writers.resegment"] = result(median, segments=count)
+    return results
+
+
+def cached_checkpoint(model_size):
+    """Path of a downloaded Whisper checkpoint, or None if it is not on disk"""
+    import whisper
+
+    cache_root = os.path.join(
+        os.getenv("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+        "whisper",
+    )
+    url = whisper._MODELS.get(model_size)
+    if not url:
+        return None
+    path = os.path.join(cache_root, os.path.basename(url))
+    return path if os.path.exists(path) else None
+
+
+def bench_model(args):
+    """Load time and real-time factor on CPU, for checkpoints already on disk"""
+    try:
+        import torch
+        import whisper
+    except ImportError as e:
+        print(f"Skipping model benchmarks: {e}", file=sys.stderr)
+        return {}
+
+    torch.set_num_threads(args.threads or available_cores())
+    results = {}
+    audio = synthetic_speech(args.clip_seconds)
+    for model_size in args.models:
+        checkpoint = cached_checkpoint(model_size)
+        if not checkpoint:
+            print(
+                f"Skipping {model_size}: checkpoint not downloaded (runs offline)",
+                file=sys.stderr,
+            )
+            continue
+        # Only one copy is kept: the previous load is freed before the next
+        # is timed, so large models are never held several times over
+        times = []
+        for _ in range(args.repeat):
+            model = None
+            gc.collect()
+            start = time.perf_counter()
+            model = whisper.load_model(
+                model_size, device="cpu", download_root=os.path.dirname(checkpoint)
+            )
+            times.append(time.perf_counter() - start)
+        results[f"model.{model_size}.load"] = result(statistics.median(times))
+
+        median, _ = measure(
+            lambda m=model: m.transcribe(
+                audio, language="en", fp16=False, temperature=0.0
+            ),
+            max(1, args.repeat // 2),
+        )
+        results[f"model.{model_size}.rtf"] = result(
+            median / args.clip_seconds,
+            unit="x",
+            clip_seconds=args.clip_seconds,
+            threads=torch.get_num_threads(),
+        )
+        model = None
+    return results
+
+
+BENCHMARKS = {
+    "startup": bench_startup,
+    "config": bench_config,
+    "writers": bench_writers,
+    "model": bench_model,
+}
+
+
+def threshold_for(name, thresholds):
+    for pattern, threshold in thresholds.items():
+        if fnmatch.fnmatch(name, pattern):
+            return threshold
+    return thresholds.get("*", 0.2)
+
+
+def compare(results, baseline, thresholds):
+    """Return (name, baseline, current, change) for every regressed result
+
+    Every result is a cost, so a value above the baseline by more than its
+    threshold is a regression.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or previous["value"] <= 0:
+            continue
+        change = current["value"] / previous["value"] - 1.0
+        if change > threshold_for(name, thresholds):
+            regressions.append((name, previous["value"], current["value"], change))
+    return regressions
+
+
+def environment():
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cores": available_cores(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    try:
+        import torch
+
+        info["torch"] = torch.__version__
+    except ImportError:
+        pass
+    return info
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m whisper_gui.benchmark",
+        description="Offline CPU benchmarks for startup, config, writers and "
+        "models. Writes JSON and can compare against a saved baseline.",
+    )
+    parser.add_argument(
+        "--suite",
+        action="append",
+        choices=SUITES,
+        help="Suite to run (repeatable, default: all)",
+    )
+    parser.add_argument(
+        "--models",
+        nargs="+",
+        default=["tiny", "base"],
+        choices=MODEL_SIZES,
+        help="Model sizes to benchmark; checkpoints are never downloaded",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, help="Torch threads for models")
+    parser.add_argument("--clip-seconds", type=float, default=60.0)
+    parser.add_argument("--segments", type=int, default=100000)
+    parser.add_argument("--history-records", type=int, default=10000)
+    parser.add_argument("-o", "--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument(
+        "--save-baseline", help="Also write the results as a new baseline here"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        help="Allowed slowdown for every result (e.g. 0.2 for 20%%), "
+        "overriding the per-suite defaults",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    results = {}
+    for suite in args.suite or SUITES:
+        print(f"Running {suite} benchmarks...", file=sys.stderr)
+        results.update(BENCHMARKS[suite](args))
+    report = {"environment": environment(), "results": results}
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        thresholds = (
+            {"*": args.threshold} if args.threshold is not None else DEFAULT_THRESHOLDS
+        )
+        regressions = compare(results, baseline.get("results", {}), thresholds)
+        for name, previous, current, change in regressions:
+            print(
+                f"REGRESSION {name}: {previous:.6g} -> {current:.6g} "
+                f"(+{change * 100:.0f}%)",
+                file=sys.stderr,
+            )
+        if regressions:
+            return 1
+        print("No regressions against baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+# whisper_gui/checkpoint.py
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from whisper_gui.result_cache import result_key
+
+CHECKPOINT_VERSION = 1
+# Options that change where windows fall, on top of those in the result key
+WINDOW_OPTIONS = ("window_seconds", "segment_length")
+
+
+def checkpoint_path(output_path):
+    return f"{os.path.splitext(output_path)[0]}.checkpoint.json"
+
+
+def checkpoint_key(input_path, options):
+    """Identify the input and the settings a checkpoint is only valid for"""
+    parts = [result_key(input_path, options)]
+    parts.extend(f"{name}={options.get(name)}" for name in WINDOW_OPTIONS)
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+class Checkpoint:
+    """Progress of a window-by-window job, kept in a sidecar next to its output
+
+    update() is called after every window with the decoder state and the
+    segments finished so far, and writes them at most every interval
+    seconds; save() writes them at once. load() returns the saved state when
+    the sidecar belongs to the same input and settings, so an interrupted
+    job can continue from its last window instead of starting over.
+    """
+
+    def __init__(self, path, key, interval=60.0):
+        self.path = path
+        self.key = key
+        self.interval = interval
+        self.state = None
+        self.segments = []
+        self._saved_at = time.monotonic()
+
+    def load(self):
+        """Saved state with its segments, or None if there is nothing to resume"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Error reading checkpoint: {e}")
+            return None
+        if data.get("version") != CHECKPOINT_VERSION or data.get("key") != self.key:
+            return None
+        self.state = data["state"]
+        self.segments = data["segments"]
+        return dict(self.state, segments=list(self.segments))
+
+    def update(self, state, segments):
+        self.state = dict(state)
+        self.segments = list(segments)
+        if time.monotonic() - self._saved_at >= self.interval:
+            self.save()
+
+    def save(self):
+        if self.state is None:
+            return
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "key": self.key,
+            "state": self.state,
+            "segments": self.segments,
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, default=float)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        except Exception as e:
+            print(f"Error saving checkpoint: {e}")
+        self._saved_at = time.monotonic()
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error removing checkpoint: {e}")
+
+
+def for_job(input_path, output_path, options):
+    """The job's Checkpoint, or None when checkpoints are turned off"""
+    if not options.get("checkpoint_minutes"):
+        return None
+    return Checkpoint(
+        checkpoint_path(output_path),
+        checkpoint_key(input_path, options),
+        options.get("checkpoint_interval_seconds", 60.0),
+    )
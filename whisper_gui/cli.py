@@ -0,0 +1,491 @@
+# whisper_gui/cli.py
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from whisper_gui import (
+    audio_cache,
+    checkpoint,
+    profiling,
+    result_cache,
+    transcriber,
+    workers,
+    writers,
+)
+from whisper_gui.config_manager import DEFAULT_SETTINGS, ConfigManager
+from whisper_gui.model_cache import ModelCache
+from whisper_gui.parallel import ChunkTranscriber
+from whisper_gui.transcriber import MEDIA_EXTENSIONS
+
+
+def expand_inputs(patterns):
+    """Expand files, directories and glob patterns into a list of media files"""
+    files = []
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = sorted(
+                str(path)
+                for path in Path(pattern).iterdir()
+                if path.is_file() and path.suffix.lower() in MEDIA_EXTENSIONS
+            )
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True)) or [pattern]
+        for match in matches:
+            if os.path.isfile(match) and match not in seen:
+                seen.add(match)
+                files.append(match)
+            elif not os.path.exists(match):
+                print(f"Warning: no such file: {match}", file=sys.stderr)
+    return files
+
+
+def _process_one(task):
+    """Transcribe one file inside a worker and return its summary record"""
+    input_path, output_path, options = task
+    record = {
+        "input": input_path,
+        "output": output_path,
+        "model_size": options["model_size"],
+        "quantized": options["quantized"],
+        "pid": os.getpid(),
+    }
+    start = time.perf_counter()
+    timer = profiling.StageTimer()
+    profile_name = f"{Path(input_path).stem}-{os.getpid()}"
+    try:
+        with profiling.timing(timer), profiling.profile_job(
+            options.get("profile", ""), profile_name, _log
+        ):
+            result = transcriber.cached_result(input_path, options, _log)
+            record["result_cache"] = "miss" if result is None else "hit"
+            if result is None:
+                cache = workers.worker_cache()
+                key = cache.resolve_job_key(options)
+                with profiling.stage("load_model"):
+                    model = cache.acquire(*key)
+                job_checkpoint = checkpoint.for_job(input_path, output_path, options)
+                try:
+                    if options.get("streaming"):
+                        result = transcriber.transcribe_streaming(
+                            model,
+                            input_path,
+                            output_path,
+                            options,
+                            fp16=key[2] == "fp16",
+                            log=_log,
+                            checkpoint=job_checkpoint,
+                        )
+                    else:
+                        result = transcriber.transcribe(
+                            model,
+                            input_path,
+                            options,
+                            fp16=key[2] == "fp16",
+                            log=_log,
+                            checkpoint=job_checkpoint,
+                        )
+                finally:
+                    cache.release(model)
+                result = transcriber.cascade_result(
+                    cache, input_path, result, options, _log
+                )
+                transcriber.store_result(input_path, options, result)
+            if "segments" in result:
+                transcriber.export_result(result, output_path, options)
+        elapsed = time.perf_counter() - start
+        duration = result["duration"]
+        record.update(
+            {
+                "status": "ok",
+                "duration": round(duration, 3),
+                "processing_time": round(elapsed, 3),
+                "model_load_time": round(timer.stages.get("load_model", 0.0), 3),
+                "language": result.get("language"),
+            }
+        )
+        record.update(profiling.job_metrics(timer, duration))
+        if "vad" in result:
+            record["vad_skipped_seconds"] = round(result["vad"]["skipped_seconds"], 3)
+        if result.get("resumed_from"):
+            record["resumed_from"] = round(result["resumed_from"], 3)
+    except Exception as e:
+        record.update(
+            {
+                "status": "error",
+                "error": str(e),
+                "processing_time": round(time.perf_counter() - start, 3),
+            }
+        )
+    return record
+
+
+def _log(message):
+    print(message, file=sys.stderr)
+
+
+def _split_files(tasks, args):
+    """Transcribe files in turn, each one split across the process pool"""
+    chunk_transcriber = ChunkTranscriber(
+        args.workers, args.threads, budget_mb=args.model_cache_mb
+    )
+    # Only loads a model when a job re-decodes low-confidence spans
+    cascade_cache = ModelCache(budget_mb=args.model_cache_mb, log=_log)
+    try:
+        for input_path, output_path, options in tasks:
+            record = {
+                "input": input_path,
+                "output": output_path,
+                "model_size": options["model_size"],
+                "quantized": options["quantized"],
+            }
+            start = time.perf_counter()
+            timer = profiling.StageTimer()
+            try:
+                with profiling.timing(timer):
+                    result = transcriber.cached_result(input_path, options, _log)
+                    record["result_cache"] = "miss" if result is None else "hit"
+                    if result is None:
+                        result = chunk_transcriber.transcribe(
+                            input_path, options, log=_log
+                        )
+                        result = transcriber.cascade_result(
+                            cascade_cache, input_path, result, options, _log
+                        )
+                        transcriber.store_result(input_path, options, result)
+                    transcriber.export_result(result, output_path, options)
+                elapsed = time.perf_counter() - start
+                duration = result["duration"]
+                record.update(
+                    {
+                        "status": "ok",
+                        "duration": round(duration, 3),
+                        "processing_time": round(elapsed, 3),
+                        "chunks": result.get("chunks"),
+                        "vad_skipped_seconds": round(
+                            result["vad"]["skipped_seconds"], 3
+                        )
+                        if "vad" in result
+                        else None,
+                        "language": result.get("language"),
+                    }
+                )
+                record.update(profiling.job_metrics(timer, duration))
+            except Exception as e:
+                record.update(
+                    {
+                        "status": "error",
+                        "error": str(e),
+                        "processing_time": round(time.perf_counter() - start, 3),
+                    }
+                )
+            yield record
+    finally:
+        chunk_transcriber.close()
+
+
+def parse_formats(value):
+    formats = [fmt.strip().lower() for fmt in value.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in formats if fmt not in writers.FORMATS]
+    if not formats or unknown:
+        raise argparse.ArgumentTypeError(
+            f"invalid format {value!r} (choose from {', '.join(writers.FORMATS)})"
+        )
+    return formats
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {value}")
+    return number
+
+
+def positive_float(value):
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0: {value}")
+    return number
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="whisper-gui",
+        description="Transcribe media files without the GUI. Prints one JSON "
+        "record per file and a final summary record to stdout.",
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="Media files, directories or glob patterns"
+    )
+    parser.add_argument(
+        "-o", "--output-dir", help="Directory for outputs (default: next to input)"
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        default="srt",
+        type=parse_formats,
+        help="Output format, or several separated by commas (e.g. srt,vtt,json) "
+        "to write them all from one transcription. Choices: "
+        + ", ".join(writers.FORMATS),
+    )
+    parser.add_argument(
+        "-m",
+        "--model",
+        default="base",
+        choices=["tiny", "base", "small", "medium", "large"],
+    )
+    parser.add_argument(
+        "--quantized",
+        action="store_true",
+        help="Run an int8 dynamically quantized copy of the model on CPU "
+        "(converted once and cached in whisper_gui/cache/models)",
+    )
+    parser.add_argument("-l", "--language", default="auto")
+    parser.add_argument(
+        "--task", default="transcribe", choices=["transcribe", "translate"]
+    )
+    parser.add_argument("--word-timestamps", action="store_true")
+    parser.add_argument(
+        "--segment-length",
+        type=positive_float,
+        default=7.0,
+        help="Target subtitle segment length in seconds",
+    )
+    parser.add_argument(
+        "--max-line-chars",
+        type=positive_int,
+        default=DEFAULT_SETTINGS["max_line_chars"],
+        help="Maximum characters per subtitle line",
+    )
+    parser.add_argument(
+        "--max-lines",
+        type=positive_int,
+        default=DEFAULT_SETTINGS["max_cue_lines"],
+        help="Maximum lines per subtitle cue",
+    )
+    parser.add_argument(
+        "--confidence",
+        action="store_true",
+        help="Score segments and words and write a <name>.confidence.json sidecar",
+    )
+    parser.add_argument(
+        "--confidence-threshold",
+        type=float,
+        default=DEFAULT_SETTINGS["confidence_threshold"],
+        help="Confidence below which a segment counts as low (0-1)",
+    )
+    parser.add_argument(
+        "--mark-low-confidence",
+        action="store_true",
+        help="Highlight low-confidence cues in SRT and VTT output",
+    )
+    parser.add_argument(
+        "--cascade",
+        default="",
+        choices=["", "tiny", "base", "small", "medium", "large"],
+        help="Re-decode low-confidence spans with this larger model",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Transcribe in windows and append segments to the output as they finish",
+    )
+    parser.add_argument(
+        "--window",
+        type=float,
+        default=DEFAULT_SETTINGS["stream_window_seconds"],
+        help="Window length in seconds for --stream",
+    )
+    parser.add_argument(
+        "--stream-ingest-minutes",
+        type=float,
+        default=DEFAULT_SETTINGS["stream_ingest_minutes"],
+        help="Read inputs longer than this through ffmpeg in blocks and decode "
+        "them in windows, so memory does not grow with file length (0 disables)",
+    )
+    parser.add_argument(
+        "--checkpoint-minutes",
+        type=float,
+        default=DEFAULT_SETTINGS["checkpoint_minutes"],
+        help="Decode inputs longer than this in windows and checkpoint them to "
+        "<output>.checkpoint.json, so an interrupted run resumes (default 0, off)",
+    )
+    parser.add_argument(
+        "--checkpoint-interval",
+        type=float,
+        default=DEFAULT_SETTINGS["checkpoint_interval_seconds"],
+        help="Seconds between checkpoint writes",
+    )
+    parser.add_argument(
+        "--vad",
+        action="store_true",
+        help="Skip silence with an energy-based voice activity detection pre-pass",
+    )
+    parser.add_argument(
+        "--split",
+        action="store_true",
+        help="Process files one at a time, splitting each at silences into "
+        "chunks transcribed by all worker processes in parallel",
+    )
+    parser.add_argument(
+        "-j", "--workers", type=int, help="Worker processes (default: cores / threads)"
+    )
+    parser.add_argument(
+        "-t", "--threads", type=int, help="Torch threads per worker process"
+    )
+    parser.add_argument(
+        "--profile",
+        default="",
+        choices=[mode for mode in profiling.PROFILE_MODES if mode],
+        help="Write a cProfile or torch profiler trace per file to "
+        "whisper_gui/profiles",
+    )
+    parser.add_argument(
+        "--audio-cache-mb",
+        type=int,
+        default=DEFAULT_SETTINGS["audio_cache_mb"],
+        help="Disk budget for cached decoded audio (0 disables the cache)",
+    )
+    parser.add_argument(
+        "--result-cache-mb",
+        type=int,
+        default=DEFAULT_SETTINGS["result_cache_mb"],
+        help="Disk budget for cached transcription results (0 disables the cache)",
+    )
+    parser.add_argument(
+        "--model-cache-mb",
+        type=int,
+        default=DEFAULT_SETTINGS["model_cache_mb"],
+        help="Model cache RAM budget per worker process",
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("Error: no input files found", file=sys.stderr)
+        return 2
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    options = {
+        "model_size": args.model,
+        "quantized": args.quantized,
+        "language": args.language,
+        "task": args.task,
+        "output_format": args.format[0],
+        "extra_formats": args.format[1:],
+        "word_timestamps": args.word_timestamps,
+        "segment_length": args.segment_length,
+        "max_line_chars": args.max_line_chars,
+        "max_lines": args.max_lines,
+        "streaming": args.stream,
+        "window_seconds": args.window,
+        "stream_ingest_minutes": args.stream_ingest_minutes,
+        "checkpoint_minutes": args.checkpoint_minutes,
+        "checkpoint_interval_seconds": args.checkpoint_interval,
+        "vad": args.vad,
+        "profile": args.profile,
+        "confidence": args.confidence or args.mark_low_confidence or bool(args.cascade),
+        "confidence_threshold": args.confidence_threshold,
+        "confidence_marks": args.mark_low_confidence,
+        "cascade_model": args.cascade,
+    }
+    cpu_profile = ConfigManager().cpu_profile(
+        args.model, "int8" if args.quantized else "fp32"
+    )
+    if cpu_profile:
+        # The tuned thread count becomes the per-process default
+        if args.threads is None:
+            args.threads = cpu_profile["threads"]
+        options["beam_size"] = cpu_profile.get("beam_size")
+        print(
+            f"Using tuned CPU profile from {cpu_profile.get('tuned_at', '?')}",
+            file=sys.stderr,
+        )
+    # Largest files first so one long file does not finish last on its own
+    files.sort(key=lambda path: os.path.getsize(path), reverse=True)
+    tasks = [
+        (
+            path,
+            transcriber.output_path_for(path, args.format[0], args.output_dir),
+            options,
+        )
+        for path in files
+    ]
+
+    num_workers, threads = workers.plan_workers(
+        workers.available_cores() if args.split else len(tasks),
+        args.workers,
+        args.threads,
+    )
+    print(
+        f"Processing {len(tasks)} file(s) with {num_workers} worker(s) x "
+        f"{threads} thread(s)",
+        file=sys.stderr,
+    )
+
+    start = time.perf_counter()
+    records = []
+    if args.split:
+        audio_cache.configure(args.audio_cache_mb)
+        result_cache.configure(args.result_cache_mb)
+        records = _emit(_split_files(tasks, args))
+    elif num_workers == 1:
+        workers.init_worker(
+            threads,
+            args.model_cache_mb,
+            audio_cache_mb=args.audio_cache_mb,
+            result_cache_mb=args.result_cache_mb,
+        )
+        results = map(_process_one, tasks)
+        records = _emit(results)
+    else:
+        with workers.create_pool(
+            num_workers,
+            threads,
+            args.model_cache_mb,
+            audio_cache_mb=args.audio_cache_mb,
+            result_cache_mb=args.result_cache_mb,
+        ) as pool:
+            records = _emit(pool.imap_unordered(_process_one, tasks, chunksize=1))
+    wall_time = time.perf_counter() - start
+
+    ok = [record for record in records if record["status"] == "ok"]
+    audio_seconds = sum(record["duration"] for record in ok)
+    summary = {
+        "summary": {
+            "files": len(records),
+            "failed": len(records) - len(ok),
+            "workers": num_workers,
+            "threads_per_worker": threads,
+            "wall_time": round(wall_time, 3),
+            "audio_seconds": round(audio_seconds, 3),
+            "overall_rtf": round(wall_time / audio_seconds, 4)
+            if audio_seconds
+            else None,
+        }
+    }
+    print(json.dumps(summary), flush=True)
+    return 0 if len(ok) == len(records) else 1
+
+
+def _emit(results):
+    """Print each record as a JSON line as soon as it is available"""
+    records = []
+    for record in results:
+        print(json.dumps(record), flush=True)
+        records.append(record)
+    return records
+
+
+if __name__ == "__main__":
+    sys.exit(main())
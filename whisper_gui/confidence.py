@@ -0,0 +1,192 @@
+# whisper_gui/confidence.py
+import json
+import math
+import os
+
+
+# Confidence below which segments count as low, unless the job sets its own
+DEFAULT_THRESHOLD = 0.5
+# Segments further apart than this are re-decoded as separate spans
+SPAN_MERGE_SECONDS = 1.0
+# Audio kept on either side of a span so the larger model has context
+SPAN_PAD_SECONDS = 0.5
+
+
+def threshold_for(options):
+    return float(options.get("confidence_threshold", DEFAULT_THRESHOLD))
+
+
+def segment_confidence(segment):
+    """Chance a segment is right, from Whisper's decoder statistics
+
+    The mean token probability, exp(avg_logprob), discounted by the
+    probability that the segment is not speech at all. None when the
+    segment has no decoder statistics.
+    """
+    logprob = segment.get("avg_logprob")
+    if logprob is None:
+        return None
+    speech = 1.0 - float(segment.get("no_speech_prob") or 0.0)
+    return math.exp(min(float(logprob), 0.0)) * speech
+
+
+def score_segment(segment):
+    """Copy of segment with "confidence" set on it and each of its words"""
+    confidence = segment_confidence(segment)
+    if confidence is None:
+        return segment
+    scored = dict(segment, confidence=round(confidence, 4))
+    if segment.get("words"):
+        speech = 1.0 - float(segment.get("no_speech_prob") or 0.0)
+        scored["words"] = [
+            dict(word, confidence=round(word.get("probability", 1.0) * speech, 4))
+            for word in segment["words"]
+        ]
+    return scored
+
+
+def score_result(result):
+    """Copy of result with confidence on every segment and word"""
+    return dict(
+        result, segments=[score_segment(segment) for segment in result["segments"]]
+    )
+
+
+def mean_confidence(segments):
+    """Duration-weighted mean confidence of scored segments, or None"""
+    total = weight = 0.0
+    for segment in segments:
+        if segment.get("confidence") is None:
+            continue
+        seconds = max(segment["end"] - segment["start"], 0.01)
+        total += segment["confidence"] * seconds
+        weight += seconds
+    return total / weight if weight else None
+
+
+def report_entry(segment, threshold):
+    """What the sidecar keeps of one scored segment"""
+    entry = {
+        "id": segment.get("id"),
+        "start": round(segment["start"], 3),
+        "end": round(segment["end"], 3),
+        "text": segment["text"].strip(),
+        "confidence": segment.get("confidence"),
+        "avg_logprob": segment.get("avg_logprob"),
+        "no_speech_prob": segment.get("no_speech_prob"),
+        "low": segment.get("confidence") is not None
+        and segment["confidence"] < threshold,
+    }
+    if segment.get("redecoded"):
+        entry["redecoded"] = segment["redecoded"]
+    if segment.get("words"):
+        entry["words"] = [
+            {
+                "word": word["word"],
+                "start": round(word["start"], 3),
+                "end": round(word["end"], 3),
+                "confidence": word.get("confidence"),
+            }
+            for word in segment["words"]
+        ]
+    return entry
+
+
+def report_path(output_path):
+    return f"{os.path.splitext(output_path)[0]}.confidence.json"
+
+
+def write_report(entries, output_path, threshold, extra=None):
+    """Write the confidence sidecar next to output_path and return its path"""
+    scored = [entry for entry in entries if entry["confidence"] is not None]
+    report = {
+        "threshold": threshold,
+        "mean_confidence": round(mean_confidence(scored), 4) if scored else None,
+        "low_segments": sum(1 for entry in entries if entry["low"]),
+        "segments": entries,
+    }
+    report.update(extra or {})
+    path = report_path(output_path)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def low_confidence_spans(segments, threshold):
+    """Index ranges [first, last) of segments to re-decode
+
+    Low-confidence segments less than SPAN_MERGE_SECONDS apart share a span,
+    together with anything between them.
+    """
+    spans = []
+    for index, segment in enumerate(segments):
+        confidence = segment.get("confidence")
+        if confidence is None or confidence >= threshold:
+            continue
+        if (
+            spans
+            and segment["start"] - segments[spans[-1][1] - 1]["end"]
+            < SPAN_MERGE_SECONDS
+        ):
+            spans[-1][1] = index + 1
+        else:
+            spans.append([index, index + 1])
+    return [tuple(span) for span in spans]
+
+
+def cascade(result, decode_span, model_size, threshold, log=None):
+    """Re-decode the low-confidence spans of a scored result with a larger model
+
+    decode_span(start, end, prompt) decodes the audio between start and end
+    seconds with the larger model and returns its segments on the file's
+    timeline. Each span is decoded with a little audio around it and the
+    text before it as the prompt; the new segments replace the old ones
+    only when their confidence is higher. Returns a new result with a
+    "cascade" summary.
+    """
+    segments = list(result["segments"])
+    duration = result.get("duration") or (segments[-1]["end"] if segments else 0.0)
+    spans = low_confidence_spans(segments, threshold)
+    replaced = 0
+    seconds = 0.0
+    # Work backwards so replacing a span keeps the earlier indices valid
+    for first, last in reversed(spans):
+        old = segments[first:last]
+        span_start, span_end = old[0]["start"], old[-1]["end"]
+        start = max(span_start - SPAN_PAD_SECONDS, 0.0)
+        end = min(span_end + SPAN_PAD_SECONDS, duration)
+        if end <= start:
+            continue
+        seconds += end - start
+        prompt = "".join(
+            segment["text"] for segment in segments[max(first - 3, 0) : first]
+        )
+        new = []
+        for segment in decode_span(start, end, prompt.strip() or None):
+            # Drop what was decoded from the padding around the span
+            middle = (segment["start"] + segment["end"]) / 2
+            if span_start <= middle <= span_end:
+                new.append(dict(score_segment(segment), redecoded=model_size))
+        old_confidence = mean_confidence(old) or 0.0
+        new_confidence = mean_confidence(new)
+        if new_confidence is not None and new_confidence > old_confidence:
+            segments[first:last] = new
+            replaced += 1
+    segments = [dict(segment, id=index) for index, segment in enumerate(segments)]
+    if log and spans:
+        log(
+            f"Cascade: re-decoded {len(spans)} low-confidence span(s) "
+            f"({seconds:.1f}s) with {model_size}, {replaced} improved"
+        )
+    return dict(
+        result,
+        text="".join(segment["text"] for segment in segments),
+        segments=segments,
+        cascade={
+            "model_size": model_size,
+            "threshold": threshold,
+            "spans": len(spans),
+            "replaced": replaced,
+            "seconds": round(seconds, 3),
+        },
+    )
@@ -1,19 +1,87 @@
 # whisper_gui/config_manager.py
 import json
 import os
+import tempfile
 from datetime import datetime
 from pathlib import Path
 
+from whisper_gui.estimator import Estimator
+from whisper_gui.history import open_history
+from whisper_gui.workers import host_id
+
+# Tunables stored under "settings" in whisper_config.json
+DEFAULT_SETTINGS = {
+    "model_cache_mb": 4096,
+    "prefetch_model": True,
+    "prefetch_warm_up": False,
+    "max_workers": 2,
+    "stream_window_seconds": 120,
+    "stream_ingest_minutes": 60,
+    "checkpoint_minutes": 0,
+    "checkpoint_interval_seconds": 60,
+    "parallel_workers": 0,
+    "audio_cache_mb": 2048,
+    "audio_cache_dtype": "float32",
+    "result_cache_mb": 256,
+    "max_line_chars": 42,
+    "max_cue_lines": 2,
+    "history_backend": "jsonl",
+    "queue_order": "fifo",
+    "profile_mode": "",
+    "ui_refresh_ms": 50,
+    "log_view_lines": 1000,
+    "confidence_threshold": 0.5,
+    "server_port": 8765,
+    "server_max_queued": 32,
+    "server_max_backlog_minutes": 240,
+    "server_max_upload_mb": 2048,
+}
+
 
 class ConfigManager:
-    def __init__(self):
-        self.config_file = Path(os.path.dirname(__file__)) / "whisper_config.json"
+    def __init__(self, config_dir=None):
+        self.config_dir = Path(config_dir or os.path.dirname(__file__))
+        self.config_file = self.config_dir / "whisper_config.json"
         self.config = {
             "recent_inputs": [],
             "recent_outputs": [],
             "processing_history": [],
+            "settings": dict(DEFAULT_SETTINGS),
+            # host id -> "<model size>/<precision>" -> tuned CPU profile
+            "cpu_profiles": {},
         }
         self.load_config()
+        self.history = self.open_history()
+        self.estimator = Estimator(self.history)
+
+    def open_history(self):
+        """Open the history store, moving records out of the JSON config into it"""
+        try:
+            history = open_history(
+                self.get_setting("history_backend"), self.config_dir
+            )
+        except Exception as e:
+            print(f"Error opening processing history: {e}")
+            history = open_history("jsonl", self.config_dir)
+        legacy = self.config["processing_history"]
+        if legacy:
+            try:
+                # If the config could not be saved after an earlier move, the
+                # records are in both places; skip those already in the store
+                moved = {record.get("timestamp") for record in history.recent()}
+                moved.discard(None)
+                history.extend(
+                    [
+                        record
+                        for record in legacy
+                        if record.get("timestamp") not in moved
+                    ]
+                )
+                self.config["processing_history"] = []
+                self.save_config()
+            except Exception as e:
+                print(f"Error migrating processing history: {e}")
+        return history
 
     def load_config(self):
         """Load configuration from JSON file, creating default if doesn't exist"""
@@ -27,6 +95,10 @@ class ConfigManager:
                             loaded_config[key], list
                         ):
                             self.config[key] = loaded_config[key]
+                        elif isinstance(self.config[key], dict) and isinstance(
+                            loaded_config.get(key), dict
+                        ):
+                            self.config[key].update(loaded_config[key])
         except Exception as e:
             print(f"Error loading config: {e}")
             # Keep default config if loading fails
@@ -34,22 +106,51 @@ class ConfigManager:
     def save_config(self):
         """Save current configuration to JSON file"""
         try:
-            with open(self.config_file, "w", encoding="utf-8") as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
+            # Write under a temporary name so a crash never leaves a torn file
+            fd, tmp_path = tempfile.mkstemp(
+                dir=self.config_file.parent, suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(self.config, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_path, self.config_file)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
         except Exception as e:
             print(f"Error saving config: {e}")
 
+    def get_setting(self, key):
+        """Return a setting, falling back to its default"""
+        return self.config["settings"].get(key, DEFAULT_SETTINGS.get(key))
+
+    def cpu_profile(self, model_size, precision="fp32"):
+        """This machine's tuned CPU profile for a model, or None if untuned"""
+        profiles = self.config["cpu_profiles"].get(host_id(), {})
+        return profiles.get(f"{model_size}/{precision}")
+
+    def save_cpu_profile(self, model_size, precision, profile):
+        """Store the fastest profile found by the tuner for this machine"""
+        profiles = self.config["cpu_profiles"].setdefault(host_id(), {})
+        profiles[f"{model_size}/{precision}"] = profile
+        self.save_config()
+
     def add_paths(self, input_path, output_path):
         """Add paths to recent lists, maintaining uniqueness and limit"""
+        changed = False
         if input_path and input_path not in self.config["recent_inputs"]:
             self.config["recent_inputs"].insert(0, input_path)
             self.config["recent_inputs"] = self.config["recent_inputs"][:5]
+            changed = True
 
         if output_path and output_path not in self.config["recent_outputs"]:
             self.config["recent_outputs"].insert(0, output_path)
             self.config["recent_outputs"] = self.config["recent_outputs"][:5]
+            changed = True
 
-        self.save_config()
+        if changed:
+            self.save_config()
 
     def add_processing_record(
         self,
@@ -59,58 +160,42 @@ class ConfigManager:
         word_timestamps,
         segment_length,
         processing_time,
+        **extra,
     ):
-        """Add a processing record to history"""
+        """Append a processing record to the history store
+
+        extra holds further fields to keep with the record, such as the task
+        and language.
+        """
         try:
-            self.config["processing_history"].append(
-                {
-                    "timestamp": datetime.now().isoformat(),
-                    "video_size": float(video_size),
-                    "duration": float(duration),
-                    "model_size": str(model_size),
-                    "word_timestamps": bool(word_timestamps),
-                    "segment_length": float(segment_length),
-                    "processing_time": float(processing_time),
-                }
-            )
-            # Keep last 20 records
-            self.config["processing_history"] = self.config["processing_history"][-20:]
-            self.save_config()
+            record = {
+                "timestamp": datetime.now().isoformat(),
+                "video_size": float(video_size),
+                "duration": float(duration),
+                "model_size": str(model_size),
+                "word_timestamps": bool(word_timestamps),
+                "segment_length": float(segment_length),
+                "processing_time": float(processing_time),
+            }
+            record.setdefault("cores", self.estimator.cores)
+            record.update(extra)
+            self.history.append(record)
+            self.estimator.observe(record)
         except Exception as e:
             print(f"Error adding processing record: {e}")
 
-    def estimate_processing_time(self, video_duration, model_size, word_timestamps):
-        """Estimate processing time based on history or base estimates"""
+    def estimate_job(self, duration, options, file_size=0):
+        """Estimate with an interval for a job, or None if duration is unknown"""
         try:
-            # Base estimates in minutes for 1 minute of video
-            base_estimates = {
-                "tiny": 0.2,
-                "base": 0.3,
-                "small": 0.5,
-                "medium": 0.8,
-                "large": 1.2,
-            }
-
-            # If we have history, use it for better estimates
-            if self.config["processing_history"]:
-                similar_jobs = [
-                    job
-                    for job in self.config["processing_history"]
-                    if job["model_size"] == model_size
-                    and job["word_timestamps"] == word_timestamps
-                ]
-                if similar_jobs:
-                    avg_rate = sum(
-                        job["processing_time"] / job["duration"] for job in similar_jobs
-                    ) / len(similar_jobs)
-                    return avg_rate * video_duration
-
-            # Fall back to base estimates
-            estimate = base_estimates.get(model_size, 0.3) * video_duration
-            if word_timestamps:
-                estimate *= 1.5  # Word timestamps add ~50% processing time
-
-            return estimate
+            return self.estimator.estimate(duration, options, file_size)
         except Exception as e:
             print(f"Error calculating estimate: {e}")
-            return 0.0
+            return None
+
+    def estimate_processing_time(self, video_duration, model_size, word_timestamps):
+        """Estimate processing time in minutes, 0 if it cannot be estimated"""
+        estimate = self.estimate_job(
+            video_duration,
+            {"model_size": model_size, "word_timestamps": word_timestamps},
+        )
+        return estimate.minutes if estimate else 0.0
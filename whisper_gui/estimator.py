@@ -0,0 +1,211 @@
+# whisper_gui/estimator.py
+import math
+import threading
+from collections import namedtuple
+
+from whisper_gui.workers import available_cores
+
+# Processing minutes per minute of media with no history to go on
+BASE_RATES = {
+    "tiny": 0.2,
+    "base": 0.3,
+    "small": 0.5,
+    "medium": 0.8,
+    "large": 1.2,
+}
+# Relative spread assumed for the prior, and the z score of the interval
+PRIOR_SPREAD = 0.5
+INTERVAL_Z = 1.28  # 80% interval
+
+FEATURES = (
+    "overhead",  # model load and setup, in minutes
+    "media",  # per media minute
+    "media_words",  # extra per media minute with word timestamps
+    "media_translate",  # extra per media minute when translating
+    "media_vad",  # extra per media minute with the VAD pre-pass
+    "size",  # per GB of input, for decoding
+)
+
+Estimate = namedtuple("Estimate", "minutes low high sigma samples")
+Estimate.__doc__ = "Expected processing minutes with an interval around them"
+
+
+def job_features(duration, options, file_size=0):
+    """Feature vector of a job with duration seconds of media"""
+    minutes = max(duration, 0.0) / 60.0
+    return [
+        1.0,
+        minutes,
+        minutes if options.get("word_timestamps") else 0.0,
+        minutes if options.get("task") == "translate" else 0.0,
+        minutes if options.get("vad") else 0.0,
+        max(file_size, 0) / 1e9,
+    ]
+
+
+def _solve(matrix, vector):
+    """Solve matrix @ x = vector by Gaussian elimination with pivoting"""
+    n = len(vector)
+    rows = [list(matrix[i]) + [vector[i]] for i in range(n)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(rows[r][col]))
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        lead = rows[col][col]
+        if abs(lead) < 1e-12:
+            continue
+        for r in range(col + 1, n):
+            factor = rows[r][col] / lead
+            if factor:
+                for c in range(col, n + 1):
+                    rows[r][c] -= factor * rows[col][c]
+    x = [0.0] * n
+    for i in range(n - 1, -1, -1):
+        lead = rows[i][i]
+        if abs(lead) < 1e-12:
+            continue
+        x[i] = (rows[i][n] - sum(rows[i][c] * x[c] for c in range(i + 1, n))) / lead
+    return x
+
+
+def _dot(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+class CostModel:
+    """Bayesian linear regression of processing minutes on job features
+
+    Sufficient statistics are updated one record at a time, and the fit is
+    pulled towards the base rate of the model size until enough history
+    outweighs it, so estimates are sensible from the first job on.
+    """
+
+    def __init__(self, base_rate):
+        n = len(FEATURES)
+        self.prior_mean = [0.1, base_rate, 0.5 * base_rate, 0.0, 0.0, 0.0]
+        # Prior precision: about one ten-minute job's worth of evidence
+        self.prior_precision = [1.0, 10.0, 10.0, 10.0, 10.0, 1.0]
+        self.xtx = [[0.0] * n for _ in range(n)]
+        self.xty = [0.0] * n
+        self.yy = 0.0
+        self.samples = 0
+        self._fit = None
+
+    def add(self, features, minutes):
+        for i, xi in enumerate(features):
+            self.xty[i] += xi * minutes
+            row = self.xtx[i]
+            for j, xj in enumerate(features):
+                row[j] += xi * xj
+        self.yy += minutes * minutes
+        self.samples += 1
+        self._fit = None
+
+    def _posterior(self):
+        if self._fit is None:
+            n = len(FEATURES)
+            precision = [
+                [
+                    self.xtx[i][j] + (self.prior_precision[i] if i == j else 0.0)
+                    for j in range(n)
+                ]
+                for i in range(n)
+            ]
+            target = [
+                self.xty[i] + self.prior_precision[i] * self.prior_mean[i]
+                for i in range(n)
+            ]
+            coef = _solve(precision, target)
+            # Residual variance of the history around the fit
+            sse = (
+                self.yy
+                - 2 * _dot(coef, self.xty)
+                + sum(coef[i] * _dot(self.xtx[i], coef) for i in range(n))
+            )
+            variance = max(sse, 0.0) / self.samples if self.samples > 1 else None
+            self._fit = (precision, coef, variance)
+        return self._fit
+
+    def predict(self, features):
+        precision, coef, variance = self._posterior()
+        minutes = max(_dot(coef, features), 0.0)
+        prior_sigma = PRIOR_SPREAD * minutes
+        if variance is None:
+            sigma = prior_sigma
+        else:
+            # Blend towards the prior spread while there are few samples
+            weight = self.samples / (self.samples + 5.0)
+            noise = weight * variance + (1 - weight) * prior_sigma**2
+            leverage = _dot(features, _solve(precision, features))
+            sigma = math.sqrt(noise * (1.0 + leverage))
+        return Estimate(
+            minutes,
+            max(minutes - INTERVAL_Z * sigma, 0.0),
+            minutes + INTERVAL_Z * sigma,
+            sigma,
+            self.samples,
+        )
+
+
+class Estimator:
+    """Per-machine processing time model, one CostModel per model variant
+
+    A variant is the model size, whether it is quantized and whether the job
+    is split across worker processes. Only records from machines with the
+    current number of cores (or older records that did not store it) are
+    used.
+    """
+
+    def __init__(self, history=None, cores=None):
+        self.cores = cores or available_cores()
+        self._models = {}
+        self._lock = threading.Lock()
+        if history is not None:
+            for record in history.recent():
+                self.observe(record)
+
+    def _model(self, options):
+        model_size = options.get("model_size")
+        # int8 models and split-file jobs run at their own speed, so they get
+        # their own fit
+        key = (
+            model_size,
+            bool(options.get("quantized")),
+            bool(options.get("parallel")),
+        )
+        if key not in self._models:
+            self._models[key] = CostModel(BASE_RATES.get(model_size, 0.3))
+        return self._models[key]
+
+    def observe(self, record):
+        """Add a finished job's record to the fit; invalid records are skipped"""
+        duration = record.get("duration", -1)
+        minutes = record.get("processing_time", 0)
+        if duration <= 0 or minutes <= 0:
+            return
+        if record.get("cores", self.cores) != self.cores:
+            return
+        features = job_features(duration, record, record.get("video_size", 0))
+        with self._lock:
+            self._model(record).add(features, minutes)
+
+    def estimate(self, duration, options, file_size=0):
+        """Estimate for duration seconds of media, or None when it is unknown"""
+        if duration is None or duration <= 0:
+            return None
+        features = job_features(duration, options, file_size)
+        with self._lock:
+            return self._model(options).predict(features)
+
+
+def total_estimate(estimates):
+    """Combine independent job estimates into one for the whole batch"""
+    estimates = [estimate for estimate in estimates if estimate is not None]
+    minutes = sum(estimate.minutes for estimate in estimates)
+    sigma = math.sqrt(sum(estimate.sigma**2 for estimate in estimates))
+    return Estimate(
+        minutes,
+        max(minutes - INTERVAL_Z * sigma, 0.0),
+        minutes + INTERVAL_Z * sigma,
+        sigma,
+        min((estimate.samples for estimate in estimates), default=0),
+    )
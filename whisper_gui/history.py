@@ -0,0 +1,197 @@
+# whisper_gui/history.py
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+HISTORY_DIR = Path(os.path.dirname(__file__))
+BACKENDS = ("jsonl", "sqlite")
+
+
+def index_key(model_size, word_timestamps):
+    return (str(model_size), bool(word_timestamps))
+
+
+def matches(record, options):
+    """Whether a record was made with every option in options"""
+    return all(record.get(name) == value for name, value in options.items())
+
+
+class JsonlHistory:
+    """Processing records as an append-only JSON Lines file
+
+    Each record is written with a single append, which is atomic for lines
+    of this size, so several processes can share the file. Records are
+    indexed in memory by model size and word timestamps, and lines appended
+    by other processes are picked up on the next lookup.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._offset = 0
+        self._records = []
+        self._index = {}
+
+    def _refresh(self):
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        # Leave a partially written last line for the next refresh
+        end = data.rfind(b"\n") + 1
+        self._offset += end
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            self._add(record)
+
+    def _add(self, record):
+        self._records.append(record)
+        key = index_key(record.get("model_size"), record.get("word_timestamps"))
+        self._index.setdefault(key, []).append(record)
+
+    def append(self, record):
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+
+    def extend(self, records):
+        for record in records:
+            self.append(record)
+
+    def query(self, model_size, word_timestamps, **options):
+        """Records for a model size and word timestamp setting, oldest first"""
+        with self._lock:
+            self._refresh()
+            records = self._index.get(index_key(model_size, word_timestamps), [])
+            return [record for record in records if matches(record, options)]
+
+    def recent(self, limit=None):
+        with self._lock:
+            self._refresh()
+            return list(self._records[-limit:] if limit else self._records)
+
+    def __len__(self):
+        with self._lock:
+            self._refresh()
+            return len(self._records)
+
+    def close(self):
+        pass
+
+
+class SqliteHistory:
+    """Processing records in a local SQLite database
+
+    Lookups go through an index on (model_size, word_timestamps); fields
+    without a column of their own are kept in a JSON column. WAL mode and a
+    busy timeout let several processes write to the same file.
+    """
+
+    COLUMNS = (
+        "timestamp",
+        "model_size",
+        "word_timestamps",
+        "task",
+        "language",
+        "segment_length",
+        "video_size",
+        "duration",
+        "processing_time",
+    )
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=30, check_same_thread=False
+        )
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS history ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "timestamp TEXT, model_size TEXT, word_timestamps INTEGER, "
+                "task TEXT, language TEXT, segment_length REAL, video_size REAL, "
+                "duration REAL, processing_time REAL, extra TEXT)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS history_model "
+                "ON history (model_size, word_timestamps)"
+            )
+
+    def _row(self, record):
+        values = [record.get(name) for name in self.COLUMNS]
+        values[2] = int(bool(values[2]))
+        extra = {k: v for k, v in record.items() if k not in self.COLUMNS}
+        return values + [json.dumps(extra, ensure_ascii=False)]
+
+    def _record(self, row):
+        record = dict(zip(self.COLUMNS, row[:-1]))
+        record["word_timestamps"] = bool(record["word_timestamps"])
+        record.update(json.loads(row[-1] or "{}"))
+        return {k: v for k, v in record.items() if v is not None}
+
+    def extend(self, records):
+        rows = [self._row(record) for record in records]
+        placeholders = ", ".join("?" * (len(self.COLUMNS) + 1))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO history ({', '.join(self.COLUMNS)}, extra) "
+                f"VALUES ({placeholders})",
+                rows,
+            )
+
+    def append(self, record):
+        self.extend([record])
+
+    def _select(self, where="", params=()):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(self.COLUMNS)}, extra FROM history {where}",
+                params,
+            ).fetchall()
+        return [self._record(row) for row in rows]
+
+    def query(self, model_size, word_timestamps, **options):
+        """Records for a model size and word timestamp setting, oldest first"""
+        records = self._select(
+            "WHERE model_size = ? AND word_timestamps = ? ORDER BY id",
+            (str(model_size), int(bool(word_timestamps))),
+        )
+        return [record for record in records if matches(record, options)]
+
+    def recent(self, limit=None):
+        if limit:
+            records = self._select("ORDER BY id DESC LIMIT ?", (limit,))
+            return records[::-1]
+        return self._select("ORDER BY id")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_history(backend="jsonl", directory=HISTORY_DIR):
+    """Open the processing history store of the given backend"""
+    if backend == "sqlite":
+        return SqliteHistory(Path(directory) / "history.sqlite3")
+    if backend == "jsonl":
+        return JsonlHistory(Path(directory) / "history.jsonl")
+    raise ValueError(f"Unknown history backend: {backend}")
@@ -0,0 +1,143 @@
+# whisper_gui/ingest.py
+import subprocess
+import tempfile
+
+from whisper_gui.lazy_imports import lazy_import
+
+np = lazy_import("numpy")
+
+SAMPLE_RATE = 16000
+# Audio pulled from ffmpeg per read
+BLOCK_SECONDS = 30
+
+
+def ffmpeg_command(path, start_seconds=0.0):
+    """ffmpeg arguments that write the audio track as 16 kHz mono s16le"""
+    seek = ["-ss", f"{start_seconds:.6f}"] if start_seconds > 0 else []
+    return [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-threads",
+        "0",
+        *seek,
+        "-i",
+        path,
+        "-vn",
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-acodec",
+        "pcm_s16le",
+        "-ar",
+        str(SAMPLE_RATE),
+        "-",
+    ]
+
+
+class AudioStream:
+    """Audio of a media file read through an ffmpeg pipe in fixed-size blocks
+
+    Only the samples from the last requested window onwards are kept, so
+    memory depends on the window and block size rather than on the length
+    of the file. Windows must be requested at non-decreasing offsets.
+    expected_samples, if known from the container, is used for progress.
+    Every block is also handed to sink.write(), and sink.commit() is called
+    once the whole file has been read (sink.abort() if it was not).
+    A stream may begin at sample start instead of the beginning of the file;
+    offsets and samples_read still count from the beginning, and a sink
+    would only see part of the audio, so it is not allowed then.
+    """
+
+    def __init__(
+        self,
+        path,
+        block_seconds=BLOCK_SECONDS,
+        expected_samples=None,
+        sink=None,
+        start=0,
+    ):
+        if start and sink:
+            raise ValueError("AudioStream cannot hand a partial read to a sink")
+        self.path = path
+        self.block_bytes = int(block_seconds * SAMPLE_RATE) * 2
+        self.expected_samples = expected_samples
+        self.sink = sink
+        self.samples_read = start
+        self.peak_buffer_bytes = 0
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._base = start  # sample offset of _buffer[0]
+        self._eof = False
+        self._stderr = tempfile.TemporaryFile()
+        try:
+            self._process = subprocess.Popen(
+                ffmpeg_command(path, start / SAMPLE_RATE),
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=self._stderr,
+            )
+        except BaseException:
+            self._stderr.close()
+            raise
+
+    def _read_block(self):
+        data = self._process.stdout.read(self.block_bytes)
+        if len(data) % 2:
+            data = data[:-1]
+        if not data:
+            self._finish()
+            return False
+        block = np.frombuffer(data, np.int16).astype(np.float32) / 32768.0
+        if self.sink:
+            self.sink.write(block)
+        self._buffer = np.concatenate((self._buffer, block))
+        self.samples_read += len(block)
+        self.peak_buffer_bytes = max(self.peak_buffer_bytes, self._buffer.nbytes)
+        return True
+
+    def _finish(self):
+        self._eof = True
+        code = self._process.wait()
+        if code != 0:
+            self._stderr.seek(0)
+            message = self._stderr.read().decode("utf-8", "replace").strip()
+            raise RuntimeError(f"Failed to load audio: {message[-2000:]}")
+        if self.sink:
+            self.sink.commit()
+            self.sink = None
+
+    def window(self, offset, length):
+        """Samples [offset, offset + length), shorter at the end of the file"""
+        if offset < self._base:
+            raise ValueError("AudioStream cannot go back before its last window")
+        # Drop what lies before the window; copying frees the old buffer
+        if offset > self._base:
+            self._buffer = self._buffer[offset - self._base :].copy()
+            self._base = offset
+        while len(self._buffer) < length and not self._eof:
+            self._read_block()
+        return self._buffer[:length]
+
+    def has_more(self, position):
+        """Whether any audio follows sample position"""
+        while self._base + len(self._buffer) <= position and not self._eof:
+            self._read_block()
+        return self._base + len(self._buffer) > position
+
+    def close(self):
+        if self._process.poll() is None:
+            self._process.kill()
+            self._process.wait()
+        self._process.stdout.close()
+        self._stderr.close()
+        if self.sink:
+            self.sink.abort()
+            self.sink = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
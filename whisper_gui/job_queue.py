@@ -0,0 +1,251 @@
+# whisper_gui/job_queue.py
+import itertools
+import math
+import threading
+import time
+
+from whisper_gui.estimator import INTERVAL_Z
+
+QUEUE_ORDERS = ("fifo", "shortest", "priority")
+# Statuses of jobs that will not run (again)
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once it has been asked to stop"""
+
+
+class Job:
+    """One input/output pair and the options it should be processed with"""
+
+    _ids = itertools.count(1)
+
+    def __init__(
+        self,
+        input_path,
+        output_path,
+        options,
+        duration=-1,
+        estimate=0.0,
+        estimate_sigma=0.0,
+        priority=0,
+    ):
+        self.id = next(Job._ids)
+        self.input_path = input_path
+        self.output_path = output_path
+        self.options = dict(options)
+        self.duration = duration  # media length in seconds, -1 if unknown
+        self.estimate = estimate  # expected processing time in minutes
+        self.estimate_sigma = estimate_sigma  # its standard deviation
+        self.priority = priority  # higher runs first with order "priority"
+        self.status = "queued"
+        self.progress = 0.0  # share of the media processed, 0 to 1
+        self.error = None
+        self.submitted_at = None
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+
+    def elapsed(self):
+        """Seconds spent processing so far, or in total once finished"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def remaining_estimate(self):
+        """Expected minutes left for this job"""
+        if self.status in FINISHED_STATUSES:
+            return 0.0
+        if self.progress > 0:
+            return self.estimate * (1.0 - self.progress)
+        return max(self.estimate - self.elapsed() / 60.0, 0.0)
+
+    def remaining_sigma(self):
+        """Uncertainty of remaining_estimate(), in minutes"""
+        if self.status in FINISHED_STATUSES:
+            return 0.0
+        return self.estimate_sigma * (1.0 - self.progress)
+
+
+class JobQueue:
+    """Run jobs through a bounded pool of worker threads
+
+    runner(job) does the actual work and raises on failure. on_update(job) is
+    called from the worker thread whenever a job changes status. With order
+    "shortest", the queued job with the smallest estimate runs next, which
+    minimizes the average wait; jobs without an estimate go last. With
+    order "priority", the queued job with the highest priority runs next,
+    in submission order among equals.
+    Cancelling a running job only sets its cancel_event; the runner is
+    expected to check it and raise JobCancelled.
+    """
+
+    def __init__(self, runner, max_workers=2, on_update=None, order="fifo"):
+        if order not in QUEUE_ORDERS:
+            raise ValueError(f"Unknown queue order: {order}")
+        self.runner = runner
+        self.max_workers = max(1, int(max_workers))
+        self.on_update = on_update
+        self.order = order
+        self.jobs = []
+        self._pending = []
+        self._workers = []
+        self._idle_workers = 0
+        self._cond = threading.Condition()
+        self._first_start = None
+
+    def submit(self, job):
+        """Queue a job; one submitted to an idle queue starts a new batch
+
+        Starting a batch forgets the jobs that already finished, so counts(),
+        throughput() and the remaining time only cover the current batch.
+        """
+        with self._cond:
+            if not any(
+                queued.status in ("queued", "running") for queued in self.jobs
+            ):
+                self.jobs = []
+                self._first_start = None
+            job.status = "queued"
+            job.submitted_at = time.time()
+            self.jobs.append(job)
+            self._pending.append(job)
+            if (
+                len(self._pending) > self._idle_workers
+                and len(self._workers) < self.max_workers
+            ):
+                worker = threading.Thread(
+                    target=self._worker_loop,
+                    name=f"whisper-job-{len(self._workers) + 1}",
+                    daemon=True,
+                )
+                self._workers.append(worker)
+                worker.start()
+            self._cond.notify()
+        self._notify(job)
+        return job
+
+    def _next_job(self):
+        if self.order == "shortest":
+            index = min(
+                range(len(self._pending)),
+                key=lambda i: self._pending[i].estimate or math.inf,
+            )
+            return self._pending.pop(index)
+        if self.order == "priority":
+            # max() keeps the first of equal priorities, so ties stay FIFO
+            index = max(
+                range(len(self._pending)), key=lambda i: self._pending[i].priority
+            )
+            return self._pending.pop(index)
+        return self._pending.pop(0)
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                self._idle_workers += 1
+                while not self._pending:
+                    self._cond.wait()
+                self._idle_workers -= 1
+                job = self._next_job()
+                job.status = "running"
+                job.started_at = time.time()
+                if self._first_start is None:
+                    self._first_start = job.started_at
+            self._notify(job)
+
+            try:
+                self.runner(job)
+                job.status = "done"
+                job.progress = 1.0
+            except JobCancelled:
+                job.status = "cancelled"
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished_at = time.time()
+            self._notify(job)
+
+    def cancel(self, job):
+        """Stop a job: drop it if queued, ask it to stop if running
+
+        Returns whether the job was queued or running.
+        """
+        with self._cond:
+            if job.status == "queued" and job in self._pending:
+                self._pending.remove(job)
+                job.status = "cancelled"
+                job.finished_at = time.time()
+            elif job.status == "running":
+                job.cancel_event.set()
+                return True
+            else:
+                return False
+        self._notify(job)
+        return True
+
+    def prune(self, keep):
+        """Forget all but the newest keep finished jobs, for long-running queues
+
+        counts() and throughput() only see the jobs that are kept.
+        """
+        with self._cond:
+            finished = [job for job in self.jobs if job.status in FINISHED_STATUSES]
+            dropped = set(map(id, finished[: max(len(finished) - keep, 0)]))
+            if dropped:
+                self.jobs = [job for job in self.jobs if id(job) not in dropped]
+
+    def report_progress(self, job, fraction):
+        """Record how much of a running job's media has been processed"""
+        job.progress = min(max(fraction, 0.0), 1.0)
+        self._notify(job)
+
+    def _notify(self, job):
+        if self.on_update:
+            try:
+                self.on_update(job)
+            except Exception as e:
+                print(f"Error in job update callback: {e}")
+
+    def counts(self):
+        """Return a mapping of status to number of jobs"""
+        with self._cond:
+            counts = {
+                "queued": 0,
+                "running": 0,
+                "done": 0,
+                "failed": 0,
+                "cancelled": 0,
+            }
+            for job in self.jobs:
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
+
+    def is_idle(self):
+        counts = self.counts()
+        return counts["queued"] == 0 and counts["running"] == 0
+
+    def throughput(self):
+        """Return (finished jobs per hour, media seconds per wall second)"""
+        with self._cond:
+            finished = [job for job in self.jobs if job.status == "done"]
+            if not finished or self._first_start is None:
+                return 0.0, 0.0
+            wall = max(time.time() - self._first_start, 1e-6)
+            media = sum(job.duration for job in finished if job.duration > 0)
+            return len(finished) * 3600.0 / wall, media / wall
+
+    def remaining_eta(self):
+        """Expected minutes until every queued and running job is finished"""
+        with self._cond:
+            remaining = sum(job.remaining_estimate() for job in self.jobs)
+        return remaining / self.max_workers
+
+    def remaining_interval(self):
+        """(low, high) bounds in minutes around remaining_eta()"""
+        with self._cond:
+            variance = sum(job.remaining_sigma() ** 2 for job in self.jobs)
+        spread = INTERVAL_Z * math.sqrt(variance) / self.max_workers
+        eta = self.remaining_eta()
+        return max(eta - spread, 0.0), eta + spread
@@ -0,0 +1,76 @@
+# whisper_gui/lazy_imports.py
+import importlib
+import threading
+import time
+
+# Seconds spent importing each module, filled in as modules are loaded
+import_timings = {}
+
+
+class LazyModule:
+    """Stand-in for a module that is only imported on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    import_timings[self._name] = time.perf_counter() - start
+                    self._module = module
+        return self._module
+
+    @property
+    def is_loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<LazyModule {self._name} ({state})>"
+
+
+_modules = {}
+_modules_lock = threading.Lock()
+
+
+def lazy_import(name):
+    """Return a shared LazyModule for name"""
+    with _modules_lock:
+        if name not in _modules:
+            _modules[name] = LazyModule(name)
+        return _modules[name]
+
+
+def warm_up(names=None, on_done=None):
+    """Import modules on a background thread so first use does not block
+
+    Defaults to every module registered with lazy_import. on_done(errors) is
+    called from the background thread once all imports have been attempted.
+    """
+    if names:
+        modules = [lazy_import(name) for name in names]
+    else:
+        with _modules_lock:
+            modules = list(_modules.values())
+
+    def run():
+        errors = {}
+        for module in modules:
+            try:
+                module._load()
+            except Exception as e:
+                errors[module._name] = str(e)
+        if on_done:
+            on_done(errors)
+
+    thread = threading.Thread(target=run, name="lazy-import-warmup", daemon=True)
+    thread.start()
+    return thread
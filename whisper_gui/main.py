@@ -1,20 +1,49 @@
 # whisper_gui/whisper_gui.py --- main.py
+import time
+
+_IMPORT_START = time.perf_counter()
+
+import json
+import sys
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import whisper
 import datetime
 import os
-import threading
 from pathlib import Path
-import cv2
-from whisper_gui.config_manager import ConfigManager
+from whisper_gui import (
+    audio_cache,
+    checkpoint,
+    media_probe,
+    profiling,
+    result_cache,
+    transcriber,
+    tuner,
+    writers,
+)
+from whisper_gui.config_manager import ConfigManager, DEFAULT_SETTINGS
+from whisper_gui.job_queue import Job, JobCancelled, JobQueue
+from whisper_gui.lazy_imports import import_timings, warm_up
+from whisper_gui.model_cache import ModelCache
+from whisper_gui.parallel import ChunkTranscriber
+from whisper_gui.prefetch import ModelPrefetcher
+from whisper_gui.transcriber import MEDIA_EXTENSIONS
+from whisper_gui.ui_pump import UIPump
+
+# Heavy modules are imported on first use or by warm_up() once the window is up
+HEAVY_MODULES = ["torch", "whisper"]
+
+# whisper_gui/__init__.py star-imports this module; keep main() from shadowing
+# the whisper_gui.main submodule
+__all__ = ["WhisperGUI"]
+
+_IMPORT_END = time.perf_counter()
 
 
 class WhisperGUI:
     def __init__(self, root):
         self.root = root
         self.root.title("Whisper Transcription GUI")
-        self.root.geometry("600x800")
+        self.root.geometry("700x1000")
 
         try:
             self.config_manager = ConfigManager()
@@ -24,6 +53,34 @@ class WhisperGUI:
             )
             self.config_manager = None
 
+        self.model_cache = ModelCache(
+            budget_mb=self.get_setting("model_cache_mb"), log=self.log_message
+        )
+        try:
+            audio_cache.configure(
+                self.get_setting("audio_cache_mb"),
+                self.get_setting("audio_cache_dtype"),
+            )
+        except ValueError as e:
+            print(f"Error configuring audio cache: {e}")
+        result_cache.configure(self.get_setting("result_cache_mb"))
+        self.prefetcher = None
+        if self.get_setting("prefetch_model"):
+            self.prefetcher = ModelPrefetcher(
+                self.model_cache,
+                warm=self.get_setting("prefetch_warm_up"),
+                log=self.log_message,
+            )
+        self._chunk_transcriber = None
+        # (input path, options, result) of the last finished job, for re-exports
+        self.last_transcript = None
+        self.job_queue = JobQueue(
+            self.run_processing,
+            max_workers=self.get_setting("max_workers"),
+            on_update=self.on_job_update,
+            order=self.get_setting("queue_order"),
+        )
+
         # Create main frame with padding
         main_frame = ttk.Frame(root, padding="10")
         main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
@@ -105,6 +162,13 @@ class WhisperGUI:
         size_menu = ttk.OptionMenu(config_frame, self.model_size, "base", *model_sizes)
         size_menu.grid(row=0, column=1, sticky=tk.W, pady=5)
         self.model_size.trace_add("write", self.update_estimate)
+        self.model_size.trace_add("write", self.prefetch_model)
+        self.quantized = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            config_frame, text="Quantized CPU (int8)", variable=self.quantized
+        ).grid(row=0, column=2, sticky=tk.W, padx=(10, 0), pady=5)
+        self.quantized.trace_add("write", self.update_estimate)
+        self.quantized.trace_add("write", self.prefetch_model)
 
         # Language
         ttk.Label(config_frame, text="Language:").grid(
@@ -137,10 +201,22 @@ class WhisperGUI:
             row=3, column=0, sticky=tk.W, pady=5
         )
         self.output_format = tk.StringVar(value="srt")
-        formats = ["srt", "txt", "vtt"]
-        ttk.OptionMenu(config_frame, self.output_format, "srt", *formats).grid(
-            row=3, column=1, sticky=tk.W, pady=5
+        ttk.OptionMenu(
+            config_frame, self.output_format, "srt", *writers.FORMATS
+        ).grid(row=3, column=1, sticky=tk.W, pady=5)
+
+        # Extra formats written from the same transcript
+        ttk.Label(config_frame, text="Also Write:").grid(
+            row=4, column=0, sticky=tk.W, pady=5
         )
+        extra_frame = ttk.Frame(config_frame)
+        extra_frame.grid(row=4, column=1, sticky=tk.W, pady=5)
+        self.extra_formats = {}
+        for i, fmt in enumerate(writers.FORMATS):
+            self.extra_formats[fmt] = tk.BooleanVar(value=False)
+            ttk.Checkbutton(
+                extra_frame, text=fmt.upper(), variable=self.extra_formats[fmt]
+            ).grid(row=0, column=i, sticky=tk.W)
 
         current_row += 1
 
@@ -206,6 +282,48 @@ class WhisperGUI:
             text="Compute confidence scores",
             variable=self.compute_confidence,
         ).grid(row=1, column=0, sticky=tk.W)
+        confidence_frame = ttk.Frame(options_frame)
+        confidence_frame.grid(row=1, column=1, sticky=tk.W, padx=(10, 0))
+        self.mark_confidence = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            confidence_frame,
+            text="Mark low confidence in subtitles",
+            variable=self.mark_confidence,
+        ).grid(row=0, column=0, sticky=tk.W)
+        ttk.Label(confidence_frame, text="Re-decode low confidence with:").grid(
+            row=0, column=1, sticky=tk.W, padx=(10, 5)
+        )
+        self.cascade_model = tk.StringVar(value="none")
+        ttk.OptionMenu(
+            confidence_frame,
+            self.cascade_model,
+            "none",
+            "none",
+            "small",
+            "medium",
+            "large",
+        ).grid(row=0, column=2, sticky=tk.W)
+
+        self.streaming = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            options_frame,
+            text="Stream output while transcribing (long files)",
+            variable=self.streaming,
+        ).grid(row=2, column=0, sticky=tk.W)
+
+        self.parallel = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            options_frame,
+            text="Split long files across processes",
+            variable=self.parallel,
+        ).grid(row=3, column=0, sticky=tk.W)
+
+        self.vad = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            options_frame,
+            text="Skip silence (voice activity detection)",
+            variable=self.vad,
+        ).grid(row=4, column=0, sticky=tk.W)
 
         current_row += 1
 
@@ -237,11 +355,56 @@ class WhisperGUI:
 
         current_row += 1
 
-        # Process Button
+        # Process Buttons
+        buttons_frame = ttk.Frame(main_frame)
+        buttons_frame.grid(row=current_row, column=0, pady=10)
         self.process_button = ttk.Button(
-            main_frame, text="Process File", command=self.process_file
+            buttons_frame, text="Process File", command=self.process_file
+        )
+        self.process_button.grid(row=0, column=0, padx=5)
+        ttk.Button(buttons_frame, text="Add Files...", command=self.add_files).grid(
+            row=0, column=1, padx=5
+        )
+        ttk.Button(buttons_frame, text="Add Folder...", command=self.add_folder).grid(
+            row=0, column=2, padx=5
+        )
+        ttk.Button(buttons_frame, text="Re-export", command=self.reexport).grid(
+            row=0, column=3, padx=5
+        )
+        ttk.Button(buttons_frame, text="Cancel", command=self.cancel_jobs).grid(
+            row=0, column=4, padx=5
         )
-        self.process_button.grid(row=current_row, column=0, pady=10)
+
+        current_row += 1
+
+        # Job Queue Frame
+        queue_frame = ttk.LabelFrame(main_frame, text="Job Queue", padding="5")
+        queue_frame.grid(row=current_row, column=0, sticky=(tk.W, tk.E), pady=5)
+        queue_frame.columnconfigure(0, weight=1)
+
+        self.queue_tree = ttk.Treeview(
+            queue_frame,
+            columns=("file", "status", "eta", "time"),
+            show="headings",
+            height=6,
+        )
+        for column, heading, width in (
+            ("file", "File", 330),
+            ("status", "Status", 80),
+            ("eta", "Estimate", 80),
+            ("time", "Elapsed", 80),
+        ):
+            self.queue_tree.heading(column, text=heading)
+            self.queue_tree.column(column, width=width, anchor=tk.W)
+        self.queue_tree.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        queue_scroll = ttk.Scrollbar(
+            queue_frame, orient="vertical", command=self.queue_tree.yview
+        )
+        queue_scroll.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.queue_tree.configure(yscrollcommand=queue_scroll.set)
+
+        self.queue_summary = ttk.Label(queue_frame, text="No jobs queued")
+        self.queue_summary.grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=5)
 
         current_row += 1
 
@@ -249,6 +412,21 @@ class WhisperGUI:
         self.log_text = tk.Text(main_frame, height=10, width=70)
         self.log_text.grid(row=current_row, column=0, pady=10)
 
+        # Worker threads hand all widget updates to the Tk thread through this
+        self.ui = UIPump(
+            root,
+            self.log_text,
+            interval_ms=self.get_setting("ui_refresh_ms"),
+            max_lines=self.get_setting("log_view_lines"),
+        )
+        self.ui.start()
+        self._queue_announced = True
+
+    def get_setting(self, key):
+        if self.config_manager:
+            return self.config_manager.get_setting(key)
+        return DEFAULT_SETTINGS[key]
+
     def browse_input(self):
         filename = filedialog.askopenfilename(
             filetypes=[
@@ -265,14 +443,11 @@ class WhisperGUI:
             self.input_path.set(filename)
             # Auto-set output path if empty
             if not self.output_path.get():
-                output_dir = os.path.dirname(filename)
-                base_name = os.path.splitext(os.path.basename(filename))[0]
-                self.output_path.set(
-                    os.path.join(output_dir, f"{base_name}.{self.output_format.get()}")
-                )
+                self.output_path.set(self.default_output_path(filename))
 
             # Update estimate after file selection
             self.update_estimate()
+            self.prefetch_model()
 
     def browse_output(self):
         filename = filedialog.asksaveasfilename(
@@ -281,151 +456,459 @@ class WhisperGUI:
                 ("SRT files", "*.srt"),
                 ("Text files", "*.txt"),
                 ("VTT files", "*.vtt"),
+                ("JSON files", "*.json"),
+                ("TSV files", "*.tsv"),
             ],
         )
         if filename:
             self.output_path.set(filename)
 
+    def default_output_path(self, input_path):
+        """Output path next to the input, with the selected format's extension"""
+        return transcriber.output_path_for(input_path, self.output_format.get())
+
+    def add_files(self):
+        filenames = filedialog.askopenfilenames(
+            filetypes=[
+                ("Media files", " ".join(f"*{ext}" for ext in MEDIA_EXTENSIONS)),
+                ("All files", "*.*"),
+            ]
+        )
+        for filename in filenames:
+            self.enqueue(filename, self.default_output_path(filename))
+
+    def add_folder(self):
+        folder = filedialog.askdirectory()
+        if not folder:
+            return
+        filenames = sorted(
+            str(path)
+            for path in Path(folder).iterdir()
+            if path.is_file() and path.suffix.lower() in MEDIA_EXTENSIONS
+        )
+        if not filenames:
+            messagebox.showinfo("Add Folder", "No media files found in folder")
+            return
+        for filename in filenames:
+            self.enqueue(filename, self.default_output_path(filename))
+
+    def collect_options(self):
+        """Snapshot the current settings so queued jobs are not affected by later edits"""
+        options = {
+            "model_size": self.model_size.get(),
+            "quantized": self.quantized.get(),
+            "language": self.language.get(),
+            "task": self.task.get(),
+            "output_format": self.output_format.get(),
+            "extra_formats": [
+                fmt for fmt, selected in self.extra_formats.items() if selected.get()
+            ],
+            "word_timestamps": self.word_timestamps.get(),
+            "segment_length": self.segment_length.get(),
+            "max_line_chars": self.get_setting("max_line_chars"),
+            "max_lines": self.get_setting("max_cue_lines"),
+            "streaming": self.streaming.get(),
+            "parallel": self.parallel.get(),
+            "vad": self.vad.get(),
+            "window_seconds": self.get_setting("stream_window_seconds"),
+            "stream_ingest_minutes": self.get_setting("stream_ingest_minutes"),
+            "checkpoint_minutes": self.get_setting("checkpoint_minutes"),
+            "checkpoint_interval_seconds": self.get_setting(
+                "checkpoint_interval_seconds"
+            ),
+            "confidence": self.compute_confidence.get(),
+            "confidence_threshold": self.get_setting("confidence_threshold"),
+            "confidence_marks": self.mark_confidence.get(),
+            "cascade_model": (
+                ""
+                if self.cascade_model.get() == "none"
+                or not self.compute_confidence.get()
+                else self.cascade_model.get()
+            ),
+        }
+        return options
+
+    def prefetch_model(self, *args):
+        """Start loading the selected model before the user asks for a job"""
+        # Split-file jobs load their models in worker processes instead
+        if self.prefetcher and not self.parallel.get():
+            self.prefetcher.request(
+                {
+                    "model_size": self.model_size.get(),
+                    "quantized": self.quantized.get(),
+                }
+            )
+
+    def enqueue(self, input_path, output_path):
+        """Add a job to the queue using the current settings"""
+        options = self.collect_options()
+        if self.prefetcher:
+            # A prefetch that has not started would only duplicate the job's
+            # own load; the job waits for one that is under way instead
+            self.prefetcher.cancel()
+        duration = self.get_media_duration(input_path)
+        estimate = None
+        if self.config_manager:
+            estimate = self.config_manager.estimate_job(
+                duration, options, os.path.getsize(input_path)
+            )
+        job = Job(input_path, output_path, options, duration)
+        if estimate:
+            job.estimate, job.estimate_sigma = estimate.minutes, estimate.sigma
+        self.queue_tree.insert(
+            "",
+            tk.END,
+            iid=str(job.id),
+            values=(os.path.basename(input_path), job.status, "", ""),
+        )
+        self._queue_announced = False
+        self.job_queue.submit(job)
+        return job
+
+    def cancel_jobs(self):
+        """Cancel the selected jobs, or every running job if none is selected"""
+        selected = {int(iid) for iid in self.queue_tree.selection()}
+        jobs = [
+            job
+            for job in self.job_queue.jobs
+            if job.id in selected or (not selected and job.status == "running")
+        ]
+        for job in jobs:
+            if self.job_queue.cancel(job) and job.status == "running":
+                self.log_message(
+                    f"[{os.path.basename(job.input_path)}] Cancelling..."
+                )
+
+    def refresh_job(self, job):
+        """Update a job's row (runs on the Tk thread)"""
+        status = job.status if not job.error else f"failed: {job.error}"
+        if job.status == "running" and job.progress > 0:
+            status = f"running {job.progress * 100:.0f}%"
+        if job.status == "running" and job.cancel_event.is_set():
+            status = "cancelling"
+        eta = "unknown"
+        if job.estimate > 0:
+            eta = f"{job.estimate:.1f} ± {job.estimate_sigma:.1f} min"
+        elapsed = f"{job.elapsed() / 60.0:.1f} min" if job.started_at else ""
+        if self.queue_tree.exists(str(job.id)):
+            self.queue_tree.item(
+                str(job.id),
+                values=(os.path.basename(job.input_path), status, eta, elapsed),
+            )
+        if job.status == "running":
+            self.status_var.set(f"Processing {os.path.basename(job.input_path)}...")
+
+    def refresh_summary(self):
+        """Update the queue summary and overall progress (runs on the Tk thread)"""
+        counts = self.job_queue.counts()
+        total = sum(counts.values())
+        finished = counts["done"] + counts["failed"] + counts["cancelled"]
+        jobs_per_hour, realtime = self.job_queue.throughput()
+        self.queue_summary.config(
+            text=(
+                f"{finished}/{total} finished, {counts['running']} running, "
+                f"{counts['failed']} failed, {counts['cancelled']} cancelled | "
+                f"{jobs_per_hour:.1f} files/h, "
+                f"{realtime:.1f}x real time | "
+                f"remaining ~{self.job_queue.remaining_eta():.1f} min "
+                "({:.1f}-{:.1f})".format(*self.job_queue.remaining_interval())
+            )
+        )
+        running_progress = sum(
+            queued_job.progress
+            for queued_job in self.job_queue.jobs
+            if queued_job.status == "running"
+        )
+        self.progress_var.set(
+            (finished + running_progress) * 100.0 / total if total else 0
+        )
+
+        if total and not self._queue_announced and self.job_queue.is_idle():
+            self._queue_announced = True
+            self.status_var.set("Queue finished")
+            if counts["failed"]:
+                messagebox.showwarning(
+                    "Queue finished", f"{counts['failed']} of {total} jobs failed"
+                )
+            elif counts["cancelled"] == total:
+                self.status_var.set("Cancelled")
+            else:
+                messagebox.showinfo("Success", "Processing completed successfully!")
+
+    def on_job_update(self, job):
+        """Queue a redraw of the job's row and the summary (any thread)"""
+        self.ui.post_latest(("job", job.id), self.refresh_job, job)
+        self.ui.post_latest("summary", self.refresh_summary)
+
     def log_message(self, message):
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
+        """Append a line to the log view and log file (any thread)"""
+        self.ui.log(message)
 
     def format_timestamp(self, seconds):
-        """Convert seconds to SRT/VTT timestamp format with improved precision"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        seconds = seconds % 60
-        msec = int((seconds % 1) * 1000)
-        seconds = int(seconds)
-        return f"{hours:02d}:{minutes:02d}:{seconds:02d},{msec:03d}"
+        return transcriber.format_timestamp(seconds)
 
     def process_file(self):
         if not self.input_path.get() or not self.output_path.get():
             messagebox.showerror("Error", "Please select input and output paths")
             return
 
-        self.process_button.state(["disabled"])
         self.status_var.set("Processing...")
-        self.progress_var.set(0)
-
-        # Start processing in a separate thread
-        thread = threading.Thread(target=self.run_processing)
-        thread.daemon = True
-        thread.start()
-
-    def run_processing(self):
+        self.enqueue(self.input_path.get(), self.output_path.get())
+
+    def run_processing(self, job):
+        """Transcribe one queued job (runs on a job queue worker thread)"""
+        # The tuned beam width changes the transcript, so it is part of the
+        # options the result is cached and recorded under
+        options = job.options = self.tuned_options(job.options)
+        name = os.path.basename(job.input_path)
         start_time = datetime.datetime.now()
+        timer = profiling.StageTimer()
         try:
-            self.log_message("Loading model...")
-            model = whisper.load_model(self.model_size.get())
-
-            self.log_message("Transcribing media...")
-            result = model.transcribe(
-                self.input_path.get(),
-                language=(
-                    None
-                    if self.language.get() == "auto"
-                    else self.language.get().lower()
-                ),
-                task=self.task.get(),
-                word_timestamps=self.word_timestamps.get(),
+            log = lambda message: self.log_message(f"[{name}] {message}")
+            profile_name = f"{Path(job.input_path).stem}-job{job.id}"
+            with profiling.timing(timer), profiling.profile_job(
+                self.get_setting("profile_mode"), profile_name, log
+            ):
+                result = transcriber.cached_result(job.input_path, options, log)
+                from_cache = result is not None
+                if not from_cache:
+                    result = self.transcribe_job(job, log)
+                    transcriber.store_result(job.input_path, options, result)
+                if job.duration <= 0:
+                    job.duration = result["duration"]
+
+                if "segments" in result:
+                    self.last_transcript = (job.input_path, options, result)
+                    self.log_message(f"[{name}] Writing output...")
+                    transcriber.export_result(result, job.output_path, options)
+            metrics = profiling.job_metrics(timer, job.duration)
+            self.log_message(
+                f"[{name}] Done: {profiling.format_metrics(timer, metrics)}"
             )
 
-            self.log_message("Writing output...")
-            self.write_output(result)
-
-            self.status_var.set("Processing complete!")
-            self.progress_var.set(100)
-            messagebox.showinfo("Success", "Processing completed successfully!")
-
             # After successful processing, save the record
             end_time = datetime.datetime.now()
             processing_time = (end_time - start_time).total_seconds() / 60.0
 
-            # Get duration and file size
-            duration = self.get_media_duration(self.input_path.get())
-            file_size = os.path.getsize(self.input_path.get())
-
-            self.config_manager.add_processing_record(
-                file_size,
-                duration,
-                self.model_size.get(),
-                self.word_timestamps.get(),
-                self.segment_length.get(),
-                processing_time,
-            )
+            if self.config_manager:
+                # Cache hits and resumed jobs say nothing about how long
+                # inference takes
+                if not from_cache and not result.get("resumed_from"):
+                    self.config_manager.add_processing_record(
+                        os.path.getsize(job.input_path),
+                        job.duration,
+                        options["model_size"],
+                        options["word_timestamps"],
+                        options["segment_length"],
+                        processing_time,
+                        task=options["task"],
+                        language=options["language"],
+                        vad=options["vad"],
+                        parallel=options["parallel"],
+                        quantized=options["quantized"],
+                        **metrics,
+                    )
 
-            # Save paths
-            self.config_manager.add_paths(self.input_path.get(), self.output_path.get())
-
-            # Update dropdowns
-            self.input_combo["values"] = self.config_manager.config["recent_inputs"]
-            self.output_combo["values"] = self.config_manager.config["recent_outputs"]
+                # Save paths and update dropdowns
+                self.config_manager.add_paths(job.input_path, job.output_path)
+                self.ui.post(self.refresh_recent_paths)
 
+        except JobCancelled:
+            self.log_message(f"[{name}] Cancelled")
+            raise
         except Exception as e:
-            self.status_var.set("Error occurred!")
-            messagebox.showerror("Error", str(e))
-            self.log_message(f"Error: {str(e)}")
+            self.log_message(f"[{name}] Error: {str(e)}")
+            raise
+
+    def transcribe_job(self, job, log):
+        """Run inference for a job in the mode its options select
+
+        Long and streamed jobs keep a checkpoint next to their output and
+        resume from it. A cancelled job raises JobCancelled once its model
+        has been dropped from the cache, so the memory is freed.
+        """
+        options = job.options
+        progress = lambda fraction: self.job_queue.report_progress(job, fraction)
+        if options.get("parallel"):
+            chunk_transcriber = self.get_chunk_transcriber()
+            log(
+                f"Transcribing chunks on {chunk_transcriber.num_workers} processes..."
+            )
+            result = chunk_transcriber.transcribe(
+                job.input_path,
+                options,
+                progress=progress,
+                log=log,
+                cancel=job.cancel_event,
+            )
+            log(f"Stitched {result['chunks']} chunks")
+        else:
+            log("Loading model...")
+            key = self.model_cache.resolve_job_key(options)
+            profile = self.cpu_profile(options)
+            with profiling.stage("load_model"):
+                model = self.model_cache.acquire(*key)
+            job_checkpoint = checkpoint.for_job(
+                job.input_path, job.output_path, options
+            )
+            cancelled = False
+            try:
+                with tuner.applied_profile(profile, log):
+                    if options.get("streaming"):
+                        log("Transcribing media in windows...")
+                        result = transcriber.transcribe_streaming(
+                            model,
+                            job.input_path,
+                            job.output_path,
+                            options,
+                            fp16=key[2] == "fp16",
+                            progress=progress,
+                            log=log,
+                            checkpoint=job_checkpoint,
+                            cancel=job.cancel_event,
+                        )
+                    else:
+                        log("Transcribing media...")
+                        result = transcriber.transcribe(
+                            model,
+                            job.input_path,
+                            options,
+                            fp16=key[2] == "fp16",
+                            log=log,
+                            checkpoint=job_checkpoint,
+                            cancel=job.cancel_event,
+                        )
+            except JobCancelled:
+                # Raised again below, once the traceback no longer holds the model
+                cancelled = True
+            finally:
+                if not cancelled:
+                    self.model_cache.release(model)
+            if cancelled:
+                self.model_cache.discard(model)
+                del model
+                self.model_cache.collect()
+                raise JobCancelled("Cancelled")
+        return transcriber.cascade_result(
+            self.model_cache,
+            job.input_path,
+            result,
+            options,
+            log,
+            cancel=job.cancel_event,
+        )
+
+    def cpu_profile(self, options):
+        """This machine's tuned profile for a job's model, if it runs on CPU
+
+        Finding the device imports torch, so this is only called from the
+        job queue workers, never from the Tk thread.
+        """
+        if not self.config_manager:
+            return None
+        model_size, device, precision = self.model_cache.resolve_job_key(options)
+        if device != "cpu":
+            return None
+        return self.config_manager.cpu_profile(model_size, precision)
+
+    def tuned_options(self, options):
+        """options with the beam width of the job's tuned CPU profile, if any"""
+        profile = self.cpu_profile(options)
+        if profile and profile.get("beam_size"):
+            return dict(options, beam_size=profile["beam_size"])
+        return options
+
+    def transcript_options(self, options):
+        """Options a finished transcript made with options may be stored under
+
+        A job on the CPU decodes with its tuned beam width, but which device
+        a job runs on is only known once torch is imported. Re-exports try
+        the untuned options and those of the CPU profile for the model.
+        """
+        candidates = [options]
+        if self.config_manager:
+            precision = "int8" if options.get("quantized") else "fp32"
+            profile = self.config_manager.cpu_profile(
+                options["model_size"], precision
+            )
+            if profile and profile.get("beam_size"):
+                candidates.append(dict(options, beam_size=profile["beam_size"]))
+        return candidates
+
+    def get_chunk_transcriber(self):
+        """Process pool for split-file jobs, started on first use"""
+        if self._chunk_transcriber is None:
+            workers = self.get_setting("parallel_workers") or None
+            self._chunk_transcriber = ChunkTranscriber(
+                num_workers=workers, budget_mb=self.get_setting("model_cache_mb")
+            )
+        return self._chunk_transcriber
 
-        finally:
-            self.process_button.state(["!disabled"])
+    def refresh_recent_paths(self):
+        self.input_combo["values"] = self.config_manager.config["recent_inputs"]
+        self.output_combo["values"] = self.config_manager.config["recent_outputs"]
 
     def get_media_duration(self, file_path):
-        """Get the duration of media file (video or audio)"""
-        try:
-            # Try to open as video first
-            cap = cv2.VideoCapture(file_path)
-            if cap.isOpened():
-                duration = cap.get(cv2.CAP_PROP_FRAME_COUNT) / cap.get(cv2.CAP_PROP_FPS)
-                cap.release()
-                return duration
-            else:
-                # Failed to get video duration, use a default value
-                # Ideally, we would use a library like librosa or pydub for audio files
-                # but keeping dependencies minimal for now
-                self.log_message("Warning: Could not determine media duration")
-                return -1
-        except Exception as e:
-            self.log_message(f"Warning: Error getting media duration - {str(e)}")
-            return -1
-
-    def write_output(self, result):
-        output_format = self.output_format.get()
-        segment_gap = 0.01  # 10ms gap between segments to prevent overlap
-
-        with open(self.output_path.get(), "w", encoding="utf-8") as f:
-            if output_format == "srt":
-                for i, segment in enumerate(result["segments"], start=1):
-                    # Ensure there's no overlap with the next segment
-                    current_end = segment["end"]
-                    if i < len(result["segments"]):
-                        next_start = result["segments"][i]["start"]
-                        if current_end > next_start:
-                            current_end = next_start - segment_gap
-
-                    f.write(f"{i}\n")
-                    f.write(
-                        f"{self.format_timestamp(segment['start'])} --> {self.format_timestamp(current_end)}\n"
-                    )
-                    f.write(f"{segment['text'].strip()}\n\n")
-
-            elif output_format == "vtt":
-                f.write("WEBVTT\n\n")
-                for i, segment in enumerate(result["segments"]):
-                    # Ensure there's no overlap with the next segment
-                    current_end = segment["end"]
-                    if i < len(result["segments"]):
-                        next_start = result["segments"][i]["start"]
-                        if current_end > next_start:
-                            current_end = next_start - segment_gap
-
-                    f.write(
-                        f"{self.format_timestamp(segment['start']).replace(',', '.')} --> {self.format_timestamp(current_end).replace(',', '.')}\n"
-                    )
-                    f.write(f"{segment['text'].strip()}\n\n")
+        """Get the duration of media file (video or audio) from its headers"""
+        duration = media_probe.probe_duration(file_path)
+        if duration <= 0:
+            self.log_message("Warning: Could not determine media duration")
+        return duration
+
+    def write_output(self, result, output_path=None, output_format=None):
+        transcriber.write_output(
+            result,
+            output_path or self.output_path.get(),
+            output_format or self.output_format.get(),
+        )
 
-            else:  # txt
-                f.write(result["text"])
+    def find_transcript(self, input_path, options):
+        """A finished transcript of input_path made with options, or None"""
+        candidates = self.transcript_options(options)
+        if self.last_transcript:
+            last_path, last_options, result = self.last_transcript
+            if os.path.abspath(last_path) == os.path.abspath(input_path) and any(
+                all(
+                    last_options.get(name) == candidate.get(name)
+                    for name in result_cache.KEY_OPTIONS
+                )
+                for candidate in candidates
+            ):
+                return result
+        for candidate in candidates:
+            result = transcriber.cached_result(input_path, candidate)
+            if result is not None:
+                return result
+        return None
+
+    def reexport(self):
+        """Rewrite the output from an existing transcript with the current settings"""
+        input_path = self.input_path.get()
+        output_path = self.output_path.get()
+        if not input_path or not output_path:
+            messagebox.showerror("Error", "Please select input and output paths")
+            return
+        options = self.collect_options()
+        try:
+            result = self.find_transcript(input_path, options)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not read input: {e}")
+            return
+        if result is None:
+            messagebox.showinfo(
+                "Re-export",
+                "No transcript of this file with the current model, language, "
+                "task and timestamp settings. Process the file first.",
+            )
+            return
+        start = datetime.datetime.now()
+        transcriber.export_result(result, output_path, options)
+        elapsed_ms = (datetime.datetime.now() - start).total_seconds() * 1000
+        self.log_message(
+            f"[{os.path.basename(input_path)}] Re-exported with "
+            f"{options['segment_length']:.1f}s segments in {elapsed_ms:.0f} ms"
+        )
+        self.status_var.set("Re-export finished")
 
     def set_segment_length(self, value):
         """Update segment length and label when preset is clicked"""
@@ -448,13 +931,17 @@ class WhisperGUI:
             duration = self.get_media_duration(self.input_path.get())
 
             if duration > 0:
-                estimate = self.config_manager.estimate_processing_time(
-                    duration, self.model_size.get(), self.word_timestamps.get()
+                estimate = self.config_manager.estimate_job(
+                    duration,
+                    self.collect_options(),
+                    os.path.getsize(self.input_path.get()),
                 )
 
-                if estimate > 0:
+                if estimate and estimate.minutes > 0:
                     self.estimate_label.config(
-                        text=f"Estimated processing time: {estimate:.1f} minutes"
+                        text=f"Estimated processing time: {estimate.minutes:.1f} "
+                        f"minutes ({estimate.low:.1f}-{estimate.high:.1f}, "
+                        f"{estimate.samples} similar runs)"
                     )
                 else:
                     self.estimate_label.config(
@@ -469,7 +956,65 @@ class WhisperGUI:
             print(f"Error updating estimate: {e}")
 
 
-if __name__ == "__main__":
+def report_import_errors(errors):
+    for name, error in errors.items():
+        print(f"Warning: could not import {name}: {error}")
+
+
+def warm_up_in_background(root):
+    """Import the heavy modules once the window has been drawn"""
+    root.after_idle(lambda: warm_up(HEAVY_MODULES, on_done=report_import_errors))
+
+
+def profile_startup():
+    """Open the window, print import and first-paint timings as JSON, then exit"""
+    timings = {"import_main": _IMPORT_END - _IMPORT_START}
+
+    start = time.perf_counter()
+    root = tk.Tk()
+    timings["create_root"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    WhisperGUI(root)
+    timings["build_widgets"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    root.update()
+    timings["first_paint"] = time.perf_counter() - start
+    timings["time_to_first_paint"] = time.perf_counter() - _IMPORT_START
+
+    def on_warm(errors):
+        timings["warm_up_total"] = time.perf_counter() - _IMPORT_START
+        timings["warm_up_imports"] = dict(import_timings)
+        if errors:
+            timings["warm_up_errors"] = errors
+        root.after(0, root.destroy)
+
+    warm_up(HEAVY_MODULES, on_done=on_warm)
+    root.mainloop()
+    print(json.dumps(timings, indent=2))
+    return 0
+
+
+def main(argv=None):
+    """Start the GUI, or run headless when input files are given"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv == ["--startup-profile"]:
+        return profile_startup()
+    if argv:
+        from whisper_gui.cli import main as cli_main
+
+        return cli_main(argv)
+
     root = tk.Tk()
     app = WhisperGUI(root)
+    warm_up_in_background(root)
     root.mainloop()
+    if app.prefetcher:
+        app.prefetcher.stop()
+    app.ui.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
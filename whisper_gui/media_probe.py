@@ -0,0 +1,426 @@
+# whisper_gui/media_probe.py
+import mmap
+import os
+import shutil
+import struct
+import subprocess
+import threading
+from collections import OrderedDict
+
+from whisper_gui.lazy_imports import lazy_import
+
+cv2 = lazy_import("cv2")
+
+# Durations keyed by (path, size, mtime), so edits to a file invalidate its entry
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+CACHE_SIZE = 512
+
+MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {
+    1: [44100, 48000, 32000],
+    2: [22050, 24000, 16000],
+    2.5: [11025, 12000, 8000],
+}
+
+
+def probe_duration(path):
+    """Return the media duration in seconds, or -1 if it cannot be determined
+
+    Durations are read from container and stream headers without decoding
+    any audio or video, and cached until the file's size or mtime changes.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return -1
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return _cache[key]
+
+    duration = _probe_uncached(path, stat.st_size)
+
+    with _cache_lock:
+        _cache[key] = duration
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return duration
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+def _probe_uncached(path, file_size):
+    try:
+        with open(path, "rb") as f:
+            parser = _sniff(f.read(12), path)
+            if parser:
+                f.seek(0)
+                duration = parser(f, file_size)
+                if duration and duration > 0:
+                    return duration
+    except Exception as e:
+        print(f"Error reading media headers of {path}: {e}")
+
+    for fallback in (_probe_ffprobe, _probe_cv2):
+        duration = fallback(path)
+        if duration and duration > 0:
+            return duration
+    return -1
+
+
+def _sniff(head, path):
+    """Pick a header parser from the file's magic bytes, then its extension"""
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return _probe_wav
+    if head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+        return _probe_avi
+    if head[:4] == b"fLaC":
+        return _probe_flac
+    if head[:4] == b"OggS":
+        return _probe_ogg
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return _probe_matroska
+    if head[4:8] == b"ftyp" or head[4:8] in (b"moov", b"mdat", b"wide", b"free"):
+        return _probe_mp4
+    if head[:3] == b"ID3" or path.lower().endswith(".mp3"):
+        return _probe_mp3
+    if len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0:
+        return _probe_mp3
+    return None
+
+
+def _iter_riff_chunks(f, end):
+    """Yield (chunk id, data offset, data size) for chunks up to end"""
+    while f.tell() + 8 <= end:
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        chunk_id, size = struct.unpack("<4sI", header)
+        offset = f.tell()
+        yield chunk_id, offset, size
+        f.seek(offset + size + (size & 1))
+
+
+def _probe_wav(f, file_size):
+    f.seek(12)
+    byte_rate = None
+    for chunk_id, offset, size in _iter_riff_chunks(f, file_size):
+        if chunk_id == b"fmt ":
+            fmt = f.read(16)
+            byte_rate = struct.unpack("<I", fmt[8:12])[0]
+        elif chunk_id == b"data" and byte_rate:
+            if size == 0xFFFFFFFF or offset + size > file_size:
+                # Streamed or truncated file: the header size is not reliable
+                size = file_size - offset
+            return size / byte_rate
+    return None
+
+
+def _probe_avi(f, file_size):
+    f.seek(12)
+    for chunk_id, offset, size in _iter_riff_chunks(f, file_size):
+        if chunk_id != b"LIST" or f.read(4) != b"hdrl":
+            continue
+        us_per_frame = None
+        total_frames = None
+        for sub_id, sub_offset, sub_size in _iter_riff_chunks(f, offset + size):
+            if sub_id == b"avih":
+                avih = f.read(20)
+                us_per_frame = struct.unpack("<I", avih[0:4])[0]
+                total_frames = total_frames or struct.unpack("<I", avih[16:20])[0]
+            elif sub_id == b"LIST" and f.read(4) == b"odml":
+                # OpenDML total frame count, covering every RIFF chunk of large files
+                for odml_id, _, _ in _iter_riff_chunks(f, sub_offset + sub_size):
+                    if odml_id == b"dmlh":
+                        total_frames = struct.unpack("<I", f.read(4))[0]
+                        break
+        if us_per_frame and total_frames:
+            return us_per_frame * total_frames / 1_000_000
+        return None
+    return None
+
+
+def _probe_flac(f, file_size):
+    f.seek(4)
+    while True:
+        header = f.read(4)
+        if len(header) < 4:
+            return None
+        block_type = header[0] & 0x7F
+        length = int.from_bytes(header[1:4], "big")
+        if block_type == 0:  # STREAMINFO
+            info = f.read(length)
+            packed = int.from_bytes(info[10:18], "big")
+            sample_rate = packed >> 44
+            total_samples = packed & ((1 << 36) - 1)
+            if sample_rate and total_samples:
+                return total_samples / sample_rate
+            return None
+        if header[0] & 0x80:  # last metadata block
+            return None
+        f.seek(length, os.SEEK_CUR)
+
+
+def _probe_ogg(f, file_size):
+    first_page = f.read(4096)
+    if first_page[:4] != b"OggS" or len(first_page) < 28:
+        return None
+    segments = first_page[26]
+    packet = first_page[27 + segments :]
+    if packet.startswith(b"\x01vorbis"):
+        sample_rate = struct.unpack("<I", packet[12:16])[0]
+        pre_skip = 0
+    elif packet.startswith(b"OpusHead"):
+        # Opus granule positions always count 48 kHz samples
+        sample_rate = 48000
+        pre_skip = struct.unpack("<H", packet[10:12])[0]
+    elif packet.startswith(b"\x7fFLAC"):
+        packed = int.from_bytes(packet[27:35], "big")
+        sample_rate = packed >> 44
+        pre_skip = 0
+    else:
+        return None
+    if not sample_rate:
+        return None
+
+    # The granule position of the last page is the total sample count
+    tail_size = min(file_size, 65536)
+    f.seek(file_size - tail_size)
+    tail = f.read(tail_size)
+    page = tail.rfind(b"OggS")
+    while page != -1:
+        if page + 14 <= len(tail):
+            granule = struct.unpack("<q", tail[page + 6 : page + 14])[0]
+            if granule > 0:
+                return (granule - pre_skip) / sample_rate
+        page = tail.rfind(b"OggS", 0, page)
+    return None
+
+
+def _iter_mp4_boxes(f, end):
+    """Yield (box type, data offset, data size) for boxes up to end"""
+    while f.tell() + 8 <= end:
+        start = f.tell()
+        header = f.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack(">I4s", header)
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+        elif size == 0:
+            size = end - start
+        data_offset = f.tell()
+        if size < data_offset - start:
+            return
+        yield box_type, data_offset, start + size - data_offset
+        f.seek(start + size)
+
+
+def _probe_mp4(f, file_size):
+    for box_type, offset, size in _iter_mp4_boxes(f, file_size):
+        if box_type != b"moov":
+            continue
+        for child_type, child_offset, child_size in _iter_mp4_boxes(f, offset + size):
+            if child_type != b"mvhd":
+                continue
+            version = f.read(4)[0]
+            if version == 1:
+                _, _, timescale, duration = struct.unpack(">QQIQ", f.read(28))
+            else:
+                _, _, timescale, duration = struct.unpack(">IIII", f.read(16))
+            if timescale and duration not in (0, 0xFFFFFFFF, 0xFFFFFFFFFFFFFFFF):
+                return duration / timescale
+            return None
+    return None
+
+
+def _read_ebml_vint(f, keep_marker):
+    first = f.read(1)
+    if not first:
+        return None, 0
+    first = first[0]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        length += 1
+        mask >>= 1
+    if length > 8:
+        return None, 0
+    value = first if keep_marker else first & (mask - 1)
+    all_ones = value == mask - 1
+    for byte in f.read(length - 1):
+        value = (value << 8) | byte
+        all_ones = all_ones and byte == 0xFF
+    if not keep_marker and all_ones:
+        return -1, length  # unknown size
+    return value, length
+
+
+def _iter_ebml_elements(f, end):
+    """Yield (element id, data offset, data size) for elements up to end"""
+    while f.tell() < end:
+        element_id, _ = _read_ebml_vint(f, keep_marker=True)
+        size, _ = _read_ebml_vint(f, keep_marker=False)
+        if element_id is None or size is None:
+            return
+        offset = f.tell()
+        if size == -1:
+            size = end - offset
+        yield element_id, offset, size
+        f.seek(offset + size)
+
+
+def _probe_matroska(f, file_size):
+    for element_id, offset, size in _iter_ebml_elements(f, file_size):
+        if element_id != 0x18538067:  # Segment
+            continue
+        for child_id, child_offset, child_size in _iter_ebml_elements(
+            f, offset + size
+        ):
+            if child_id != 0x1549A966:  # Info
+                continue
+            timecode_scale = 1_000_000
+            duration = None
+            for info_id, _, info_size in _iter_ebml_elements(
+                f, child_offset + child_size
+            ):
+                data = f.read(info_size)
+                if info_id == 0x2AD7B1:  # TimecodeScale
+                    timecode_scale = int.from_bytes(data, "big")
+                elif info_id == 0x4489:  # Duration
+                    duration = struct.unpack(">f" if info_size == 4 else ">d", data)[0]
+            if duration:
+                return duration * timecode_scale / 1_000_000_000
+            return None
+    return None
+
+
+def _parse_mp3_header(header):
+    """Return (frame length, samples per frame, sample rate, version, mono)"""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = {0: 2.5, 2: 2, 3: 1}.get((header[1] >> 3) & 3)
+    layer = {1: 3, 2: 2, 3: 1}.get((header[1] >> 1) & 3)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 3
+    if version is None or layer is None or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    bitrate = MP3_BITRATES[(1 if version == 1 else 2, layer)][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 1
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 3 and version != 1:
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+    else:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+    mono = header[3] >> 6 == 3
+    return length, samples, sample_rate, version, mono
+
+
+def _probe_mp3(f, file_size):
+    if file_size < 4:
+        return None
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        pos = 0
+        if data[:3] == b"ID3":
+            tag_size = 0
+            for byte in data[6:10]:
+                tag_size = (tag_size << 7) | (byte & 0x7F)
+            pos = 10 + tag_size + (10 if data[5] & 0x10 else 0)
+        end = file_size
+        if file_size >= 128 and data[file_size - 128 : file_size - 125] == b"TAG":
+            end -= 128  # ID3v1 tag
+
+        # Find the first frame whose successor is also a valid frame header
+        first = None
+        search_end = min(end, pos + 1024 * 1024)
+        while first is None:
+            pos = data.find(b"\xff", pos, search_end)
+            if pos == -1:
+                return None
+            frame = _parse_mp3_header(data[pos : pos + 4])
+            if frame and _parse_mp3_header(data[pos + frame[0] : pos + frame[0] + 4]):
+                first = frame
+            else:
+                pos += 1
+        if first is None:
+            return None
+
+        length, samples, sample_rate, version, mono = first
+        # Xing/Info and VBRI headers store the exact frame count of VBR files
+        side_info = (17 if mono else 32) if version == 1 else (9 if mono else 17)
+        xing = pos + 4 + side_info
+        if data[xing : xing + 4] in (b"Xing", b"Info"):
+            flags = struct.unpack(">I", data[xing + 4 : xing + 8])[0]
+            if flags & 1:
+                frames = struct.unpack(">I", data[xing + 8 : xing + 12])[0]
+                return frames * samples / sample_rate
+        vbri = pos + 36
+        if data[vbri : vbri + 4] == b"VBRI":
+            frames = struct.unpack(">I", data[vbri + 14 : vbri + 18])[0]
+            return frames * samples / sample_rate
+
+        # No VBR header: walk the frame headers and sum their samples
+        total_samples = 0
+        while pos + 4 <= end:
+            frame = _parse_mp3_header(data[pos : pos + 4])
+            if not frame:
+                break
+            total_samples += frame[1]
+            sample_rate = frame[2]
+            pos += frame[0]
+        return total_samples / sample_rate if total_samples else None
+
+
+def _probe_ffprobe(path):
+    ffprobe = shutil.which("ffprobe")
+    if not ffprobe:
+        return None
+    try:
+        output = subprocess.run(
+            [
+                ffprobe,
+                "-v",
+                "error",
+                "-show_entries",
+                "format=duration",
+                "-of",
+                "default=noprint_wrappers=1:nokey=1",
+                path,
+            ],
+            capture_output=True,
+            text=True,
+            timeout=15,
+        )
+        return float(output.stdout.strip())
+    except (OSError, ValueError, subprocess.SubprocessError):
+        return None
+
+
+def _probe_cv2(path):
+    try:
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            return None
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+        cap.release()
+        return frames / fps if fps else None
+    except Exception:
+        return None
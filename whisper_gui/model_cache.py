@@ -0,0 +1,291 @@
+# whisper_gui/model_cache.py
+import gc
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from whisper_gui.lazy_imports import lazy_import
+
+torch = lazy_import("torch")
+whisper = lazy_import("whisper")
+
+MODEL_SIZES = ("tiny", "base", "small", "medium", "large")
+# Approximate fp32 footprint in MB, used to make room before a model is loaded
+APPROX_MODEL_MB = {
+    "tiny": 150,
+    "base": 290,
+    "small": 970,
+    "medium": 3060,
+    "large": 6170,
+}
+# int8 linear layers take a quarter of the space; embeddings stay fp32
+INT8_MEMORY_RATIO = 0.35
+
+
+def default_device():
+    """Pick the device Whisper would use by default"""
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def default_precision(device):
+    """Whisper decodes in fp16 on GPU and fp32 on CPU"""
+    return "fp16" if device == "cuda" else "fp32"
+
+
+def _tensors(value):
+    if isinstance(value, (tuple, list)):
+        for item in value:
+            yield from _tensors(item)
+    elif isinstance(value, torch.Tensor):
+        yield value
+
+
+def model_memory_bytes(model):
+    """Approximate the memory held by a model's parameters and buffers
+
+    Read from the state dict, so the packed weights of quantized layers,
+    which are neither parameters nor buffers, are counted too.
+    """
+    total = 0
+    for value in model.state_dict().values():
+        for tensor in _tensors(value):
+            if tensor.is_sparse:
+                continue
+            total += tensor.numel() * tensor.element_size()
+    return total
+
+
+class ModelCache:
+    """Keep loaded Whisper models in memory and evict the least recently used
+
+    Models are keyed by (size, device, precision). A model handed out by
+    acquire() is owned by the caller until release() so that two concurrent
+    jobs never decode on the same instance; idle instances are reused and
+    evicted oldest first whenever the cache grows past its RAM budget.
+    """
+
+    def __init__(self, budget_mb=4096, log=print):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.log = log
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._idle = OrderedDict()  # key -> list of (model, size in bytes)
+        self._busy = {}  # id(model) -> (key, size in bytes)
+        # key -> Event set when a prefetch of that key finishes
+        self._prefetching = {}
+        self._waiting = {}  # key -> acquire() calls waiting for a prefetch
+
+    def resolve_key(self, model_size, device=None, precision=None):
+        if precision == "int8":
+            # Dynamic quantization only has CPU kernels
+            device = "cpu"
+        device = device or default_device()
+        precision = precision or default_precision(device)
+        return (model_size, device, precision)
+
+    def resolve_job_key(self, options):
+        """Cache key for a job's options, honoring the quantized CPU mode"""
+        if options.get("quantized"):
+            return self.resolve_key(options["model_size"], "cpu", "int8")
+        return self.resolve_key(options["model_size"])
+
+    def used_bytes(self):
+        with self._lock:
+            return self._used_bytes()
+
+    def _used_bytes(self):
+        idle = sum(size for entries in self._idle.values() for _, size in entries)
+        busy = sum(size for _, size in self._busy.values())
+        return idle + busy
+
+    def _evict_until(self, needed_bytes):
+        """Drop idle models, oldest first, until needed_bytes fit the budget"""
+        evicted = []
+        while self._idle and self._used_bytes() + needed_bytes > self.budget_bytes:
+            key, entries = next(iter(self._idle.items()))
+            model, size = entries.pop(0)
+            if not entries:
+                del self._idle[key]
+            evicted.append((key, size))
+            del model
+        return evicted
+
+    def _log_evictions(self, evicted):
+        if not evicted:
+            return
+        for key, size in evicted:
+            self.log(
+                f"Model cache: evicted {self._describe(key)} ({size / 2**20:.0f} MB)"
+            )
+        self.collect()
+
+    def _describe(self, key):
+        model_size, device, precision = key
+        return f"{model_size} ({device}, {precision})"
+
+    def _approx_bytes(self, key):
+        approx = APPROX_MODEL_MB.get(key[0], 0) * 1024 * 1024
+        if key[2] == "int8":
+            approx = int(approx * INT8_MEMORY_RATIO)
+        return approx
+
+    def _take_idle(self, key):
+        entries = self._idle.get(key)
+        if not entries:
+            return None
+        model, size = entries.pop()
+        if not entries:
+            del self._idle[key]
+        self._busy[id(model)] = (key, size)
+        return model
+
+    def acquire(self, model_size, device=None, precision=None):
+        """Return a model for exclusive use, loading it on a cache miss
+
+        If a prefetch of the same model is under way, waits for it instead
+        of loading a second copy.
+        """
+        key = self.resolve_key(model_size, device, precision)
+        while True:
+            with self._lock:
+                model = self._take_idle(key)
+                if model is not None:
+                    self.hits += 1
+                    self.log(f"Model cache hit: {self._describe(key)}")
+                    return model
+                prefetch = self._prefetching.get(key)
+                if prefetch is None:
+                    self.misses += 1
+                    evicted = self._evict_until(self._approx_bytes(key))
+                    break
+                self._waiting[key] = self._waiting.get(key, 0) + 1
+            self.log(f"Waiting for the prefetch of {self._describe(key)}...")
+            prefetch.wait()
+            with self._lock:
+                self._waiting[key] -= 1
+                if not self._waiting[key]:
+                    del self._waiting[key]
+        self._log_evictions(evicted)
+
+        self.log(f"Model cache miss: loading {self._describe(key)}...")
+        start = time.perf_counter()
+        model = self._load(key)
+        elapsed = time.perf_counter() - start
+        size = model_memory_bytes(model)
+
+        with self._lock:
+            self._busy[id(model)] = (key, size)
+            used = self._used_bytes()
+        self.log(
+            f"Loaded {self._describe(key)} in {elapsed:.1f}s "
+            f"({size / 2**20:.0f} MB, cache {used / 2**20:.0f}/"
+            f"{self.budget_bytes / 2**20:.0f} MB)"
+        )
+        if used > self.budget_bytes:
+            self.log("Warning: models in use exceed the model cache RAM budget")
+        return model
+
+    def prefetch(
+        self, model_size, device=None, precision=None, superseded=None, warm=None
+    ):
+        """Load a model into the idle pool ahead of the job that will need it
+
+        Does nothing when the model is already idle or being prefetched.
+        warm(model) may run a first inference so later ones start fast.
+        A load cannot be interrupted, so when superseded() says the model
+        is no longer wanted once it is loaded, it is dropped instead of
+        kept, unless a job is already waiting for it.
+        """
+        key = self.resolve_key(model_size, device, precision)
+        with self._lock:
+            if self._idle.get(key) or key in self._prefetching:
+                return
+            done = threading.Event()
+            self._prefetching[key] = done
+            evicted = self._evict_until(self._approx_bytes(key))
+        self._log_evictions(evicted)
+        try:
+            self.log(f"Prefetching {self._describe(key)}...")
+            start = time.perf_counter()
+            model = self._load(key)
+            if warm:
+                warm(model)
+            elapsed = time.perf_counter() - start
+            size = model_memory_bytes(model)
+            with self._lock:
+                dropped = (
+                    superseded is not None
+                    and superseded()
+                    and not self._waiting.get(key)
+                )
+                if not dropped:
+                    self._idle.setdefault(key, []).append((model, size))
+                    self._idle.move_to_end(key)
+                    evicted = self._evict_until(0)
+        finally:
+            with self._lock:
+                del self._prefetching[key]
+            done.set()
+        if dropped:
+            del model
+            self._log_evictions([(key, size)])
+            self.log(f"Prefetch of {self._describe(key)} superseded, dropped")
+        else:
+            self._log_evictions(evicted)
+            self.log(f"Prefetched {self._describe(key)} in {elapsed:.1f}s")
+
+    def release(self, model):
+        """Hand a model back to the cache as the most recently used entry"""
+        with self._lock:
+            key, size = self._busy.pop(id(model))
+            entries = self._idle.pop(key, [])
+            entries.append((model, size))
+            self._idle[key] = entries
+            evicted = self._evict_until(0)
+        self._log_evictions(evicted)
+
+    def discard(self, model):
+        """Take a model out of the cache instead of keeping it for reuse
+
+        Used when a job is cancelled. Its memory is returned once the caller
+        has dropped its own references and called collect().
+        """
+        with self._lock:
+            key, size = self._busy.pop(id(model))
+        self.log(f"Model cache: dropped {self._describe(key)} ({size / 2**20:.0f} MB)")
+
+    def collect(self):
+        """Free the memory of models nothing refers to any more"""
+        gc.collect()
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    @contextmanager
+    def lease(self, model_size, device=None, precision=None):
+        """Context manager pairing acquire() with release()"""
+        model = self.acquire(model_size, device, precision)
+        try:
+            yield model
+        finally:
+            self.release(model)
+
+    def clear(self):
+        """Drop every idle model"""
+        with self._lock:
+            evicted = [
+                (key, size)
+                for key, entries in self._idle.items()
+                for _, size in entries
+            ]
+            self._idle.clear()
+        self._log_evictions(evicted)
+
+    def _load(self, key):
+        model_size, device, precision = key
+        if precision == "int8":
+            from whisper_gui import quantize
+
+            return quantize.load_quantized(model_size, log=self.log)
+        return whisper.load_model(model_size, device=device)
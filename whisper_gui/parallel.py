@@ -0,0 +1,211 @@
+# whisper_gui/parallel.py
+import multiprocessing
+import re
+import threading
+import time
+from collections import Counter
+
+from whisper_gui import audio_cache, profiling, transcriber, workers
+from whisper_gui.job_queue import JobCancelled
+from whisper_gui.lazy_imports import lazy_import
+from whisper_gui.transcriber import SAMPLE_RATE
+
+np = lazy_import("numpy")
+
+# Chunks are at least this long so each process has enough context to decode
+MIN_CHUNK_SECONDS = 60.0
+MAX_CHUNK_SECONDS = 600.0
+# How often a job waiting for chunks checks whether it was cancelled
+CANCEL_POLL_SECONDS = 0.5
+
+
+def split_at_silence(audio, chunk_seconds, search_seconds=5.0, frame_seconds=0.1):
+    """Cut audio into (start, end) sample ranges of roughly chunk_seconds
+
+    Each cut is placed at the quietest frame within search_seconds of the
+    target boundary so that chunks do not start or end mid-word.
+    """
+    total = len(audio)
+    chunk = int(chunk_seconds * SAMPLE_RATE)
+    search = int(search_seconds * SAMPLE_RATE)
+    frame = max(int(frame_seconds * SAMPLE_RATE), 1)
+
+    bounds = [0]
+    target = chunk
+    while target + chunk // 2 < total:
+        lo = max(bounds[-1] + frame, target - search)
+        hi = min(total, target + search)
+        region = np.asarray(audio[lo:hi], dtype=np.float32)
+        frames = len(region) // frame
+        if frames:
+            energy = np.square(region[: frames * frame].reshape(frames, frame)).mean(
+                axis=1
+            )
+            cut = lo + int(np.argmin(energy)) * frame + frame // 2
+        else:
+            cut = target
+        bounds.append(cut)
+        target = cut + chunk
+    bounds.append(total)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _normalize(text):
+    return re.sub(r"[^\w]+", " ", text.lower()).strip()
+
+
+def stitch_segments(chunk_segments, seam_tolerance=1.0):
+    """Merge per-chunk segment lists into one timeline
+
+    Segments are ordered by start time; a segment repeating the text of the
+    previous one across a seam is dropped, and starts that overlap the
+    previous segment are moved to its end.
+    """
+    segments = sorted(
+        (segment for chunk in chunk_segments for segment in chunk),
+        key=lambda segment: segment["start"],
+    )
+    stitched = []
+    for segment in segments:
+        if stitched:
+            previous = stitched[-1]
+            if (
+                _normalize(segment["text"]) == _normalize(previous["text"])
+                and segment["start"] < previous["end"] + seam_tolerance
+            ):
+                previous["end"] = max(previous["end"], segment["end"])
+                continue
+            if segment["start"] < previous["end"]:
+                segment = dict(segment, start=previous["end"])
+                if segment["end"] <= segment["start"]:
+                    continue
+        stitched.append(dict(segment, id=len(stitched)))
+    return stitched
+
+
+def _transcribe_chunk(task):
+    """Transcribe one chunk in a worker process"""
+    chunk_ref, offset_seconds, options = task
+    chunk = audio_cache.resolve_ref(chunk_ref)
+    cache = workers.worker_cache()
+    key = cache.resolve_job_key(options)
+    with cache.lease(*key) as model:
+        result = model.transcribe(
+            chunk,
+            language=transcriber.language_option(options.get("language")),
+            task=options.get("task", "transcribe"),
+            word_timestamps=options.get("word_timestamps", False),
+            beam_size=options.get("beam_size"),
+            fp16=key[2] == "fp16",
+        )
+    segments = [
+        transcriber.shift_segment(segment, offset_seconds, segment["id"])
+        for segment in result["segments"]
+    ]
+    return segments, result.get("language")
+
+
+class ChunkTranscriber:
+    """Transcribe single long files by spreading chunks over a process pool
+
+    The pool is created on first use and kept, so its processes hold warm
+    models for later jobs. A cancelled job shuts the pool down, freeing
+    those models, unless another job is still using it.
+    """
+
+    def __init__(self, num_workers=None, threads=None, budget_mb=4096):
+        self.num_workers, self.threads = workers.plan_workers(
+            workers.available_cores(), num_workers, threads
+        )
+        self.budget_mb = budget_mb
+        self._pool = None
+        self._active = 0  # jobs currently using the pool
+        self._lock = threading.Lock()
+
+    def _get_pool(self, options):
+        if self._pool is None:
+            preload = options["model_size"]
+            if options.get("quantized"):
+                preload = (preload, "cpu", "int8")
+            self._pool = workers.create_pool(
+                self.num_workers, self.threads, self.budget_mb, preload=preload
+            )
+        return self._pool
+
+    def transcribe(self, input_path, options, progress=None, log=None, cancel=None):
+        """Return a Whisper-style result for input_path
+
+        Raises JobCancelled soon after the cancel event is set.
+        """
+        start_time = time.perf_counter()
+        original = transcriber.load_audio(input_path, log)
+        duration = len(original) / SAMPLE_RATE
+        audio, speech_map = transcriber.prepare_audio(original, options, log)
+        del original
+        # Enough chunks to keep every process busy, but none too short
+        chunk_seconds = min(
+            max(len(audio) / SAMPLE_RATE / self.num_workers, MIN_CHUNK_SECONDS),
+            MAX_CHUNK_SECONDS,
+        )
+        ranges = split_at_silence(audio, chunk_seconds) if len(audio) else []
+        tasks = [
+            (audio_cache.slice_ref(audio, start, end), start / SAMPLE_RATE, options)
+            for start, end in ranges
+        ]
+
+        with self._lock:
+            with profiling.stage("load_model"):
+                pool = self._get_pool(options)
+            self._active += 1
+        chunk_segments = []
+        languages = Counter()
+        cancelled = False
+        try:
+            with profiling.stage("inference"):
+                results = pool.imap_unordered(_transcribe_chunk, tasks)
+                while len(chunk_segments) < len(tasks):
+                    if cancel is not None and cancel.is_set():
+                        raise JobCancelled("Cancelled")
+                    try:
+                        segments, language = results.next(CANCEL_POLL_SECONDS)
+                    except multiprocessing.TimeoutError:
+                        continue
+                    chunk_segments.append(segments)
+                    if language:
+                        languages[language] += 1
+                    if progress:
+                        progress(len(chunk_segments) / len(tasks))
+        except JobCancelled:
+            cancelled = True
+            raise
+        finally:
+            with self._lock:
+                self._active -= 1
+                if cancelled and not self._active:
+                    self.close()
+                    if log:
+                        log("Stopped the worker processes")
+
+        with profiling.stage("stitch"):
+            segments = stitch_segments(chunk_segments)
+        result = {
+            "text": "".join(segment["text"] for segment in segments),
+            "segments": segments,
+            "language": languages.most_common(1)[0][0] if languages else None,
+            "duration": duration,
+            "chunks": len(tasks),
+        }
+        if speech_map:
+            result["segments"] = [
+                speech_map.map_segment(segment) for segment in segments
+            ]
+            result["vad"] = transcriber.vad_summary(
+                speech_map, time.perf_counter() - start_time, log
+            )
+        return result
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
@@ -0,0 +1,101 @@
+# whisper_gui/prefetch.py
+import threading
+import time
+
+from whisper_gui.lazy_imports import lazy_import
+
+torch = lazy_import("torch")
+
+# Selections changed again within this many seconds are never loaded
+SETTLE_SECONDS = 0.5
+
+
+def warm_up(model):
+    """Run one encoder pass so the first real inference skips setup costs"""
+    mel = torch.zeros(1, model.dims.n_mels, 3000, device=model.device)
+    with torch.inference_mode():
+        model.embed_audio(mel)
+
+
+def _model_choice(options):
+    return (options["model_size"], bool(options.get("quantized")))
+
+
+class ModelPrefetcher:
+    """Load the model the user is likely to run next while they are choosing
+
+    request() only records the latest selection and returns at once. A
+    single background thread loads it into the model cache once the
+    selection has settled, so a job acquiring the same model finds it there
+    (or waits for the load under way rather than starting another). Only
+    the newest request is kept; a load that is already running when another
+    model is selected finishes and is dropped.
+    """
+
+    def __init__(self, model_cache, warm=False, log=print):
+        self.model_cache = model_cache
+        self.warm = warm
+        self.log = log
+        self._cond = threading.Condition()
+        self._pending = None
+        self._requested_at = 0.0
+        self._wanted = None  # (model size, quantized) of the latest request
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run, name="model-prefetch", daemon=True
+        )
+        self._thread.start()
+
+    def request(self, options):
+        """Prefetch the model a job with these options would use"""
+        wanted = _model_choice(options)
+        with self._cond:
+            self._wanted = wanted
+            self._pending = dict(options)
+            self._requested_at = time.monotonic()
+            self._cond.notify()
+
+    def cancel(self):
+        """Forget a request whose load has not started yet
+
+        A load already under way is kept, since a job may be about to use it.
+        """
+        with self._cond:
+            self._pending = None
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._pending = None
+            self._cond.notify()
+
+    def _next(self):
+        """Wait for a request that has not changed for SETTLE_SECONDS"""
+        with self._cond:
+            while not self._stopped:
+                if self._pending is None:
+                    self._cond.wait()
+                    continue
+                remaining = self._requested_at + SETTLE_SECONDS - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                request, self._pending = self._pending, None
+                return request
+            return None
+
+    def _run(self):
+        while True:
+            request = self._next()
+            if request is None:
+                return
+            wanted = _model_choice(request)
+            try:
+                key = self.model_cache.resolve_job_key(request)
+                self.model_cache.prefetch(
+                    *key,
+                    superseded=lambda: self._wanted != wanted,
+                    warm=warm_up if self.warm else None,
+                )
+            except Exception as e:
+                self.log(f"Error prefetching model: {e}")
@@ -0,0 +1,271 @@
+# whisper_gui/profiling.py
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+PROFILE_DIR = Path(os.path.dirname(__file__)) / "profiles"
+PROFILE_MODES = ("", "cprofile", "torch")
+# How often a job's resident memory is sampled, in seconds
+RSS_SAMPLE_INTERVAL = 0.2
+
+_local = threading.local()
+# Only one cProfile profiler may be active per process
+_profile_lock = threading.Lock()
+_whisper_instrumented = False
+
+
+class StageTimer:
+    """Wall time spent in each named stage of a job
+
+    Stages may nest (word alignment runs inside inference) and repeat (one
+    inference per streaming window); repeated stages are summed.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.started = time.perf_counter()
+        self.peak_rss_mb = None  # highest RSS seen while the timer was active
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (
+                time.perf_counter() - start
+            )
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def as_dict(self):
+        return {name: round(seconds, 3) for name, seconds in self.stages.items()}
+
+    def summary(self):
+        return " | ".join(
+            f"{name} {seconds:.2f}s" for name, seconds in self.stages.items()
+        )
+
+
+class RssSampler(threading.Thread):
+    """Record the highest resident memory of the process while a job runs
+
+    ru_maxrss only ever grows over the life of a process, so on its own it
+    cannot tell a small job from one that ran after a large one.
+    """
+
+    def __init__(self, timer, interval=RSS_SAMPLE_INTERVAL):
+        super().__init__(name="rss-sampler", daemon=True)
+        self.timer = timer
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def sample(self):
+        rss = current_rss_mb()
+        if rss is not None and (
+            self.timer.peak_rss_mb is None or rss > self.timer.peak_rss_mb
+        ):
+            self.timer.peak_rss_mb = rss
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.sample()
+
+
+@contextmanager
+def timing(timer):
+    """Make timer the current thread's timer, so stage() calls report to it
+
+    Also samples the process's resident memory until the block exits.
+    """
+    previous = getattr(_local, "timer", None)
+    _local.timer = timer
+    sampler = RssSampler(timer)
+    sampler.sample()
+    sampler.start()
+    try:
+        yield timer
+    finally:
+        sampler.stop()
+        _local.timer = previous
+
+
+@contextmanager
+def stage(name):
+    """Time a stage against the current thread's timer, if there is one"""
+    timer = getattr(_local, "timer", None)
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+def instrument_whisper():
+    """Time Whisper's word alignment as its own "align_words" stage
+
+    whisper.transcribe looks add_word_timestamps up in its module globals on
+    every call, so wrapping it there is enough. Does nothing when no timer
+    is active, and is only installed once.
+    """
+    global _whisper_instrumented
+    if _whisper_instrumented:
+        return
+    _whisper_instrumented = True
+    try:
+        import whisper.transcribe as whisper_transcribe
+    except Exception as e:
+        print(f"Error instrumenting Whisper: {e}")
+        return
+    original = getattr(whisper_transcribe, "add_word_timestamps", None)
+    if original is None:
+        return
+
+    def add_word_timestamps(*args, **kwargs):
+        with stage("align_words"):
+            return original(*args, **kwargs)
+
+    whisper_transcribe.add_word_timestamps = add_word_timestamps
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, or None if unavailable"""
+    try:
+        import resource
+    except ImportError:
+        return _windows_peak_rss_mb()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def current_rss_mb():
+    """Resident memory of this process in MB, or None if unavailable"""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if sys.platform == "win32":
+        return _windows_rss_mb("WorkingSetSize")
+    return None
+
+
+def _windows_peak_rss_mb():
+    return _windows_rss_mb("PeakWorkingSetSize")
+
+
+def _windows_rss_mb(field):
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = Counters()
+        counters.cb = ctypes.sizeof(Counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(
+            process, ctypes.byref(counters), counters.cb
+        ):
+            return None
+        return getattr(counters, field) / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def job_metrics(timer, duration):
+    """Stage times plus real-time factor and peak RSS, for records and logs
+
+    peak_rss_mb is the highest RSS sampled while the job ran (other jobs
+    running at the same time count too), falling back to the process peak
+    where RSS cannot be sampled.
+    """
+    total = timer.total()
+    process_peak = peak_rss_mb()
+    peak = timer.peak_rss_mb if timer.peak_rss_mb is not None else process_peak
+    return {
+        "stages": timer.as_dict(),
+        "rtf": round(total / duration, 4) if duration and duration > 0 else None,
+        "peak_rss_mb": round(peak, 1) if peak is not None else None,
+        "process_peak_rss_mb": (
+            round(process_peak, 1) if process_peak is not None else None
+        ),
+    }
+
+
+def format_metrics(timer, metrics):
+    parts = [timer.summary()]
+    if metrics["rtf"] is not None:
+        parts.append(f"RTF {metrics['rtf']:.3f}")
+    if metrics["peak_rss_mb"] is not None:
+        parts.append(f"peak RSS {metrics['peak_rss_mb']:.0f} MB")
+    return " | ".join(part for part in parts if part)
+
+
+@contextmanager
+def profile_job(mode, name, log=None):
+    """Profile the enclosed code with cProfile or the torch profiler
+
+    The trace is written to PROFILE_DIR as <name>.prof (open with pstats or
+    snakeviz) or <name>.trace.json (open in chrome://tracing or Perfetto).
+    With mode "" this does nothing.
+    """
+    if not mode:
+        yield
+        return
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    if mode == "torch":
+        import torch
+
+        with torch.profiler.profile(
+            activities=[torch.profiler.ProfilerActivity.CPU], record_shapes=True
+        ) as profiler:
+            yield
+        path = PROFILE_DIR / f"{name}.trace.json"
+        profiler.export_chrome_trace(str(path))
+    elif mode == "cprofile":
+        if not _profile_lock.acquire(blocking=False):
+            if log:
+                log("Profiler busy with another job, not profiling this one")
+            yield
+            return
+        try:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+            path = PROFILE_DIR / f"{name}.prof"
+            profiler.dump_stats(str(path))
+        finally:
+            _profile_lock.release()
+    else:
+        raise ValueError(f"Unknown profile mode: {mode}")
+    if log:
+        log(f"Profile written to {path}")
@@ -0,0 +1,123 @@
+# whisper_gui/quantize.py
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from whisper_gui.lazy_imports import lazy_import
+
+torch = lazy_import("torch")
+whisper = lazy_import("whisper")
+
+QUANTIZED_DIR = Path(os.path.dirname(__file__)) / "cache" / "models"
+
+
+def cache_path(model_size):
+    """Where the int8 weights of a model size are kept
+
+    The file name carries the Whisper and torch versions, because the
+    pickled modules are only loadable by the versions that wrote them.
+    """
+    versions = f"whisper{whisper.__version__}-torch{torch.__version__}"
+    versions = re.sub(r"[^\w.]+", "_", versions)
+    return QUANTIZED_DIR / f"{model_size}-int8-{versions}.pt"
+
+
+def quantize_int8(model):
+    """Quantize the linear layers of a CPU fp32 model to int8, in place
+
+    Whisper's Linear subclass only adds a dtype cast to nn.Linear, which
+    quantize_dynamic does not recognize; on CPU in fp32 the two behave the
+    same, so the layers are retyped before conversion. Embeddings, convolutions
+    and layer norms stay fp32.
+    """
+    for module in model.modules():
+        if type(module) is whisper.model.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+
+
+def encoder_pass_seconds(model):
+    """Time one encoder pass over a 30 second window"""
+    mel = torch.zeros(1, model.dims.n_mels, 3000)
+    with torch.inference_mode():
+        model.encoder(mel)  # warm-up
+        start = time.perf_counter()
+        model.encoder(mel)
+    return time.perf_counter() - start
+
+
+def _save(model, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(fd)
+    try:
+        torch.save(model, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _log_comparison(stats, log):
+    log(
+        f"int8 {stats['model_size']}: {stats['int8_mb']:.0f} MB vs "
+        f"{stats['fp32_mb']:.0f} MB fp32 "
+        f"({stats['int8_mb'] / stats['fp32_mb'] * 100:.0f}%), encoder pass "
+        f"{stats['int8_encoder_seconds']:.2f}s vs "
+        f"{stats['fp32_encoder_seconds']:.2f}s fp32 "
+        f"({stats['fp32_encoder_seconds'] / stats['int8_encoder_seconds']:.1f}x)"
+    )
+
+
+def load_quantized(model_size, log=print):
+    """Load the int8 CPU model for model_size, converting it on first use
+
+    The converted model is stored under QUANTIZED_DIR so later loads skip
+    both the fp32 checkpoint and the conversion. The memory and encoder
+    speed of both versions are measured at conversion time, kept next to
+    the weights and logged on every load.
+    """
+    from whisper_gui.model_cache import model_memory_bytes
+
+    path = cache_path(model_size)
+    stats_path = path.with_suffix(".json")
+    if path.exists():
+        try:
+            model = torch.load(path, map_location="cpu", weights_only=False)
+            model.eval()
+            if stats_path.exists():
+                with open(stats_path, "r", encoding="utf-8") as f:
+                    _log_comparison(json.load(f), log)
+            return model
+        except Exception as e:
+            log(f"Error loading int8 weights, converting again: {e}")
+
+    log(f"Quantizing {model_size} to int8 (first use only)...")
+    model = whisper.load_model(model_size, device="cpu")
+    fp32_bytes = model_memory_bytes(model)
+    fp32_seconds = encoder_pass_seconds(model)
+    start = time.perf_counter()
+    model = quantize_int8(model)
+    convert_seconds = time.perf_counter() - start
+    stats = {
+        "model_size": model_size,
+        "fp32_mb": fp32_bytes / 2**20,
+        "int8_mb": model_memory_bytes(model) / 2**20,
+        "fp32_encoder_seconds": fp32_seconds,
+        "int8_encoder_seconds": encoder_pass_seconds(model),
+        "convert_seconds": convert_seconds,
+    }
+    _log_comparison(stats, log)
+    try:
+        _save(model, path)
+        with open(stats_path, "w", encoding="utf-8") as f:
+            json.dump(stats, f, indent=2)
+    except Exception as e:
+        log(f"Error saving int8 weights: {e}")
+    return model
@@ -0,0 +1,131 @@
+# whisper_gui/resegment.py
+import textwrap
+
+SENTENCE_ENDINGS = (".", "?", "!", "…", "。", "？", "！")
+CLAUSE_ENDINGS = (",", ";", ":", "，", "、", "；")
+# A silence at least this long always ends a cue
+PAUSE_SECONDS = 0.8
+
+
+def segment_words(segment):
+    """Word timings of a segment
+
+    Uses Whisper's word timestamps when the segment has them. Otherwise the
+    segment's time is spread over its words in proportion to their length,
+    which is close enough to split long segments at sensible points. The
+    interpolated words inherit the segment's confidence, if it has one.
+    """
+    if segment.get("words"):
+        return [word for word in segment["words"] if word["word"].strip()]
+
+    tokens = segment["text"].split()
+    if not tokens:
+        return []
+    span = segment["end"] - segment["start"]
+    total = sum(len(token) + 1 for token in tokens)
+    words = []
+    position = segment["start"]
+    for token in tokens:
+        length = span * (len(token) + 1) / total
+        words.append({"word": f" {token}", "start": position, "end": position + length})
+        position += length
+    if segment.get("confidence") is not None:
+        for word in words:
+            word["confidence"] = segment["confidence"]
+    return words
+
+
+def _text(words):
+    return "".join(word["word"] for word in words).strip()
+
+
+def _break_index(words):
+    """Where to split an over-long run of words
+
+    Prefers the last sentence ending, then the last clause ending, in the
+    second half of the run, so cues rarely end mid-phrase.
+    """
+    half = len(words) // 2
+    for endings in (SENTENCE_ENDINGS, CLAUSE_ENDINGS):
+        for index in range(len(words) - 1, max(half, 1) - 1, -1):
+            if words[index - 1]["word"].strip().endswith(endings):
+                return index
+    return len(words)
+
+
+def wrap_lines(text, max_chars=42, max_lines=2):
+    """Break cue text into at most max_lines balanced lines"""
+    # Limits below one would leave no room for any text
+    max_chars, max_lines = max(int(max_chars), 1), max(int(max_lines), 1)
+    if len(text) <= max_chars:
+        return text
+    needed = min(max_lines, -(-len(text) // max_chars))
+    width = max(-(-len(text) // needed), max(len(part) for part in text.split()))
+    lines = textwrap.wrap(text, width=min(width, max_chars))
+    if len(lines) > max_lines:
+        lines = textwrap.wrap(text, width=max_chars)
+    return "\n".join(lines)
+
+
+def _cue(words, cue_id, max_chars, max_lines):
+    cue = {
+        "id": cue_id,
+        "start": words[0]["start"],
+        "end": max(words[-1]["end"], words[0]["start"]),
+        "text": wrap_lines(_text(words), max_chars, max_lines),
+        "words": words,
+    }
+    scores = [word["confidence"] for word in words if "confidence" in word]
+    if scores:
+        cue["confidence"] = round(sum(scores) / len(scores), 4)
+    return cue
+
+
+def resegment(segments, max_seconds, max_chars=42, max_lines=2):
+    """Repack segments into cues of at most max_seconds
+
+    Cues end at long pauses, at sentence endings once they are half the
+    target length, and otherwise at the best break point before they grow
+    past max_seconds or max_lines lines of max_chars characters.
+    """
+    max_seconds = max(float(max_seconds), 0.5)
+    max_text = max_chars * max_lines
+    cues = []
+    current = []
+
+    def flush(words):
+        if words:
+            cues.append(_cue(words, len(cues), max_chars, max_lines))
+
+    for segment in segments:
+        for word in segment_words(segment):
+            if current and word["start"] - current[-1]["end"] >= PAUSE_SECONDS:
+                flush(current)
+                current = []
+            while current and (
+                word["end"] - current[0]["start"] > max_seconds
+                or len(_text(current + [word])) > max_text
+            ):
+                split = _break_index(current)
+                flush(current[:split])
+                current = current[split:]
+            current.append(word)
+            if (
+                word["word"].strip().endswith(SENTENCE_ENDINGS)
+                and word["end"] - current[0]["start"] >= max_seconds / 2
+            ):
+                flush(current)
+                current = []
+    flush(current)
+    return cues
+
+
+def resegment_result(result, options):
+    """Copy of result whose segments follow the job's segment length"""
+    segments = resegment(
+        result["segments"],
+        options.get("segment_length", 7.0),
+        options.get("max_line_chars", 42),
+        options.get("max_lines", 2),
+    )
+    return dict(result, segments=segments)
@@ -0,0 +1,157 @@
+# whisper_gui/result_cache.py
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from whisper_gui.audio_cache import file_fingerprint
+
+CACHE_DIR = Path(os.path.dirname(__file__)) / "cache" / "results"
+
+# Options that change what the model produces; everything else (output format,
+# output path, segment length) only changes how a result is written
+KEY_OPTIONS = (
+    "model_size",
+    "quantized",
+    "language",
+    "task",
+    "word_timestamps",
+    "vad",
+    "beam_size",
+    "cascade_model",
+    "confidence_threshold",
+)
+# Per-segment fields worth keeping; token ids are dropped to keep entries small
+SEGMENT_FIELDS = (
+    "id",
+    "start",
+    "end",
+    "text",
+    "words",
+    "avg_logprob",
+    "no_speech_prob",
+    "compression_ratio",
+    "temperature",
+    "confidence",
+    "redecoded",
+)
+
+
+def result_key(input_path, options):
+    """Cache key for a transcription of input_path with options"""
+    parts = [file_fingerprint(input_path)]
+    parts.extend(f"{name}={options.get(name)}" for name in KEY_OPTIONS)
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def compact_segment(segment):
+    return {name: segment[name] for name in SEGMENT_FIELDS if name in segment}
+
+
+def compact_result(result):
+    """Strip a Whisper result down to what the writers and confidence need"""
+    return {
+        "text": result.get("text", ""),
+        "language": result.get("language"),
+        "duration": result.get("duration"),
+        **({"cascade": result["cascade"]} if "cascade" in result else {}),
+        "segments": [
+            compact_segment(segment) for segment in result.get("segments", [])
+        ],
+    }
+
+
+class ResultCache:
+    """Persistent store of transcription results as gzipped JSON
+
+    Keyed by the input's content fingerprint and the options that affect
+    inference, so re-exporting a transcript to another format or path never
+    reruns the model.
+    """
+
+    def __init__(self, budget_mb=256, cache_dir=CACHE_DIR):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.cache_dir = Path(cache_dir)
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, key):
+        return self.cache_dir / f"{key}.json.gz"
+
+    def get(self, input_path, options):
+        """Return the cached result, or None on a miss"""
+        entry = self._entry_path(result_key(input_path, options))
+        try:
+            with gzip.open(entry, "rt", encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(entry)  # mark as recently used
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Error reading result cache entry: {e}")
+            self.misses += 1
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, input_path, options, result):
+        """Store a result that has its segments"""
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            entry = self._entry_path(result_key(input_path, options))
+            data = json.dumps(
+                compact_result(result),
+                ensure_ascii=False,
+                separators=(",", ":"),
+                default=float,
+            ).encode("utf-8")
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(gzip.compress(data, compresslevel=6))
+                os.replace(tmp_path, entry)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self.evict()
+        except Exception as e:
+            print(f"Error writing result cache entry: {e}")
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits its budget"""
+        entries = []
+        for entry in self.cache_dir.glob("*.json.gz"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.budget_bytes:
+                break
+            try:
+                entry.unlink()
+                total -= size
+            except OSError:
+                pass
+
+
+# Process-wide cache used by transcriber, off until configured
+_default_cache = None
+
+
+def configure(budget_mb):
+    """Enable the process-wide result cache, or disable it with budget_mb=0"""
+    global _default_cache
+    _default_cache = ResultCache(budget_mb) if budget_mb else None
+    return _default_cache
+
+
+def default_cache():
+    return _default_cache
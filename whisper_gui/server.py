@@ -0,0 +1,686 @@
+# whisper_gui/server.py
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from whisper_gui import (
+    audio_cache,
+    media_probe,
+    profiling,
+    result_cache,
+    transcriber,
+    tuner,
+    writers,
+)
+from whisper_gui.config_manager import ConfigManager
+from whisper_gui.job_queue import FINISHED_STATUSES, Job, JobQueue
+from whisper_gui.model_cache import MODEL_SIZES, ModelCache
+from whisper_gui.prefetch import warm_up
+
+# Only local tools may submit jobs, since a job can name any file on disk
+HOST = "127.0.0.1"
+CONTENT_TYPES = {
+    "srt": "application/x-subrip",
+    "vtt": "text/vtt",
+    "txt": "text/plain",
+    "json": "application/json",
+    "tsv": "text/tab-separated-values",
+}
+# Finished jobs kept, with their results, for clients to fetch
+RESULT_RETENTION = 256
+# Latest finished jobs the latency percentiles are computed over
+LATENCY_WINDOW = 1000
+UPLOAD_BLOCK_BYTES = 1024 * 1024
+
+# Options a request may set, with how to parse them
+JOB_OPTIONS = {
+    "model_size": str,
+    "quantized": bool,
+    "language": str,
+    "task": str,
+    "word_timestamps": bool,
+    "segment_length": float,
+    "max_line_chars": int,
+    "max_lines": int,
+    "vad": bool,
+    "confidence": bool,
+    "confidence_threshold": float,
+    "confidence_marks": bool,
+    "cascade_model": str,
+}
+# Numeric options that must be greater than zero
+POSITIVE_OPTIONS = ("segment_length", "max_line_chars", "max_lines")
+# Options that only change how a result is written, so each fetch may set them
+RENDER_OPTIONS = ("segment_length", "max_line_chars", "max_lines", "confidence_marks")
+
+
+class RequestError(Exception):
+    """A request the server turns down, with the HTTP status to answer with"""
+
+    def __init__(self, status, message, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+
+def parse_options(params, names, options):
+    """Copy of options with the named request parameters parsed into it"""
+    options = dict(options)
+    for name in names:
+        if params.get(name) is None:
+            continue
+        value = params[name]
+        try:
+            parse = parse_bool if JOB_OPTIONS[name] is bool else JOB_OPTIONS[name]
+            options[name] = parse(value)
+        except (TypeError, ValueError):
+            raise RequestError(400, f"Invalid {name}: {value!r}")
+        if name in POSITIVE_OPTIONS and options[name] <= 0:
+            raise RequestError(400, f"{name} must be greater than 0: {value!r}")
+    return options
+
+
+def percentiles(values):
+    """Nearest-rank p50, p90 and p99 of values in seconds, None when empty"""
+    ordered = sorted(values)
+    summary = {}
+    for label, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99)):
+        if not ordered:
+            summary[label] = None
+            continue
+        index = min(math.ceil(fraction * len(ordered)), len(ordered)) - 1
+        summary[label] = round(ordered[index], 3)
+    return summary
+
+
+class TranscriptionService:
+    """Queue, warm models and finished results behind the HTTP server
+
+    Jobs run on a JobQueue in priority order, and models stay loaded in a
+    ModelCache between requests. Admission control turns a job away while
+    max_queued jobs are already waiting, or when its estimated processing
+    time would push the estimated backlog past max_backlog_minutes (0
+    disables that check). Results of the newest RESULT_RETENTION finished
+    jobs are kept in memory and can be rendered in any output format.
+    """
+
+    def __init__(
+        self,
+        config_manager,
+        max_workers=2,
+        max_queued=32,
+        max_backlog_minutes=0,
+        upload_dir=None,
+        log=print,
+    ):
+        self.config_manager = config_manager
+        self.max_queued = max_queued
+        self.max_backlog_minutes = max_backlog_minutes
+        self.upload_dir = upload_dir or tempfile.gettempdir()
+        self.log = log
+        setting = config_manager.get_setting
+        self.model_cache = ModelCache(budget_mb=setting("model_cache_mb"), log=log)
+        try:
+            audio_cache.configure(
+                setting("audio_cache_mb"), setting("audio_cache_dtype")
+            )
+        except ValueError as e:
+            print(f"Error configuring audio cache: {e}")
+        result_cache.configure(setting("result_cache_mb"))
+        self.default_options = {
+            "model_size": "base",
+            "quantized": False,
+            "language": "auto",
+            "task": "transcribe",
+            "output_format": "srt",
+            "extra_formats": [],
+            "word_timestamps": False,
+            "segment_length": 7.0,
+            "max_line_chars": setting("max_line_chars"),
+            "max_lines": setting("max_cue_lines"),
+            "streaming": False,
+            "parallel": False,
+            "vad": False,
+            "window_seconds": setting("stream_window_seconds"),
+            "stream_ingest_minutes": setting("stream_ingest_minutes"),
+            "confidence": False,
+            "confidence_threshold": setting("confidence_threshold"),
+            "confidence_marks": False,
+            "cascade_model": "",
+        }
+        self.queue = JobQueue(
+            self.run_job,
+            max_workers=max_workers,
+            on_update=self.on_job_update,
+            order="priority",
+        )
+        self.jobs = {}  # job id -> Job, for the jobs still kept
+        self.results = {}  # job id -> compact result of a finished job
+        self.uploads = {}  # job id -> uploaded file to delete once it has run
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.counters = Counter()
+        self.media_seconds = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.waits = deque(maxlen=LATENCY_WINDOW)
+        self.processing_times = deque(maxlen=LATENCY_WINDOW)
+
+    def preload(self, model_size, quantized=False, warm=False):
+        """Load a model before the first request needs it"""
+        key = self.model_cache.resolve_job_key(
+            {"model_size": model_size, "quantized": quantized}
+        )
+        self.model_cache.prefetch(*key, warm=warm_up if warm else None)
+
+    def cpu_profile(self, options):
+        """This machine's tuned profile for a job's model, if it runs on CPU"""
+        model_size, device, precision = self.model_cache.resolve_job_key(options)
+        if device != "cpu":
+            return None
+        return self.config_manager.cpu_profile(model_size, precision)
+
+    def job_options(self, params):
+        options = parse_options(params, JOB_OPTIONS, self.default_options)
+        if options["model_size"] not in MODEL_SIZES:
+            raise RequestError(400, f"Unknown model_size: {options['model_size']}")
+        if options["task"] not in ("transcribe", "translate"):
+            raise RequestError(400, f"Unknown task: {options['task']}")
+        if options["cascade_model"]:
+            if options["cascade_model"] not in MODEL_SIZES:
+                raise RequestError(
+                    400, f"Unknown cascade_model: {options['cascade_model']}"
+                )
+            options["confidence"] = True
+        profile = self.cpu_profile(options)
+        if profile and profile.get("beam_size"):
+            options["beam_size"] = profile["beam_size"]
+        return options
+
+    def check_capacity(self):
+        """Turn the request away if max_queued jobs are already waiting"""
+        if self.queue.counts()["queued"] >= self.max_queued:
+            self._reject("Queue is full")
+
+    def _reject(self, message):
+        with self._lock:
+            self.counters["rejected"] += 1
+        retry_after = max(1, round(self.queue.remaining_eta() * 60))
+        raise RequestError(503, message, retry_after)
+
+    def submit(self, input_path, params, upload=False):
+        """Queue a job for input_path and return it, or raise RequestError"""
+        if not os.path.isfile(input_path):
+            raise RequestError(400, f"No such file: {input_path}")
+        options = self.job_options(params)
+        try:
+            priority = int(params.get("priority", 0))
+        except (TypeError, ValueError):
+            raise RequestError(400, f"Invalid priority: {params['priority']!r}")
+        self.check_capacity()
+        duration = media_probe.probe_duration(input_path)
+        estimate = self.config_manager.estimate_job(
+            duration, options, os.path.getsize(input_path)
+        )
+        minutes = estimate.minutes if estimate else 0.0
+        with self._lock:
+            backlog = self.queue.remaining_eta()
+            if (
+                self.max_backlog_minutes
+                and not self.queue.is_idle()
+                and backlog + minutes / self.queue.max_workers
+                > self.max_backlog_minutes
+            ):
+                self.counters["rejected"] += 1
+                raise RequestError(
+                    503,
+                    f"Estimated backlog would exceed {self.max_backlog_minutes} min",
+                    max(1, round(backlog * 60)),
+                )
+            job = Job(input_path, None, options, duration, priority=priority)
+            if estimate:
+                job.estimate, job.estimate_sigma = estimate.minutes, estimate.sigma
+            self.jobs[job.id] = job
+            if upload:
+                self.uploads[job.id] = input_path
+            self.counters["accepted"] += 1
+        self.queue.submit(job)
+        return job
+
+    def run_job(self, job):
+        """Transcribe one job (runs on a job queue worker thread)
+
+        Like the GUI, every transcription is added to the processing
+        history, so the estimates used for admission learn from this host.
+        """
+        options = job.options
+        log = lambda message: self.log(f"[job {job.id}] {message}")
+        start = time.perf_counter()
+        timer = profiling.StageTimer()
+        with profiling.timing(timer):
+            result = transcriber.cached_result(job.input_path, options, log)
+            from_cache = result is not None
+            if not from_cache:
+                result = self.transcribe(job, log)
+                transcriber.store_result(job.input_path, options, result)
+        if job.duration <= 0:
+            job.duration = result["duration"]
+        with self._lock:
+            self.results[job.id] = result_cache.compact_result(result)
+        # Cache hits say nothing about how long inference takes
+        if not from_cache:
+            self.config_manager.add_processing_record(
+                os.path.getsize(job.input_path),
+                job.duration,
+                options["model_size"],
+                options["word_timestamps"],
+                options["segment_length"],
+                (time.perf_counter() - start) / 60.0,
+                task=options["task"],
+                language=options["language"],
+                vad=options["vad"],
+                parallel=options["parallel"],
+                quantized=options["quantized"],
+                **profiling.job_metrics(timer, job.duration),
+            )
+
+    def transcribe(self, job, log):
+        options = job.options
+        key = self.model_cache.resolve_job_key(options)
+        profile = self.cpu_profile(options)
+        with profiling.stage("load_model"):
+            model = self.model_cache.acquire(*key)
+        try:
+            with tuner.applied_profile(profile, log):
+                result = transcriber.transcribe(
+                    model,
+                    job.input_path,
+                    options,
+                    fp16=key[2] == "fp16",
+                    log=log,
+                    cancel=job.cancel_event,
+                )
+        finally:
+            self.model_cache.release(model)
+        return transcriber.cascade_result(
+            self.model_cache,
+            job.input_path,
+            result,
+            options,
+            log,
+            cancel=job.cancel_event,
+        )
+
+    def on_job_update(self, job):
+        """Record a finished job's timings, delete its upload, forget old jobs"""
+        if job.status not in FINISHED_STATUSES:
+            if job.status == "running":
+                self.log(f"[job {job.id}] Started")
+            return
+        upload = self.uploads.pop(job.id, None)
+        if upload:
+            try:
+                os.remove(upload)
+            except OSError as e:
+                print(f"Error removing upload: {e}")
+        with self._lock:
+            self.counters[job.status] += 1
+            if job.status == "done":
+                self.media_seconds += max(job.duration, 0.0)
+                self.latencies.append(job.finished_at - job.submitted_at)
+                self.waits.append(job.started_at - job.submitted_at)
+                self.processing_times.append(job.finished_at - job.started_at)
+            finished = [
+                job_id
+                for job_id, kept in self.jobs.items()
+                if kept.status in FINISHED_STATUSES
+            ]
+            for job_id in finished[: max(len(finished) - RESULT_RETENTION, 0)]:
+                del self.jobs[job_id]
+                self.results.pop(job_id, None)
+        self.queue.prune(RESULT_RETENTION)
+        message = job.status if not job.error else f"{job.status}: {job.error}"
+        self.log(f"[job {job.id}] {message} after {job.elapsed():.1f}s")
+
+    def list_jobs(self):
+        with self._lock:
+            return list(self.jobs.values())
+
+    def get_job(self, job_id):
+        with self._lock:
+            job = self.jobs.get(job_id)
+        if job is None:
+            raise RequestError(404, f"Unknown job: {job_id}")
+        return job
+
+    def cancel(self, job_id):
+        job = self.get_job(job_id)
+        if not self.queue.cancel(job):
+            raise RequestError(409, f"Job is {job.status}")
+        return job
+
+    def is_upload(self, job):
+        return os.path.dirname(job.input_path) == self.upload_dir
+
+    def job_status(self, job):
+        status = {
+            "id": job.id,
+            "status": job.status,
+            "input": None if self.is_upload(job) else job.input_path,
+            "priority": job.priority,
+            "options": {name: job.options.get(name) for name in JOB_OPTIONS},
+            "duration": job.duration if job.duration > 0 else None,
+            "estimate_minutes": round(job.estimate, 2) if job.estimate else None,
+            "submitted_at": job.submitted_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }
+        if job.status == "queued":
+            with self._lock:
+                queued = sorted(
+                    (kept for kept in self.jobs.values() if kept.status == "queued"),
+                    key=lambda kept: (-kept.priority, kept.submitted_at),
+                )
+            status["position"] = queued.index(job) + 1 if job in queued else None
+        if job.error:
+            status["error"] = job.error
+        if job.status == "done":
+            status["results"] = {
+                fmt: f"/jobs/{job.id}/result?format={fmt}" for fmt in writers.FORMATS
+            }
+        return status
+
+    def render(self, job_id, params):
+        """A finished job's result as (format, text)"""
+        job = self.get_job(job_id)
+        with self._lock:
+            result = self.results.get(job_id)
+        if result is None:
+            raise RequestError(409, f"Job is {job.status}")
+        fmt = params.get("format", "srt").lower()
+        if fmt not in writers.FORMATS:
+            raise RequestError(
+                400,
+                f"Unknown format {fmt!r} (choose from {', '.join(writers.FORMATS)})",
+            )
+        options = parse_options(params, RENDER_OPTIONS, job.options)
+        options.update(output_format=fmt, extra_formats=[])
+        # The writers work on files; rendering into a scratch one takes ms
+        with tempfile.TemporaryDirectory(dir=self.upload_dir) as scratch:
+            path = os.path.join(scratch, f"result.{fmt}")
+            transcriber.export_result(result, path, options)
+            with open(path, "r", encoding="utf-8") as f:
+                return fmt, f.read()
+
+    def metrics(self):
+        counts = self.queue.counts()
+        uptime = max(time.time() - self.started_at, 1e-6)
+        low, high = self.queue.remaining_interval()
+        with self._lock:
+            counters = dict(self.counters)
+            latencies = list(self.latencies)
+            waits = list(self.waits)
+            processing_times = list(self.processing_times)
+            media_seconds = self.media_seconds
+        done = counters.get("done", 0)
+        return {
+            "queue": {
+                "queued": counts["queued"],
+                "running": counts["running"],
+                "max_queued": self.max_queued,
+                "workers": self.queue.max_workers,
+                "backlog_minutes": round(self.queue.remaining_eta(), 2),
+                "backlog_interval_minutes": [round(low, 2), round(high, 2)],
+            },
+            "jobs": {
+                name: counters.get(name, 0)
+                for name in ("accepted", "rejected", "done", "failed", "cancelled")
+            },
+            "latency_seconds": percentiles(latencies),
+            "wait_seconds": percentiles(waits),
+            "processing_seconds": percentiles(processing_times),
+            "throughput": {
+                "jobs_per_hour": round(done * 3600.0 / uptime, 2),
+                "media_seconds_per_second": round(media_seconds / uptime, 3),
+                "media_seconds": round(media_seconds, 3),
+                "uptime_seconds": round(uptime, 1),
+            },
+            "models_loaded_mb": round(self.model_cache.used_bytes() / 2**20, 1),
+        }
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """JSON API over a TranscriptionService, found on self.server.service
+
+    GET /health, GET /metrics, GET /jobs, GET /jobs/<id>,
+    GET /jobs/<id>/result?format=<fmt>, POST /jobs and DELETE /jobs/<id>.
+    POST /jobs takes a JSON body with "path" and options, or the media file
+    itself as the body with the options in the query string.
+    """
+
+    server_version = "WhisperServer/1.0"
+
+    def do_GET(self):
+        self._dispatch(self._get)
+
+    def do_POST(self):
+        self._dispatch(self._post)
+
+    def do_DELETE(self):
+        self._dispatch(self._delete)
+
+    def _dispatch(self, handler):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split("/") if part]
+        try:
+            handler(self.server.service, parts, params)
+        except RequestError as e:
+            self._send_json(e.status, {"error": str(e)}, e.retry_after)
+        except Exception as e:
+            self._send_json(500, {"error": str(e)})
+
+    def _job_id(self, parts):
+        try:
+            return int(parts[1])
+        except ValueError:
+            raise RequestError(404, f"Unknown job: {parts[1]}")
+
+    def _get(self, service, parts, params):
+        if parts == ["health"]:
+            self._send_json(200, {"status": "ok"})
+        elif parts == ["metrics"]:
+            self._send_json(200, service.metrics())
+        elif parts == ["jobs"]:
+            jobs = [service.job_status(job) for job in service.list_jobs()]
+            self._send_json(200, {"jobs": jobs})
+        elif len(parts) == 2 and parts[0] == "jobs":
+            job = service.get_job(self._job_id(parts))
+            self._send_json(200, service.job_status(job))
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "result":
+            fmt, text = service.render(self._job_id(parts), params)
+            content_type = f"{CONTENT_TYPES[fmt]}; charset=utf-8"
+            self._send(200, text.encode("utf-8"), content_type)
+        else:
+            raise RequestError(404, f"Not found: {self.path}")
+
+    def _post(self, service, parts, params):
+        if parts != ["jobs"]:
+            raise RequestError(404, f"Not found: {self.path}")
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip()
+        if content_type == "application/json":
+            try:
+                body = json.loads(self._read_body() or b"{}")
+            except ValueError as e:
+                raise RequestError(400, f"Invalid JSON: {e}")
+            if not isinstance(body, dict) or not body.get("path"):
+                raise RequestError(400, 'JSON jobs need a "path"')
+            job = service.submit(body["path"], dict(params, **body))
+        else:
+            # Reject before reading a large upload that could not be queued
+            service.check_capacity()
+            path = self._save_upload(service, params.get("filename", ""))
+            try:
+                job = service.submit(path, params, upload=True)
+            except BaseException:
+                os.remove(path)
+                raise
+        self._send_json(202, service.job_status(job))
+
+    def _delete(self, service, parts, params):
+        if len(parts) != 2 or parts[0] != "jobs":
+            raise RequestError(404, f"Not found: {self.path}")
+        job = service.cancel(self._job_id(parts))
+        self._send_json(202, service.job_status(job))
+
+    def _content_length(self):
+        try:
+            return int(self.headers["Content-Length"])
+        except (TypeError, ValueError):
+            raise RequestError(411, "Content-Length is required")
+
+    def _read_body(self):
+        return self.rfile.read(self._content_length())
+
+    def _save_upload(self, service, filename):
+        length = self._content_length()
+        if length > self.server.max_upload_bytes:
+            raise RequestError(413, "Upload is too large")
+        suffix = os.path.splitext(os.path.basename(filename))[1]
+        fd, path = tempfile.mkstemp(dir=service.upload_dir, suffix=suffix)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                remaining = length
+                while remaining:
+                    block = self.rfile.read(min(remaining, UPLOAD_BLOCK_BYTES))
+                    if not block:
+                        raise RequestError(400, "Upload ended early")
+                    f.write(block)
+                    remaining -= len(block)
+        except BaseException:
+            os.remove(path)
+            raise
+        return path
+
+    def _send_json(self, status, data, retry_after=None):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        headers = {"Retry-After": str(retry_after)} if retry_after else {}
+        self._send(status, body, "application/json; charset=utf-8", headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        self.server.service.log(f"{self.address_string()} {format % args}")
+
+
+def build_parser(settings):
+    parser = argparse.ArgumentParser(
+        prog="python -m whisper_gui.server",
+        description="Serve transcriptions over HTTP on localhost, keeping "
+        "models loaded between requests.",
+    )
+    parser.add_argument("--port", type=int, default=settings("server_port"))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings("max_workers"),
+        help="Jobs transcribed at the same time",
+    )
+    parser.add_argument(
+        "--max-queued",
+        type=int,
+        default=settings("server_max_queued"),
+        help="Refuse new jobs while this many are waiting",
+    )
+    parser.add_argument(
+        "--max-backlog-minutes",
+        type=float,
+        default=settings("server_max_backlog_minutes"),
+        help="Refuse jobs that would push the estimated backlog past this "
+        "(0 disables)",
+    )
+    parser.add_argument(
+        "--max-upload-mb",
+        type=float,
+        default=settings("server_max_upload_mb"),
+    )
+    parser.add_argument(
+        "--preload",
+        nargs="*",
+        default=[],
+        choices=MODEL_SIZES,
+        help="Models to load before accepting requests",
+    )
+    parser.add_argument(
+        "--quantized", action="store_true", help="Preload the int8 CPU models"
+    )
+    parser.add_argument(
+        "--warm-up",
+        action="store_true",
+        help="Run one encoder pass on each preloaded model",
+    )
+    return parser
+
+
+def _log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    try:
+        config_manager = ConfigManager()
+    except Exception as e:
+        print(f"Error loading configuration: {e}", file=sys.stderr)
+        return 1
+    args = build_parser(config_manager.get_setting).parse_args(argv)
+    upload_dir = tempfile.mkdtemp(prefix="whisper-server-")
+    service = TranscriptionService(
+        config_manager,
+        max_workers=args.workers,
+        max_queued=args.max_queued,
+        max_backlog_minutes=args.max_backlog_minutes,
+        upload_dir=upload_dir,
+        log=_log,
+    )
+    for model_size in args.preload:
+        _log(f"Loading {model_size}...")
+        service.preload(model_size, args.quantized, args.warm_up)
+
+    httpd = ThreadingHTTPServer((HOST, args.port), RequestHandler)
+    httpd.daemon_threads = True
+    httpd.service = service
+    httpd.max_upload_bytes = int(args.max_upload_mb * 1024 * 1024)
+    _log(f"Listening on http://{HOST}:{httpd.server_address[1]}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        shutil.rmtree(upload_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
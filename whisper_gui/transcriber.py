@@ -0,0 +1,675 @@
+# whisper_gui/transcriber.py
+import os
+import time
+from contextlib import contextmanager
+
+from whisper_gui import (
+    audio_cache,
+    confidence,
+    ingest,
+    media_probe,
+    profiling,
+    resegment,
+    result_cache,
+    writers,
+)
+from whisper_gui.job_queue import JobCancelled
+from whisper_gui.lazy_imports import lazy_import
+
+whisper = lazy_import("whisper")
+
+SAMPLE_RATE = 16000  # whisper.audio.SAMPLE_RATE, kept here to avoid importing torch
+
+# Trailing prompt text carried from one streaming window into the next
+PROMPT_CHARS = 200
+
+MEDIA_EXTENSIONS = (
+    ".mp4",
+    ".avi",
+    ".mkv",
+    ".mov",
+    ".mp3",
+    ".wav",
+    ".flac",
+    ".ogg",
+    ".m4a",
+)
+
+
+def language_option(language):
+    """Map the language selection to the value Whisper expects"""
+    return None if not language or language == "auto" else language.lower()
+
+
+def output_path_for(input_path, output_format, output_dir=None):
+    """Output path with the format's extension, next to the input by default"""
+    output_dir = output_dir or os.path.dirname(input_path)
+    base_name = os.path.splitext(os.path.basename(input_path))[0]
+    return os.path.join(output_dir, f"{base_name}.{output_format}")
+
+
+def load_audio(input_path, log=None):
+    """Decoded 16 kHz mono audio, served from the audio cache when enabled"""
+    cache = audio_cache.default_cache()
+    with profiling.stage("decode_audio"):
+        if cache:
+            return cache.load(input_path, log)
+        return whisper.load_audio(input_path)
+
+
+def open_audio_stream(input_path, log=None, start=0):
+    """Audio of input_path for window-by-window decoding
+
+    Served memory-mapped from the audio cache on a hit. Otherwise the audio
+    is pulled through an ffmpeg pipe in blocks as the windows need it (and
+    written to the cache on the way), so it is never held in full. start
+    is the first sample the windows will ask for; a stream seeks there
+    instead of reading what comes before it.
+    """
+    cache = audio_cache.default_cache()
+    if cache:
+        with profiling.stage("decode_audio"):
+            audio = cache.lookup(input_path, log)
+        if audio is not None:
+            return audio
+    duration = media_probe.probe_duration(input_path)
+    if log:
+        log(f"Streaming audio through ffmpeg in {ingest.BLOCK_SECONDS}s blocks")
+    return ingest.AudioStream(
+        input_path,
+        expected_samples=int(duration * SAMPLE_RATE) if duration > 0 else None,
+        sink=cache.entry_sink(input_path) if cache and not start else None,
+        start=start,
+    )
+
+
+def audio_samples(audio):
+    """Samples in an array, or read so far from an AudioStream"""
+    if isinstance(audio, ingest.AudioStream):
+        return audio.samples_read
+    return len(audio)
+
+
+def close_audio(audio, log=None):
+    if isinstance(audio, ingest.AudioStream):
+        audio.close()
+        if log:
+            log(
+                f"Read {audio.samples_read / SAMPLE_RATE:.0f}s of audio, "
+                f"at most {audio.peak_buffer_bytes / 2**20:.1f} MB buffered"
+            )
+
+
+def stream_ingest(input_path, options):
+    """Whether a whole-file job should decode its audio in windows instead
+
+    Long inputs are read through ffmpeg in blocks rather than decoded into
+    one array, so memory stays bounded. VAD needs all of the audio at once.
+    """
+    minutes = options.get("stream_ingest_minutes", 0)
+    if not minutes or options.get("vad"):
+        return False
+    return media_probe.probe_duration(input_path) > minutes * 60
+
+
+def checkpointed(input_path, options):
+    """Whether a whole-file job is long enough to decode in resumable windows"""
+    minutes = options.get("checkpoint_minutes", 0)
+    if not minutes:
+        return False
+    return media_probe.probe_duration(input_path) > minutes * 60
+
+
+@contextmanager
+def cancellable(model, cancel=None):
+    """Make model raise JobCancelled at its next decode once cancel is set
+
+    Whisper decodes audio 30 seconds at a time through model.decode, so
+    wrapping it on the instance stops even one long transcribe() call soon
+    after the job is cancelled. The model must not be used by another job
+    meanwhile, and the wrappers must not be nested.
+    """
+    if cancel is None:
+        yield model
+        return
+    if cancel.is_set():
+        raise JobCancelled("Cancelled")
+    decode = model.decode
+
+    def checked_decode(*args, **kwargs):
+        if cancel.is_set():
+            raise JobCancelled("Cancelled")
+        return decode(*args, **kwargs)
+
+    model.decode = checked_decode
+    try:
+        yield model
+    finally:
+        del model.decode
+
+
+def cached_result(input_path, options, log=None):
+    """Look the job up in the result cache, or return None"""
+    cache = result_cache.default_cache()
+    if not cache:
+        return None
+    start = time.perf_counter()
+    with profiling.stage("result_cache"):
+        result = cache.get(input_path, options)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if log:
+        if result is None:
+            log(f"Result cache miss ({elapsed_ms:.0f} ms)")
+        else:
+            log(f"Result cache hit ({elapsed_ms:.0f} ms), skipping transcription")
+    return result
+
+
+def store_result(input_path, options, result):
+    """Save a result with segments for later re-exports"""
+    cache = result_cache.default_cache()
+    if cache and "segments" in result:
+        cache.put(input_path, options, result)
+
+
+def prepare_audio(audio, options, log=None):
+    """Apply the optional VAD pre-pass
+
+    Returns the audio to feed the model and a SpeechMap to move timestamps
+    back onto the original timeline, or None when VAD is off.
+    """
+    if not options.get("vad"):
+        return audio, None
+    from whisper_gui import vad
+
+    with profiling.stage("vad"):
+        return vad.apply_vad(audio, log=log)
+
+
+def vad_summary(speech_map, elapsed, log=None):
+    """Summarize what the VAD pre-pass skipped and roughly how long that saved"""
+    speech = speech_map.speech_seconds
+    skipped = speech_map.skipped_seconds
+    time_saved = elapsed / speech * skipped if speech else 0.0
+    if log:
+        log(f"VAD: skipped {skipped:.1f}s of audio, saving ~{time_saved:.1f}s")
+    return {
+        "speech_seconds": speech,
+        "skipped_seconds": skipped,
+        "time_saved": time_saved,
+    }
+
+
+def transcribe(
+    model, input_path, options, fp16=False, log=None, checkpoint=None, cancel=None
+):
+    """Decode the input and run Whisper on it
+
+    The returned result carries the media duration in seconds under
+    "duration", measured from the decoded audio. Inputs longer than
+    options["stream_ingest_minutes"] are decoded in windows from a stream,
+    and so are those longer than options["checkpoint_minutes"] when a
+    checkpoint is given, so they can resume. Setting the cancel event stops
+    the job with JobCancelled.
+    """
+    if stream_ingest(input_path, options) or (
+        checkpoint and checkpointed(input_path, options)
+    ):
+        return transcribe_windowed(
+            model, input_path, options, fp16, log, checkpoint, cancel
+        )
+    audio = load_audio(input_path, log)
+    model_audio, speech_map = prepare_audio(audio, options, log)
+    start = time.perf_counter()
+    if options.get("word_timestamps"):
+        profiling.instrument_whisper()
+    if len(model_audio):
+        with profiling.stage("inference"), cancellable(model, cancel):
+            result = model.transcribe(
+                model_audio,
+                language=language_option(options.get("language")),
+                task=options.get("task", "transcribe"),
+                word_timestamps=options.get("word_timestamps", False),
+                beam_size=options.get("beam_size"),
+                fp16=fp16,
+            )
+    else:
+        result = {"text": "", "segments": [], "language": None}
+    if speech_map:
+        result["segments"] = [
+            speech_map.map_segment(segment) for segment in result["segments"]
+        ]
+        result["vad"] = vad_summary(speech_map, time.perf_counter() - start, log)
+    result["duration"] = len(audio) / SAMPLE_RATE
+    return result
+
+
+def transcribe_windowed(
+    model,
+    input_path,
+    options,
+    fp16=False,
+    log=None,
+    checkpoint=None,
+    cancel=None,
+    progress=None,
+):
+    """Whole-file result built window by window, see iter_job_windows()"""
+    if log:
+        log("Long input: decoding in windows")
+    info = {}
+    segments = list(
+        iter_job_windows(
+            model, input_path, options, fp16, progress, log, info, checkpoint, cancel
+        )
+    )
+    result = {
+        "text": "".join(segment["text"] for segment in segments),
+        "segments": segments,
+        "language": info.get("language"),
+        "duration": info["duration"],
+    }
+    for name in ("vad", "resumed_from"):
+        if name in info:
+            result[name] = info[name]
+    return result
+
+
+def iter_job_windows(
+    model,
+    input_path,
+    options,
+    fp16=False,
+    progress=None,
+    log=None,
+    info=None,
+    checkpoint=None,
+    cancel=None,
+):
+    """Segments of input_path on the file's timeline, decoded window by window
+
+    The input is read as a stream unless VAD needs all of it at once. With
+    a checkpoint that matches the job, its segments are yielded first and
+    decoding carries on from where it stopped. The checkpoint is updated as
+    windows finish, saved if the job stops early (cancelled or failed), and
+    removed once the last window is done. info receives the language, the
+    duration, a VAD summary and, when resumed, the seconds of audio that
+    were skipped under "resumed_from".
+    """
+    info = {} if info is None else info
+    resume = checkpoint.load() if checkpoint else None
+    finished = resume.pop("segments") if resume else []
+    if resume:
+        info["resumed_from"] = resume["offset"] / SAMPLE_RATE
+        if log:
+            log(
+                f"Resuming from checkpoint: {len(finished)} segments, "
+                f"{info['resumed_from'] / 60:.1f} min of audio already decoded"
+            )
+    start = time.perf_counter()
+    if options.get("vad"):
+        audio = load_audio(input_path, log)
+        model_audio, speech_map = prepare_audio(audio, options, log)
+    else:
+        audio = model_audio = open_audio_stream(
+            input_path, log, resume["offset"] if resume else 0
+        )
+        speech_map = None
+
+    def on_window(state):
+        checkpoint.update(state, finished)
+
+    try:
+        yield from list(finished)
+        with cancellable(model, cancel):
+            for segment in iter_transcribe_windows(
+                model,
+                model_audio,
+                options,
+                fp16,
+                progress,
+                info,
+                resume,
+                on_window if checkpoint else None,
+            ):
+                if speech_map:
+                    segment = speech_map.map_segment(segment)
+                finished.append(result_cache.compact_segment(segment))
+                yield segment
+    except BaseException:
+        if checkpoint and checkpoint.state:
+            checkpoint.save()
+            if log:
+                log(f"Checkpoint saved to {os.path.basename(checkpoint.path)}")
+        raise
+    finally:
+        close_audio(audio, log)
+    info["duration"] = audio_samples(audio) / SAMPLE_RATE
+    if speech_map:
+        info["vad"] = vad_summary(speech_map, time.perf_counter() - start, log)
+    if checkpoint:
+        checkpoint.remove()
+
+
+def shift_segment(segment, offset, segment_id):
+    """Move a window-relative segment onto the file's timeline"""
+    segment = dict(segment)
+    segment["id"] = segment_id
+    segment["start"] += offset
+    segment["end"] += offset
+    if segment.get("words"):
+        segment["words"] = [
+            dict(word, start=word["start"] + offset, end=word["end"] + offset)
+            for word in segment["words"]
+        ]
+    return segment
+
+
+def iter_transcribe_windows(
+    model,
+    audio,
+    options,
+    fp16=False,
+    progress=None,
+    info=None,
+    resume=None,
+    on_window=None,
+):
+    """Transcribe audio window by window, yielding segments as they finish
+
+    Windows are options["window_seconds"] long (at least 30s). Each window
+    is decoded with the tail of the previous window's text as its prompt.
+    When the last segment of a window ends within one target segment length
+    (options["segment_length"]) of the window edge it may be cut
+    mid-sentence, so it is dropped and the next window starts at its
+    beginning instead. progress(fraction) is called with the share of the
+    audio that has been processed, and the detected language is stored in
+    info["language"] when info is given. audio may also be an AudioStream,
+    which is read as the windows advance.
+
+    After each window except the last, on_window(state) is called with what
+    is needed to carry on from the next window: its sample offset, the
+    prompt, the language and the next segment id. Passing such a state as
+    resume continues from there.
+    """
+    streamed = isinstance(audio, ingest.AudioStream)
+    total = audio.expected_samples if streamed else len(audio)
+    window_seconds = float(options.get("window_seconds", 120.0))
+    window = max(int(window_seconds * SAMPLE_RATE), 30 * SAMPLE_RATE)
+    margin = max(float(options.get("segment_length", 7.0)), 1.0)
+    language = language_option(options.get("language"))
+    prompt = None
+    offset = 0
+    segment_id = 0
+    if resume:
+        offset = resume["offset"]
+        prompt = resume["prompt"]
+        language = language or resume["language"]
+        segment_id = resume["segment_id"]
+    if options.get("word_timestamps"):
+        profiling.instrument_whisper()
+
+    while True:
+        with profiling.stage("decode_audio"):
+            if streamed:
+                chunk = audio.window(offset, window)
+            else:
+                chunk = audio[offset : offset + window]
+            chunk_end = offset + len(chunk)
+            more = audio.has_more(chunk_end) if streamed else chunk_end < total
+        if not len(chunk):
+            break
+        with profiling.stage("inference"):
+            result = model.transcribe(
+                chunk,
+                language=language,
+                task=options.get("task", "transcribe"),
+                word_timestamps=options.get("word_timestamps", False),
+                beam_size=options.get("beam_size"),
+                fp16=fp16,
+                initial_prompt=prompt,
+            )
+        # Keep the language detected in the first window for the rest
+        language = language or result.get("language")
+        if info is not None:
+            info["language"] = language
+        segments = result["segments"]
+
+        next_offset = chunk_end
+        if more and len(segments) > 1:
+            last = segments[-1]
+            if last["end"] > len(chunk) / SAMPLE_RATE - margin:
+                carried = offset + int(last["start"] * SAMPLE_RATE)
+                if carried > offset:
+                    segments = segments[:-1]
+                    next_offset = carried
+
+        for segment in segments:
+            yield shift_segment(segment, offset / SAMPLE_RATE, segment_id)
+            segment_id += 1
+
+        text = "".join(segment["text"] for segment in segments).strip()
+        if text:
+            prompt = text[-PROMPT_CHARS:]
+        offset = next_offset
+        if progress and not more:
+            progress(1.0)
+        elif progress and total:
+            progress(min(offset / total, 0.99))
+        if not more:
+            break
+        if on_window:
+            on_window(
+                {
+                    "offset": offset,
+                    "prompt": prompt,
+                    "language": language,
+                    "segment_id": segment_id,
+                }
+            )
+
+
+def transcribe_streaming(
+    model,
+    input_path,
+    output_path,
+    options,
+    fp16=False,
+    progress=None,
+    log=None,
+    checkpoint=None,
+    cancel=None,
+):
+    """Transcribe in windows, appending each finished segment to the output
+
+    Segments are written as soon as their window is decoded instead of being
+    collected, so the output grows while the job runs. A resumed job writes
+    the segments from its checkpoint again first. Returns a result summary
+    with the detected language, duration and segment count.
+    """
+    count = 0
+    info = {}
+    subtitle_paths, other_paths = split_paths(
+        writers.output_paths(output_path, output_formats(options))
+    )
+    scoring = options.get("confidence")
+    threshold = confidence.threshold_for(options)
+    mark_below = threshold if options.get("confidence_marks") else None
+    report = []
+    with writers.SegmentWriter(
+        subtitle_paths, flush_each=True, mark_below=mark_below
+    ) as cue_writer, writers.SegmentWriter(
+        other_paths, flush_each=True, mark_below=mark_below
+    ) as segment_writer:
+        for segment in iter_job_windows(
+            model, input_path, options, fp16, progress, log, info, checkpoint, cancel
+        ):
+            if scoring:
+                segment = confidence.score_segment(segment)
+                report.append(confidence.report_entry(segment, threshold))
+            with profiling.stage("write"):
+                segment_writer.write(segment)
+                if not subtitle_paths:
+                    count += 1
+                    continue
+                # Cues cannot span windows here, so long segments are only split
+                for cue in resegment.resegment(
+                    [segment],
+                    options.get("segment_length", 7.0),
+                    options.get("max_line_chars", 42),
+                    options.get("max_lines", 2),
+                ):
+                    cue_writer.write(cue)
+                    count += 1
+        summary = {
+            "language": info.get("language"),
+            "duration": info["duration"],
+            "segment_count": count,
+        }
+        cue_writer.close(summary)
+        segment_writer.close(summary)
+    if scoring:
+        confidence.write_report(report, output_path, threshold)
+    for name in ("vad", "resumed_from"):
+        if name in info:
+            summary[name] = info[name]
+    return summary
+
+
+def format_timestamp(seconds):
+    """Convert seconds to SRT/VTT timestamp format with improved precision"""
+    return writers.format_timestamp(seconds)
+
+
+def output_formats(options):
+    """The job's output format followed by any extra formats, without repeats"""
+    formats = [options.get("output_format", "srt")]
+    formats.extend(
+        fmt for fmt in options.get("extra_formats", ()) if fmt not in formats
+    )
+    return formats
+
+
+def split_paths(paths):
+    """Split {format: path} into subtitle formats and the rest"""
+    subtitles = {
+        fmt: path for fmt, path in paths.items() if fmt in writers.SUBTITLE_FORMATS
+    }
+    others = {fmt: path for fmt, path in paths.items() if fmt not in subtitles}
+    return subtitles, others
+
+
+def export_result(result, output_path, options):
+    """Write result in every format of the job
+
+    SRT and VTT get cues cut to the job's segment length; JSON, TSV and TXT
+    keep Whisper's own segments with their statistics. With confidence
+    scores on, a <name>.confidence.json sidecar is written
+    too, and low-confidence cues are marked in SRT and VTT if the job asks.
+    """
+    formats = output_formats(options)
+    mark_below = None
+    if options.get("confidence"):
+        threshold = confidence.threshold_for(options)
+        with profiling.stage("confidence"):
+            result = confidence.score_result(result)
+            confidence.write_report(
+                [
+                    confidence.report_entry(segment, threshold)
+                    for segment in result["segments"]
+                ],
+                output_path,
+                threshold,
+                {"cascade": result["cascade"]} if "cascade" in result else None,
+            )
+        if options.get("confidence_marks"):
+            mark_below = threshold
+    subtitle_paths, other_paths = split_paths(
+        writers.output_paths(output_path, formats)
+    )
+    if other_paths:
+        with profiling.stage("write"):
+            writers.write_outputs(result, other_paths, mark_below)
+    if subtitle_paths:
+        with profiling.stage("resegment"):
+            cues = resegment.resegment_result(result, options)
+        with profiling.stage("write"):
+            writers.write_outputs(cues, subtitle_paths, mark_below)
+
+
+def read_span(input_path, start, end, cached=None):
+    """Audio between start and end seconds, without decoding the rest of the file
+
+    Sliced from the cached audio when there is one; otherwise ffmpeg seeks
+    to start and reads only as far as end.
+    """
+    first, last = int(start * SAMPLE_RATE), int(end * SAMPLE_RATE)
+    if cached is not None:
+        return cached[first:last]
+    with ingest.AudioStream(input_path, start=first) as stream:
+        return stream.window(first, last - first)
+
+
+def cascade_result(model_cache, input_path, result, options, log=None, cancel=None):
+    """Re-decode the result's low-confidence spans with the job's cascade model
+
+    Does nothing unless the job computes confidence and names a cascade
+    model other than its own, or when the result was streamed to disk.
+    Only the audio around each span is read. Setting cancel stops it with
+    JobCancelled before the next span or 30-second window.
+    """
+    cascade_model = options.get("cascade_model")
+    if (
+        not options.get("confidence")
+        or not cascade_model
+        or cascade_model == options.get("model_size")
+        or "segments" not in result
+    ):
+        return result
+    scored = confidence.score_result(result)
+    threshold = confidence.threshold_for(options)
+    if not confidence.low_confidence_spans(scored["segments"], threshold):
+        if log:
+            log("Cascade: no low-confidence segments")
+        return dict(scored, cascade={"model_size": cascade_model, "spans": 0})
+
+    cache = audio_cache.default_cache()
+    cached = cache.lookup(input_path, log) if cache else None
+    key = model_cache.resolve_job_key(dict(options, model_size=cascade_model))
+    if log:
+        log(f"Loading {cascade_model} for low-confidence spans...")
+    with profiling.stage("load_model"):
+        model = model_cache.acquire(*key)
+    language = language_option(options.get("language")) or result.get("language")
+
+    def decode_span(start, end, prompt):
+        if cancel is not None and cancel.is_set():
+            raise JobCancelled("Cancelled")
+        with profiling.stage("decode_audio"):
+            audio = read_span(input_path, start, end, cached)
+        decoded = model.transcribe(
+            audio,
+            language=language,
+            task=options.get("task", "transcribe"),
+            word_timestamps=options.get("word_timestamps", False),
+            beam_size=options.get("beam_size"),
+            fp16=key[2] == "fp16",
+            condition_on_previous_text=False,
+            initial_prompt=prompt,
+        )
+        return [
+            shift_segment(segment, start, segment["id"])
+            for segment in decoded["segments"]
+        ]
+
+    try:
+        with profiling.stage("cascade"), cancellable(model, cancel):
+            return confidence.cascade(
+                scored, decode_span, cascade_model, threshold, log
+            )
+    finally:
+        model_cache.release(model)
+
+
+def write_output(result, output_path, output_format):
+    writers.write_outputs(result, {output_format: output_path})
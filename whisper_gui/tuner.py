@@ -0,0 +1,197 @@
+# whisper_gui/tuner.py
+import argparse
+import datetime
+import itertools
+import sys
+import threading
+from contextlib import contextmanager
+
+from whisper_gui import transcriber
+from whisper_gui.config_manager import ConfigManager
+from whisper_gui.model_cache import MODEL_SIZES
+from whisper_gui.timing import measure, synthetic_speech
+from whisper_gui.workers import available_cores
+
+# torch's thread count is process-wide, so it is only changed between jobs.
+# The inter-op pool is left at torch's default: Whisper runs its ops one
+# after another, so the pool sits idle, and torch only accepts a new size
+# before any parallel work has started, not per model
+_profile_lock = threading.Lock()
+_running = 0
+
+
+def thread_candidates(cores):
+    """Thread counts worth trying: powers of two, half and all of the cores"""
+    counts = {cores, max(1, cores // 2)}
+    count = 1
+    while count < cores:
+        counts.add(count)
+        count *= 2
+    return sorted(counts)
+
+
+def parse_beam(value):
+    """Parse a beam width, where "greedy" and 1 both mean greedy decoding"""
+    if value == "greedy":
+        return None
+    width = int(value)
+    if width < 1:
+        raise argparse.ArgumentTypeError("beam width must be at least 1")
+    return width if width > 1 else None
+
+
+@contextmanager
+def applied_profile(profile, log=None):
+    """Run a job under the torch thread count of its tuned profile
+
+    Without a profile torch's current count is kept. The count is shared by
+    every job in the process, so it is only changed when no other job is
+    running; a job that starts alongside others runs with their count.
+    """
+    global _running
+    threads = int(profile["threads"]) if profile else None
+    with _profile_lock:
+        if threads:
+            import torch
+
+            current = torch.get_num_threads()
+            if not _running:
+                if current != threads:
+                    torch.set_num_threads(threads)
+                if log:
+                    log(f"Using tuned CPU profile: {threads} thread(s)")
+            elif current != threads and log:
+                log(
+                    f"Keeping {current} torch thread(s) while other jobs run "
+                    f"instead of the tuned {threads}"
+                )
+        _running += 1
+    try:
+        yield
+    finally:
+        with _profile_lock:
+            _running -= 1
+
+
+def tune_model(model, audio, threads_list, beam_sizes, repeat=2, log=print):
+    """Time model on audio for every thread count and beam width
+
+    Returns the results, fastest first, as dicts with threads, beam_size
+    and rtf (processing seconds per second of audio).
+    """
+    import torch
+
+    seconds = len(audio) / transcriber.SAMPLE_RATE
+    options = {"language": "en", "temperature": 0.0, "fp16": False}
+    # The first pass pays for allocations and kernel selection
+    model.transcribe(audio, **options)
+    results = []
+    for threads, beam_size in itertools.product(threads_list, beam_sizes):
+        torch.set_num_threads(threads)
+        median, _ = measure(
+            lambda: model.transcribe(audio, beam_size=beam_size, **options), repeat
+        )
+        results.append(
+            {"threads": threads, "beam_size": beam_size, "rtf": median / seconds}
+        )
+        log(
+            f"  {threads:3d} thread(s), "
+            f"{'greedy' if beam_size is None else f'beam {beam_size}'}: "
+            f"RTF {median / seconds:.3f}"
+        )
+    results.sort(key=lambda entry: entry["rtf"])
+    return results
+
+
+def load_model(model_size, quantized):
+    if quantized:
+        from whisper_gui import quantize
+
+        return quantize.load_quantized(model_size)
+    import whisper
+
+    return whisper.load_model(model_size, device="cpu")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m whisper_gui.tuner",
+        description="Find the fastest CPU thread count (and optionally beam "
+        "width) for each model size on this machine and save it as the "
+        "machine's profile in whisper_config.json.",
+    )
+    parser.add_argument(
+        "--models", nargs="+", default=["base"], choices=MODEL_SIZES
+    )
+    parser.add_argument(
+        "--quantized", action="store_true", help="Tune the int8 CPU models"
+    )
+    parser.add_argument(
+        "--clip",
+        help="Audio or video file to tune on (default: synthetic speech)",
+    )
+    parser.add_argument("--clip-seconds", type=float, default=30.0)
+    parser.add_argument(
+        "--threads",
+        nargs="+",
+        type=int,
+        help="Thread counts to try (default: powers of two up to the cores)",
+    )
+    parser.add_argument(
+        "--beam-sizes",
+        nargs="+",
+        type=parse_beam,
+        default=[None],
+        help="Decoding to try: greedy or beam widths (default: greedy only). "
+        "Wider beams can be more accurate, so only list the ones you accept",
+    )
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Report without saving profiles"
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.clip:
+        audio = transcriber.load_audio(args.clip)
+        audio = audio[: int(args.clip_seconds * transcriber.SAMPLE_RATE)]
+    else:
+        audio = synthetic_speech(args.clip_seconds)
+    threads_list = args.threads or thread_candidates(available_cores())
+    precision = "int8" if args.quantized else "fp32"
+
+    config_manager = ConfigManager()
+    for model_size in args.models:
+        print(f"Tuning {model_size} ({precision})...", file=sys.stderr)
+        model = load_model(model_size, args.quantized)
+        results = tune_model(
+            model,
+            audio,
+            threads_list,
+            args.beam_sizes,
+            args.repeat,
+            log=lambda message: print(message, file=sys.stderr),
+        )
+        del model
+        best = dict(
+            results[0],
+            rtf=round(results[0]["rtf"], 4),
+            tuned_at=datetime.datetime.now().isoformat(timespec="seconds"),
+        )
+        decoding = "greedy" if best["beam_size"] is None else "beam"
+        if best["beam_size"] is not None:
+            decoding += f" {best['beam_size']}"
+        print(
+            f"Best for {model_size} ({precision}): {best['threads']} thread(s), "
+            f"{decoding}, RTF {best['rtf']:.3f}",
+            file=sys.stderr,
+        )
+        if not args.dry_run:
+            config_manager.save_cpu_profile(model_size, precision, best)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
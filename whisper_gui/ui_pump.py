@@ -0,0 +1,135 @@
+# whisper_gui/ui_pump.py
+import datetime
+import os
+import threading
+import tkinter as tk
+from collections import OrderedDict, deque
+from pathlib import Path
+
+LOG_DIR = Path(os.path.dirname(__file__)) / "logs"
+LOG_FILE_MAX_BYTES = 10 * 1024 * 1024
+
+
+class UIPump:
+    """Apply updates from worker threads to Tk widgets at a fixed frame rate
+
+    Worker threads never touch Tk directly: they queue log lines and
+    callbacks here, and the Tk thread drains the queue every interval_ms via
+    after(). Updates posted under the same key within one frame collapse
+    into the latest one, so a burst of progress reports costs one redraw.
+    The log view keeps the last max_lines lines; every line is also appended
+    to log_path.
+    """
+
+    def __init__(
+        self, root, log_widget, interval_ms=50, max_lines=1000, log_path=None
+    ):
+        self.root = root
+        self.log_widget = log_widget
+        self.interval_ms = max(int(interval_ms), 10)
+        self.max_lines = max(int(max_lines), 1)
+        self.log_path = Path(log_path) if log_path else LOG_DIR / "whisper_gui.log"
+        self._lock = threading.Lock()
+        self._lines = deque()
+        self._calls = deque()
+        self._latest = OrderedDict()
+        self._log_file = None
+        self._running = False
+
+    def start(self):
+        self._running = True
+        self._open_log_file()
+        self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        """Stop pumping and flush queued lines to the log file
+
+        Called after the main loop has ended, so widgets are left alone.
+        """
+        self._running = False
+        with self._lock:
+            lines, self._lines = self._lines, deque()
+        if self._log_file:
+            self._write_file(lines)
+            self._log_file.close()
+            self._log_file = None
+
+    def _open_log_file(self):
+        try:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            if (
+                self.log_path.exists()
+                and self.log_path.stat().st_size > LOG_FILE_MAX_BYTES
+            ):
+                os.replace(self.log_path, self.log_path.with_suffix(".log.1"))
+            self._log_file = open(self.log_path, "a", encoding="utf-8")
+            self._log_file.write(
+                f"--- session started {datetime.datetime.now().isoformat()} ---\n"
+            )
+        except OSError as e:
+            print(f"Error opening log file: {e}")
+            self._log_file = None
+
+    def log(self, message):
+        """Queue a log line (any thread)"""
+        stamp = datetime.datetime.now().strftime("%H:%M:%S")
+        with self._lock:
+            self._lines.append((stamp, message))
+
+    def post(self, callback, *args):
+        """Run callback(*args) on the Tk thread (any thread)"""
+        with self._lock:
+            self._calls.append((callback, args))
+
+    def post_latest(self, key, callback, *args):
+        """Like post(), but only the last callback per key in a frame runs"""
+        with self._lock:
+            self._latest.pop(key, None)
+            self._latest[key] = (callback, args)
+
+    def _tick(self):
+        try:
+            self._drain()
+        finally:
+            if self._running:
+                self.root.after(self.interval_ms, self._tick)
+
+    def _drain(self):
+        with self._lock:
+            lines, self._lines = self._lines, deque()
+            calls, self._calls = self._calls, deque()
+            latest, self._latest = self._latest, OrderedDict()
+
+        if lines:
+            self._write_lines(lines)
+        for callback, args in list(calls) + list(latest.values()):
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"Error in UI update: {e}")
+
+    def _write_file(self, lines):
+        if not self._log_file or not lines:
+            return
+        try:
+            self._log_file.write(
+                "".join(f"{stamp} {message}\n" for stamp, message in lines)
+            )
+            self._log_file.flush()
+        except OSError as e:
+            print(f"Error writing log file: {e}")
+
+    def _write_lines(self, lines):
+        self._write_file(lines)
+
+        # Only the lines that will stay visible are inserted
+        visible = list(lines)[-self.max_lines :]
+        self.log_widget.insert(
+            tk.END, "".join(f"{message}\n" for _, message in visible)
+        )
+        # The text always ends with an empty line after the last newline
+        shown = int(self.log_widget.index("end-1c").split(".")[0]) - 1
+        excess = shown - self.max_lines
+        if excess > 0:
+            self.log_widget.delete("1.0", f"{excess + 1}.0")
+        self.log_widget.see(tk.END)
@@ -0,0 +1,161 @@
+# whisper_gui/vad.py
+import bisect
+
+from whisper_gui.lazy_imports import lazy_import
+from whisper_gui.transcriber import SAMPLE_RATE
+
+np = lazy_import("numpy")
+
+# Silence inserted between speech regions so Whisper still sees a pause there
+REGION_GAP_SECONDS = 0.3
+# Frames are measured in blocks to avoid a full-length temporary array
+BLOCK_SECONDS = 600
+
+
+def frame_energy_db(audio, frame):
+    """Mean energy in dB of consecutive frames of `frame` samples"""
+    frames = len(audio) // frame
+    block = max(int(BLOCK_SECONDS * SAMPLE_RATE) // frame, 1) * frame
+    energies = np.empty(frames, dtype=np.float32)
+    done = 0
+    for start in range(0, frames * frame, block):
+        chunk = np.asarray(audio[start : min(start + block, frames * frame)])
+        count = len(chunk) // frame
+        power = np.square(chunk.reshape(count, frame), dtype=np.float32).mean(axis=1)
+        energies[done : done + count] = 10.0 * np.log10(power + 1e-10)
+        done += count
+    return energies
+
+
+def detect_speech(
+    audio,
+    frame_seconds=0.03,
+    margin_db=10.0,
+    min_speech_seconds=0.25,
+    min_silence_seconds=0.6,
+    padding_seconds=0.2,
+):
+    """Return (start, end) sample ranges that likely contain speech
+
+    A frame counts as speech when its energy is margin_db above the noise
+    floor (the 10th percentile of frame energies), or a quarter of the way
+    from the floor to the loud end when the recording is very dynamic.
+    Short gaps are bridged, short blips dropped and every region padded.
+    """
+    frame = max(int(frame_seconds * SAMPLE_RATE), 1)
+    energies = frame_energy_db(audio, frame)
+    if not len(energies):
+        return []
+
+    floor, loud = np.percentile(energies, [10, 95])
+    threshold = floor + max(margin_db, 0.25 * (loud - floor))
+    active = energies > threshold
+
+    # Rising and falling edges of the active mask give the raw regions
+    edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    min_silence = int(min_silence_seconds / frame_seconds)
+    min_speech = int(min_speech_seconds / frame_seconds)
+    padding = int(padding_seconds * SAMPLE_RATE)
+
+    regions = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if regions and start - regions[-1][1] < min_silence:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+
+    total = len(audio)
+    padded = []
+    for start, end in regions:
+        if end - start < min_speech:
+            continue
+        start = max(start * frame - padding, 0)
+        end = min(end * frame + padding, total)
+        if padded and start <= padded[-1][1]:
+            padded[-1][1] = max(padded[-1][1], end)
+        else:
+            padded.append([start, end])
+    return [(start, end) for start, end in padded]
+
+
+class SpeechMap:
+    """Maps times in the speech-only audio back to the original timeline"""
+
+    def __init__(self, regions, total_samples):
+        self.regions = regions
+        self.total_seconds = total_samples / SAMPLE_RATE
+        gap = int(REGION_GAP_SECONDS * SAMPLE_RATE)
+        self._compact_starts = []
+        self._original_starts = []
+        self._lengths = []
+        position = 0
+        for start, end in regions:
+            self._compact_starts.append(position / SAMPLE_RATE)
+            self._original_starts.append(start / SAMPLE_RATE)
+            self._lengths.append((end - start) / SAMPLE_RATE)
+            position += end - start + gap
+        self.gap_samples = gap
+
+    @property
+    def speech_seconds(self):
+        return sum(self._lengths)
+
+    @property
+    def skipped_seconds(self):
+        return max(self.total_seconds - self.speech_seconds, 0.0)
+
+    def compact(self, audio):
+        """Concatenate the speech regions, separated by short silences"""
+        if not self.regions:
+            return np.zeros(0, dtype=np.float32)
+        gap = np.zeros(self.gap_samples, dtype=np.float32)
+        pieces = []
+        for start, end in self.regions:
+            pieces.append(np.asarray(audio[start:end], dtype=np.float32))
+            pieces.append(gap)
+        return np.concatenate(pieces[:-1])
+
+    def to_original(self, seconds):
+        """Original time of a point in the compacted audio
+
+        Points inside an inserted gap map to the end of the region before it.
+        """
+        index = max(bisect.bisect_right(self._compact_starts, seconds) - 1, 0)
+        if not self._compact_starts:
+            return seconds
+        into = min(
+            max(seconds - self._compact_starts[index], 0.0), self._lengths[index]
+        )
+        return self._original_starts[index] + into
+
+    def map_segment(self, segment):
+        segment = dict(segment)
+        segment["start"] = self.to_original(segment["start"])
+        segment["end"] = max(self.to_original(segment["end"]), segment["start"])
+        if segment.get("words"):
+            segment["words"] = [
+                dict(
+                    word,
+                    start=self.to_original(word["start"]),
+                    end=self.to_original(word["end"]),
+                )
+                for word in segment["words"]
+            ]
+        return segment
+
+
+def apply_vad(audio, log=None):
+    """Return (speech-only audio, SpeechMap) for audio"""
+    regions = detect_speech(audio)
+    speech_map = SpeechMap(regions, len(audio))
+    if log:
+        total = speech_map.total_seconds
+        skipped = speech_map.skipped_seconds
+        log(
+            f"VAD: {len(regions)} speech regions, skipping {skipped:.1f}s of "
+            f"{total:.1f}s ({skipped * 100.0 / total if total else 0:.0f}%)"
+        )
+    return speech_map.compact(audio), speech_map
@@ -0,0 +1,115 @@
+# whisper_gui/workers.py
+import multiprocessing
+import os
+import platform
+import sys
+
+# Per-process model cache, set up once by init_worker
+_worker_cache = None
+
+
+def available_cores():
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def host_id():
+    """Identify this machine, so settings tuned on one are not used on others"""
+    return f"{platform.node()}/{platform.machine()}/{available_cores()} cores"
+
+
+def plan_workers(num_tasks, workers=None, threads=None):
+    """Split the machine's cores between worker processes
+
+    Returns (workers, threads per worker) such that workers * threads does
+    not exceed the number of available cores.
+    """
+    cores = available_cores()
+    if workers is None:
+        per_worker = threads or min(4, cores)
+        workers = max(1, cores // per_worker)
+    workers = max(1, min(workers, num_tasks or 1))
+    if threads is None:
+        threads = max(1, cores // workers)
+    return workers, threads
+
+
+def init_worker(
+    threads,
+    budget_mb,
+    slot_counter=None,
+    preload=None,
+    audio_cache_mb=0,
+    result_cache_mb=0,
+):
+    """Pin this process to its own slice of cores and set torch thread counts
+
+    preload is an optional model size, or (size, device, precision) key, to
+    load straight away, so the first task does not pay for it. audio_cache_mb
+    and result_cache_mb enable the decoded-audio and transcription result
+    caches.
+    """
+    global _worker_cache
+
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+
+    if slot_counter is not None and hasattr(os, "sched_setaffinity"):
+        with slot_counter.get_lock():
+            slot = slot_counter.value
+            slot_counter.value += 1
+        cores = sorted(os.sched_getaffinity(0))
+        first = (slot * threads) % len(cores)
+        pinned = {cores[(first + i) % len(cores)] for i in range(threads)}
+        try:
+            os.sched_setaffinity(0, pinned)
+        except OSError as e:
+            print(f"Warning: could not pin worker to cores: {e}", file=sys.stderr)
+
+    import torch
+
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Only allowed before any parallel work has started in this process
+        pass
+
+    from whisper_gui import audio_cache, result_cache
+    from whisper_gui.model_cache import ModelCache
+
+    audio_cache.configure(audio_cache_mb)
+    result_cache.configure(result_cache_mb)
+
+    _worker_cache = ModelCache(
+        budget_mb=budget_mb, log=lambda message: print(message, file=sys.stderr)
+    )
+    if preload:
+        key = preload if isinstance(preload, tuple) else (preload,)
+        _worker_cache.release(_worker_cache.acquire(*key))
+
+
+def worker_cache():
+    """The model cache of the current worker process"""
+    return _worker_cache
+
+
+def create_pool(
+    workers, threads, budget_mb, preload=None, audio_cache_mb=0, result_cache_mb=0
+):
+    """Start a spawn pool whose processes are pinned to disjoint cores"""
+    ctx = multiprocessing.get_context("spawn")
+    slot_counter = ctx.Value("i", 0)
+    return ctx.Pool(
+        workers,
+        initializer=init_worker,
+        initargs=(
+            threads,
+            budget_mb,
+            slot_counter,
+            preload,
+            audio_cache_mb,
+            result_cache_mb,
+        ),
+    )
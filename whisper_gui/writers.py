@@ -0,0 +1,239 @@
+# whisper_gui/writers.py
+import json
+import os
+
+FORMATS = ("srt", "vtt", "txt", "json", "tsv")
+# Formats written as re-segmented cues; the others keep Whisper's segments
+SUBTITLE_FORMATS = ("srt", "vtt")
+SEGMENT_GAP = 0.01  # 10ms gap between segments to prevent overlap
+BUFFER_SIZE = 1024 * 1024
+LOW_CONFIDENCE_COLOR = "#ffa500"
+
+
+def format_timestamp(seconds, decimal=","):
+    """Convert seconds to an SRT (or, with decimal=".", VTT) timestamp"""
+    return format_milliseconds(round(max(seconds, 0.0) * 1000), decimal)
+
+
+def format_milliseconds(msec, decimal=","):
+    seconds, msec = divmod(msec, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return "%02d:%02d:%02d%s%03d" % (hours, minutes, seconds, decimal, msec)
+
+
+class FormatWriter:
+    """Renders segments in one output format
+
+    Each hook returns the text to append, so the caller can batch writes.
+    segment() receives the cue's times in milliseconds and as SRT
+    timestamps, so they are only formatted once for all formats. Formats
+    that can style text mark cues whose confidence is below mark_below.
+    """
+
+    mark_below = None
+
+    def is_low(self, segment):
+        confidence = segment.get("confidence")
+        return (
+            self.mark_below is not None
+            and confidence is not None
+            and confidence < self.mark_below
+        )
+
+    def begin(self, info):
+        return ""
+
+    def segment(self, index, segment, start_ms, end_ms, stamps):
+        return ""
+
+    def end(self, info):
+        return ""
+
+
+class SrtWriter(FormatWriter):
+    def segment(self, index, segment, start_ms, end_ms, stamps):
+        text = segment["text"].strip()
+        if self.is_low(segment):
+            text = f'<font color="{LOW_CONFIDENCE_COLOR}">{text}</font>'
+        return f"{index}\n{stamps[0]} --> {stamps[1]}\n{text}\n\n"
+
+
+class VttWriter(FormatWriter):
+    """WebVTT; low-confidence cues get the "low" class and a style for it"""
+
+    def begin(self, info):
+        if self.mark_below is None:
+            return "WEBVTT\n\n"
+        return (
+            "WEBVTT\n\nSTYLE\n"
+            f"::cue(.low) {{ color: {LOW_CONFIDENCE_COLOR}; }}\n\n"
+        )
+
+    def segment(self, index, segment, start_ms, end_ms, stamps):
+        start, end = stamps[0].replace(",", "."), stamps[1].replace(",", ".")
+        text = segment["text"].strip()
+        if self.is_low(segment):
+            text = f"<c.low>{text}</c>"
+        return f"{start} --> {end}\n{text}\n\n"
+
+
+class TxtWriter(FormatWriter):
+    """Plain transcript text
+
+    A finished result's full text is written as is; when segments are
+    streamed in without it, their texts are joined instead.
+    """
+
+    def __init__(self):
+        self.has_text = False
+
+    def begin(self, info):
+        self.has_text = "text" in info
+        return info.get("text", "")
+
+    def segment(self, index, segment, start_ms, end_ms, stamps):
+        return "" if self.has_text else " " + " ".join(segment["text"].split())
+
+
+class TsvWriter(FormatWriter):
+    """Start and end in milliseconds and the text, one cue per line"""
+
+    def begin(self, info):
+        return "start\tend\ttext\n"
+
+    def segment(self, index, segment, start_ms, end_ms, stamps):
+        text = " ".join(segment["text"].split())
+        return f"{start_ms}\t{end_ms}\t{text}\n"
+
+
+class JsonWriter(FormatWriter):
+    """Whisper-style JSON, with segments streamed before the summary fields"""
+
+    def begin(self, info):
+        self.first = True
+        return '{"segments": ['
+
+    def segment(self, index, segment, start_ms, end_ms, stamps):
+        data = dict(segment, id=index - 1, start=start_ms / 1000, end=end_ms / 1000)
+        prefix = "\n" if self.first else ",\n"
+        self.first = False
+        return prefix + json.dumps(data, ensure_ascii=False, default=float)
+
+    def end(self, info):
+        fields = "".join(
+            f", {json.dumps(name)}: {json.dumps(info[name], ensure_ascii=False)}"
+            for name in ("text", "language", "duration")
+            if name in info
+        )
+        return f"\n]{fields}}}\n"
+
+
+WRITERS = {
+    "srt": SrtWriter,
+    "vtt": VttWriter,
+    "txt": TxtWriter,
+    "json": JsonWriter,
+    "tsv": TsvWriter,
+}
+
+
+def output_paths(output_path, formats):
+    """Map each format to a path, sharing output_path's directory and stem"""
+    stem = os.path.splitext(output_path)[0]
+    paths = {}
+    for index, fmt in enumerate(formats):
+        if fmt not in WRITERS:
+            raise ValueError(f"Unsupported output format: {fmt}")
+        paths.setdefault(fmt, output_path if index == 0 else f"{stem}.{fmt}")
+    return paths
+
+
+class SegmentWriter:
+    """Write segments to one file per format in a single pass
+
+    One segment is held back so its end can be clamped against the start of
+    the next. Timestamps are computed once per segment and shared by all
+    formats. With flush_each set every cue reaches disk as soon as it is
+    known, for outputs that grow while a job runs. With mark_below set, cues
+    with a lower confidence are highlighted in SRT and VTT.
+    """
+
+    def __init__(self, paths, info=None, flush_each=False, mark_below=None):
+        self.flush_each = flush_each
+        self.outputs = []
+        try:
+            for fmt, path in paths.items():
+                writer = WRITERS[fmt]()
+                writer.mark_below = mark_below
+                f = open(path, "w", encoding="utf-8", buffering=BUFFER_SIZE)
+                self.outputs.append((writer, f))
+        except BaseException:
+            self._close_files()
+            raise
+        self.pending = None
+        self.index = 0
+        self._write(lambda writer: writer.begin(info or {}))
+
+    def _write(self, render):
+        for writer, f in self.outputs:
+            text = render(writer)
+            if text:
+                f.write(text)
+                if self.flush_each:
+                    f.flush()
+
+    def write(self, segment):
+        if self.pending is not None:
+            self._emit(self.pending, segment["start"])
+        self.pending = segment
+
+    def _emit(self, segment, next_start=None):
+        end = segment["end"]
+        if next_start is not None and end > next_start:
+            end = next_start - SEGMENT_GAP
+        start_ms = round(max(segment["start"], 0.0) * 1000)
+        end_ms = max(round(end * 1000), start_ms)
+        self.index += 1
+        args = (
+            self.index,
+            segment,
+            start_ms,
+            end_ms,
+            (format_milliseconds(start_ms), format_milliseconds(end_ms)),
+        )
+        self._write(lambda writer: writer.segment(*args))
+
+    def close(self, info=None):
+        if self.outputs:
+            if self.pending is not None:
+                self._emit(self.pending)
+                self.pending = None
+            self._write(lambda writer: writer.end(info or {}))
+        self._close_files()
+
+    def _close_files(self):
+        for _, f in self.outputs:
+            f.close()
+        self.outputs = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_outputs(result, paths, mark_below=None):
+    """Write a finished result to every format in paths ({format: path})"""
+    info = {
+        name: result[name]
+        for name in ("text", "language", "duration")
+        if name in result
+    }
+    writer = SegmentWriter(paths, info, mark_below=mark_below)
+    try:
+        for segment in result["segments"]:
+            writer.write(segment)
+    finally:
+        writer.close(info)